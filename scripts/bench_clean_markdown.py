@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vérifie que clean_markdown et MarkdownCleaner (flux) donnent exactement le même texte
+que les règles d'origine appliquées une à une, puis compare leurs temps d'exécution
+Usage: python scripts/bench_clean_markdown.py [--docs 3000] [--size 1000000] [--seed 0]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from jobassist.utils import MarkdownCleaner, _clean_markdown_regex, clean_markdown
+
+# Lignes typiques d'un CV généré par un LLM
+CV_LINES = [
+    "# {name}", "## **EXPÉRIENCE PROFESSIONNELLE**", "### {title} — {company} ({year} - {year2})",
+    "**{title}** | {company} | {year}", "* **{skill}** : {n} ans, *{skill2}*", "- {verb} d'une API {skill} [1]",
+    "- {verb} de la plateforme [{company}](https://{company}.example.com/{skill}) [2][3]",
+    "1. {verb} du pipeline `{skill}` en {n} semaines", "2) {verb} {skill}", "> Résultat : -{n} % de coûts",
+    "---", "===", "| {skill} | {n} ans |", "|---|---|", "Contact : prenom_nom@mail.fr | 06 12 34 56 78",
+    "  {verb}\tavec   {skill}  ", "", "", "```", "print('{skill}')", "__{skill}__ et _{skill2}_",
+    "+ {skill}", "Compétences : {skill}, {skill2}, CI/CD", "#{n}", "**{year}**", "***{skill}***",
+]
+WORDS = {
+    'name': ['Marie Martin', 'Jean Dupont'], 'title': ['Lead Dev', 'Data Engineer', 'SRE'],
+    'company': ['ACME', 'Globex', 'Initech'], 'year': ['2018', '2020'], 'year2': ['2022', '2024'],
+    'skill': ['Python', 'Kafka', 'C++', 'node.js', 'snake_case'], 'skill2': ['Django', 'AWS', 'Go'],
+    'verb': ['Conception', 'Migration', 'Refonte'], 'n': ['3', '12', '40'],
+}
+# Fragments mélangés au hasard pour les cas limites
+PIECES = ['*', '**', '***', '_', '__', '[', ']', '(', ')', '[1]', '`', '```', '|', '#', '##', '>', '-', '+',
+          '=', '1.', '42.', ' ', '  ', '\t', '\n', '\n\n', '\n\n\n', ' \n', 'mot', 'été', '\xa0', '\r', 'a_b']
+
+
+def realistic_doc(rng: random.Random, lines: int) -> str:
+    out = []
+    for _ in range(lines):
+        line = rng.choice(CV_LINES)
+        out.append(line.format(**{key: rng.choice(values) for key, values in WORDS.items()}))
+    return '\n'.join(out)
+
+
+def noisy_doc(rng: random.Random, pieces: int) -> str:
+    return ''.join(rng.choice(PIECES) for _ in range(pieces))
+
+
+def streamed(text: str, rng: random.Random) -> str:
+    cleaner = MarkdownCleaner()
+    parts, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 40)
+        parts.append(cleaner.feed(text[i:i + size]))
+        i += size
+    parts.append(cleaner.close())
+    return ''.join(parts)
+
+
+def check(docs: int, seed: int) -> int:
+    """Compare les deux implémentations (texte entier et flux découpé au hasard)"""
+    rng = random.Random(seed)
+    failures = 0
+    for i in range(docs):
+        text = realistic_doc(rng, rng.randint(1, 80)) if i % 2 else noisy_doc(rng, rng.randint(1, 300))
+        expected = _clean_markdown_regex(text)
+        for mode, result in (('texte', clean_markdown(text)), ('flux', streamed(text, rng))):
+            if result != expected:
+                failures += 1
+                if failures <= 3:
+                    print(f"❌ Différence ({mode}) sur le document {i}:\n{text!r}\n"
+                          f"attendu: {expected!r}\nobtenu:  {result!r}")
+    return failures
+
+
+def timed(function, text: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Différentiel et benchmark de clean_markdown")
+    parser.add_argument('--docs', type=int, default=3000, help="Documents aléatoires comparés")
+    parser.add_argument('--size', type=int, default=1_000_000, help="Taille (caractères) du texte du benchmark")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    failures = check(args.docs, args.seed)
+    print(f"{'✅' if not failures else '❌'} Différentiel: {args.docs} documents x 2 modes, {failures} différence(s)")
+
+    rng = random.Random(args.seed)
+    cases = {
+        'CV (texte propre)': ('\n'.join(line for line in realistic_doc(rng, 20000).split('\n')
+                                        if '```' not in line and '|' not in line)),
+        'CV (avec tableaux et code)': realistic_doc(rng, 20000),
+    }
+    for name, text in cases.items():
+        text = (text * (args.size // max(1, len(text)) + 1))[:args.size]
+        if _clean_markdown_regex(text) != clean_markdown(text):
+            print(f"❌ Différence sur le texte du benchmark '{name}'")
+            failures += 1
+        regex = timed(_clean_markdown_regex, text, args.repeat)
+        single = timed(clean_markdown, text, args.repeat)
+        stream = timed(lambda t: streamed(t, random.Random(args.seed)), text, 1)
+        print(f"📊 {name}: {len(text) / 1e6:.1f} Mo | règles: {regex * 1000:.0f} ms | "
+              f"clean_markdown: {single * 1000:.0f} ms (x{regex / single:.1f}) | "
+              f"flux: {stream * 1000:.0f} ms")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
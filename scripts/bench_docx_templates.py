@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare le rendu DOCX historique (un DocxTemplate par document) au cache de templates
+compilés, pour 1 puis N documents, après avoir vérifié que les documents sont identiques
+Usage: python scripts/bench_docx_templates.py [--template modele.docx] [--count 500]
+"""
+
+import argparse
+import io
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import docx
+from docxtpl import DocxTemplate
+from lxml import etree
+
+from jobassist.templates import TemplateCache
+
+CV_TEXT = """Marie Martin
+Lead Developer Python
+
+EXPÉRIENCE PROFESSIONNELLE
+Lead Dev — ACME (2020 - 2024)
+Conception d'une API Python\tFastAPI, PostgreSQL
+Migration de la plateforme vers Kafka
+
+COMPÉTENCES
+Python, Django, AWS, CI/CD
+"""
+
+
+def demo_template(path: str):
+    """Template de démonstration : en-tête, pied de page, tableau et contenu du CV"""
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "{{ name|default('CV') }} — Curriculum Vitae"
+    document.sections[0].footer.paragraphs[0].text = "Généré par JobAssist"
+    document.add_heading('Curriculum Vitae', 0)
+    for i in range(20):
+        paragraph = document.add_paragraph(f'Paragraphe de mise en page {i}. ')
+        paragraph.add_run('Texte en gras.').bold = True
+    table = document.add_table(rows=4, cols=2)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = 'Cellule'
+    document.add_paragraph('{{ cv_content }}')
+    document.save(path)
+
+
+def docx_parts(data: bytes) -> dict:
+    """Contenu d'un .docx, XML sous forme canonique"""
+    parts = {}
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for name in archive.namelist():
+            content = archive.read(name)
+            if name.endswith(('.xml', '.rels')):
+                content = etree.tostring(etree.fromstring(content), method='c14n')
+            parts[name] = content
+    return parts
+
+
+def render_docxtpl(template_path: str, context: dict, output_path: str = None) -> bytes:
+    """Rendu historique : le template est relu et réanalysé pour chaque document"""
+    tpl = DocxTemplate(template_path)
+    tpl.render(context)
+    output = io.BytesIO() if output_path is None else output_path
+    tpl.save(output)
+    return output.getvalue() if output_path is None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du cache de templates DOCX")
+    parser.add_argument('--template', help="Template .docx (défaut: template de démonstration)")
+    parser.add_argument('--count', type=int, default=500, help="Nombre de documents du rendu en série")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path = args.template
+        if not template_path:
+            template_path = str(Path(tmp) / 'template.docx')
+            demo_template(template_path)
+        contexts = [{'cv_content': f"{CV_TEXT}\nOffre {i}", 'name': f"Candidat {i}"}
+                    for i in range(args.count)]
+
+        cache = TemplateCache()
+        for context in contexts[:20]:
+            if docx_parts(render_docxtpl(template_path, context)) != docx_parts(cache.get(template_path).render(context)):
+                print("❌ Document différent de celui de DocxTemplate")
+                sys.exit(1)
+        print(f"✅ Documents identiques à DocxTemplate (mode {'DocxTemplate' if cache.get(template_path).fallback else 'compilé'})")
+
+        for count in (1, args.count):
+            cache.clear()
+            start = time.perf_counter()
+            for i, context in enumerate(contexts[:count]):
+                render_docxtpl(template_path, context, str(Path(tmp) / f"cv_{i}.docx"))
+            legacy = time.perf_counter() - start
+
+            cache.clear()
+            start = time.perf_counter()
+            cache.get(template_path).render_many(
+                (context, str(Path(tmp) / f"cv_{i}.docx")) for i, context in enumerate(contexts[:count])
+            )
+            cached = time.perf_counter() - start
+            print(f"📊 {count} document(s): DocxTemplate {legacy * 1000:.0f} ms "
+                  f"({legacy / count * 1000:.1f} ms/doc) | cache {cached * 1000:.0f} ms "
+                  f"({cached / count * 1000:.1f} ms/doc, x{legacy / cached:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de bout en bout de CVAdapter contre le serveur local de scripts/mock_api_server.py
+(aucun quota consommé) : modes single, batch et concurrent, latences p50/p95/p99, débit,
+bascules de fournisseur et statuts HTTP ; comparaison à une mesure de référence
+Usage: python scripts/bench_pipeline.py [--mode all] [--runs 10] [--offers 40] [--concurrency 8]
+       [--latency lognormal:0.5:0.4] [--gemini-errors 503=0.1] [--json mesure.json] [--baseline ref.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS.parent / 'src'))
+sys.path.insert(0, str(SCRIPTS))
+
+from mock_api_server import MockAPIServer, add_server_arguments, server_options
+
+MODES = ('single', 'batch', 'concurrent')
+CV_TEXT = """Marie Martin
+marie.martin@mail.fr | 06 12 34 56 78
+
+PROFIL
+Développeuse backend Python, 8 ans d'expérience.
+
+EXPÉRIENCE PROFESSIONNELLE
+Lead Dev — ACME (2020 - 2024)
+Conception d'une plateforme de données Kafka / PostgreSQL.
+Migration vers AWS, mise en place de la CI/CD.
+
+Développeuse — Globex (2016 - 2020)
+API Django, microservices, performance.
+
+COMPÉTENCES
+Python, Django, FastAPI, Kafka, AWS, PostgreSQL, Docker
+"""
+
+
+def serve(options: dict, connection):
+    """Processus du serveur local (hors du GIL du client mesuré)"""
+    server = MockAPIServer(**options)
+    connection.send(server.url)
+    server.httpd.serve_forever()
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def offer_text(i: int) -> str:
+    return (f"Offre {i} — Développeur(se) backend Python\n"
+            f"Stack: Python, Django, Kafka, AWS, PostgreSQL. Équipe de {4 + i % 6} personnes.\n"
+            f"Missions: conception d'API, migration cloud, performance (référence {i}).")
+
+
+def summarize(latencies: list, errors: int, wall: float, tracer) -> dict:
+    """Latences, débit, bascules et statuts HTTP d'un mode"""
+    spans = [event for event in tracer.events if event['ph'] == 'X']
+    http = Counter(f"{event['args']['provider']} {event['args'].get('status', 'erreur')}"
+                   for event in spans if event['cat'] == 'http' and not event['name'].startswith('stream'))
+    summary = {
+        'runs': len(latencies), 'errors': errors, 'wall': round(wall, 3),
+        'throughput': round(len(latencies) / wall, 3) if wall else None,
+        'fallbacks': sum(1 for event in tracer.events if event['name'] == 'fallback'),
+        'structured_fallbacks': sum(1 for event in tracer.events if event['name'] == 'structured fallback'),
+        'http': dict(sorted(http.items())),
+    }
+    if latencies:
+        summary.update({
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(max(latencies), 3),
+        })
+    return summary
+
+
+def run_mode(mode: str, args, cv_path: str, output_dir: Path) -> dict:
+    from jobassist import CVAdapter
+    from jobassist.tracing import start_tracing, stop_tracing
+
+    adapter = CVAdapter('bench-perplexity', 'bench-gemini', cache=args.cache, hedging=args.hedge,
+                        score_engine=args.score_engine, stream=args.stream, fused=args.fused,
+                        pool_maxsize=max(10, args.concurrency), jobs=False)
+    extension = args.format
+    latencies, errors = [], 0
+
+    def generate(i: int) -> float:
+        start = time.perf_counter()
+        adapter.generate_adapted_cv_direct(cv_path, offer_text(i), str(output_dir / f"{mode}_{i}.{extension}"))
+        return time.perf_counter() - start
+
+    tracer = start_tracing()
+    start = time.perf_counter()
+    # Sorties console (loaders, messages) masquées pendant la mesure
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            if mode == 'single':
+                for i in range(args.runs):
+                    try:
+                        latencies.append(generate(i))
+                    except Exception:
+                        errors += 1
+            elif mode == 'batch':
+                offers = ((f"offre_{i}", offer_text(i)) for i in range(args.offers))
+                for result in adapter.adapt_many(cv_path, offers, output_dir=str(output_dir / 'batch'),
+                                                 max_workers=args.concurrency, output_format=extension):
+                    if result['error']:
+                        errors += 1
+                    else:
+                        latencies.append(result['timings']['total'])
+            else:
+                with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                    futures = [executor.submit(generate, i) for i in range(args.offers)]
+                    for future in futures:
+                        try:
+                            latencies.append(future.result())
+                        except Exception:
+                            errors += 1
+        finally:
+            wall = time.perf_counter() - start
+            stop_tracing()
+            adapter.close()
+    return summarize(latencies, errors, wall, tracer)
+
+
+def print_summary(mode: str, summary: dict):
+    if not summary['runs']:
+        print(f"❌ {mode:<10} aucune exécution réussie ({summary['errors']} erreur(s))")
+        return
+    http = ', '.join(f"{key}: {count}" for key, count in summary['http'].items())
+    print(f"📊 {mode:<10} {summary['runs']} exécution(s), {summary['errors']} erreur(s) | "
+          f"p50 {summary['p50']:.2f}s p95 {summary['p95']:.2f}s p99 {summary['p99']:.2f}s | "
+          f"{summary['throughput']:.2f}/s | bascules: {summary['fallbacks']}"
+          + (f" | hors schéma: {summary['structured_fallbacks']}" if summary['structured_fallbacks'] else ''))
+    print(f"   HTTP: {http}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> int:
+    """Compare p95 et débit à la référence ; retourne le nombre de régressions"""
+    regressions = 0
+    for mode, summary in results.items():
+        reference = baseline.get('results', {}).get(mode)
+        if not reference or not summary.get('p95') or not reference.get('p95'):
+            continue
+        p95 = summary['p95'] / reference['p95'] - 1
+        throughput = summary['throughput'] / reference['throughput'] - 1
+        regressed = p95 > tolerance or throughput < -tolerance
+        regressions += regressed
+        print(f"{'❌' if regressed else '✅'} {mode:<10} p95 {p95:+.0%} | débit {throughput:+.0%} (référence)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout contre un serveur local")
+    parser.add_argument('--mode', choices=MODES + ('all',), default='all')
+    parser.add_argument('--runs', type=int, default=10, help="Exécutions successives du mode single (défaut: 10)")
+    parser.add_argument('--offers', type=int, default=40, help="Offres des modes batch et concurrent (défaut: 40)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Parallélisme batch/concurrent (défaut: 8)")
+    parser.add_argument('--cv', help="CV (PDF ou TXT) ; défaut: CV texte de démonstration")
+    parser.add_argument('--format', choices=('pdf', 'txt'), default='pdf', help="Format des CV générés")
+    parser.add_argument('--stream', action='store_true', help="Adaptation en streaming (single/concurrent)")
+    parser.add_argument('--hedge', action='store_true')
+    parser.add_argument('--fused', action='store_true', help="Adaptation et score en une requête (JSON structuré)")
+    parser.add_argument('--score-engine', choices=('llm', 'local', 'hybrid'), default='llm')
+    parser.add_argument('--cache', action='store_true', help="Active le cache des réponses (désactivé par défaut)")
+    parser.add_argument('--json', help="Enregistre la configuration et les résultats")
+    parser.add_argument('--baseline', help="Résultats de référence (--json d'une exécution précédente)")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Écart toléré sur p95 et débit avant de signaler une régression (défaut: 0.2)")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    server = multiprocessing.Process(target=serve, args=(server_options(args), sender), daemon=True)
+    server.start()
+    url = receiver.recv()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Les URLs et le cache sont lus à l'import de jobassist
+        os.environ.update({
+            'JOBASSIST_PERPLEXITY_URL': url, 'JOBASSIST_GEMINI_URL': url,
+            'JOBASSIST_CACHE_DIR': str(Path(tmp) / 'cache'),
+        })
+        cv_path = args.cv
+        if not cv_path:
+            cv_path = str(Path(tmp) / 'cv.txt')
+            Path(cv_path).write_text(CV_TEXT, encoding='utf-8')
+
+        print(f"🧪 Serveur local {url} | latence {args.latency} | erreurs "
+              f"perplexity [{args.perplexity_errors or args.errors}] gemini [{args.gemini_errors or args.errors}]")
+        results = {}
+        try:
+            for mode in (MODES if args.mode == 'all' else (args.mode,)):
+                results[mode] = run_mode(mode, args, cv_path, Path(tmp))
+                print_summary(mode, results[mode])
+        finally:
+            server.terminate()
+
+    config = {key: value for key, value in vars(args).items() if key not in ('json', 'baseline')}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"📝 Résultats: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            if compare(results, json.load(f), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
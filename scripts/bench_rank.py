@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du classement CV x offres (jobassist rank) sur un corpus synthétique : durée de la
+matrice de similarité vectorisée, comparée au score local couple par couple (LocalScorer,
+extrapolé depuis un échantillon) ; échoue au-delà du budget
+Usage: python scripts/bench_rank.py [--cvs 3000] [--offers 500] [--top 10] [--budget 10] [--json mesure.json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from jobassist.rank import SimilarityMatrix
+from jobassist.scoring import LocalScorer
+
+SKILLS = ('python django fastapi flask kafka spark airflow aws gcp azure docker kubernetes terraform '
+          'postgresql mysql mongodb redis elasticsearch react vue angular typescript javascript node.js '
+          'java spring kotlin scala go rust c++ c# .net php symfony laravel ruby rails swift ios android '
+          'linux ansible jenkins gitlab ci/cd scrum agile sql pandas numpy pytorch tensorflow mlops '
+          'tableau powerbi excel sap salesforce jira figma ux seo comptabilité paie juridique marketing').split()
+WORDS = ('équipe projet client conception développement maintenance architecture données production '
+         'qualité sécurité performance migration plateforme service produit analyse gestion pilotage '
+         'amélioration automatisation documentation support formation recrutement budget stratégie').split()
+TITLES = ('Développeur', 'Data Engineer', 'Chef de projet', 'DevOps', 'Data Scientist', 'Product Owner',
+          'Architecte', 'Consultant', 'Comptable', 'Chargé de marketing')
+
+
+def document(rng: random.Random, kind: str, skills: int, words: int) -> str:
+    picked = rng.sample(SKILLS, skills)
+    lines = [f"{rng.choice(TITLES)} {kind}", ' '.join(rng.choices(WORDS, k=words))]
+    lines.append('Compétences: ' + ', '.join(picked))
+    lines.append(' '.join(rng.choices(WORDS + picked, k=words)))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du classement CV x offres")
+    parser.add_argument('--cvs', type=int, default=3000, help="Nombre de CV (défaut: 3000)")
+    parser.add_argument('--offers', type=int, default=500, help="Nombre d'offres (défaut: 500)")
+    parser.add_argument('--top', type=int, default=10, help="Taille des listes courtes (défaut: 10)")
+    parser.add_argument('--sample', type=int, default=200,
+                        help="Couples scorés un par un pour l'extrapolation (défaut: 200)")
+    parser.add_argument('--budget', type=float, default=10, help="Durée maximale du classement en s (défaut: 10)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Enregistre les mesures")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cvs = [(f"cv-{i}", document(rng, 'senior', 12, 250)) for i in range(args.cvs)]
+    offers = [(f"offre-{j}", document(rng, 'H/F', 8, 120)) for j in range(args.offers)]
+
+    start = time.perf_counter()
+    matrix = SimilarityMatrix.from_texts(cvs, offers)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    by_offer = matrix.shortlist('offer', args.top)
+    by_cv = matrix.shortlist('cv', args.top)
+    pairs = matrix.top_pairs(args.top)
+    ranked = time.perf_counter() - start
+    total = built + ranked
+
+    scorer = LocalScorer()
+    sample = [(rng.randrange(args.cvs), rng.randrange(args.offers)) for _ in range(args.sample)]
+    start = time.perf_counter()
+    for i, j in sample:
+        scorer.score(cvs[i][1], offers[j][1])
+    per_pair = (time.perf_counter() - start) / max(1, len(sample))
+    pairwise = per_pair * args.cvs * args.offers
+
+    print(f"📚 Corpus: {args.cvs} CV x {args.offers} offre(s) = {args.cvs * args.offers:,} couples".replace(',', ' '))
+    print(f"🧮 Matrice de similarité  {built:7.2f} s")
+    print(f"🏅 Listes courtes (top {args.top} par offre et par CV, meilleurs couples) {ranked:.2f} s")
+    print(f"🐢 LocalScorer couple par couple (extrapolé) {pairwise:9.1f} s "
+          f"({per_pair * 1000:.2f} ms/couple, x{pairwise / total:.0f})")
+    best = pairs[0] if pairs else None
+    if best:
+        print(f"🎯 Meilleur couple: {best['cv']} × {best['offer']} (score: {best['score']})")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'cvs': args.cvs, 'offers': args.offers, 'top': args.top,
+                'matrix_s': round(built, 3), 'shortlists_s': round(ranked, 3),
+                'pairwise_estimate_s': round(pairwise, 1),
+                'shortlists': {'offer': len(by_offer), 'cv': len(by_cv)},
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n📝 Mesures: {args.json}")
+
+    print()
+    if total > args.budget:
+        print(f"❌ Classement en {total:.2f} s au-delà du budget de {args.budget:.0f} s")
+        sys.exit(1)
+    print(f"✅ Classement dans le budget ({total:.2f} s ≤ {args.budget:.0f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du démarrage de la CLI : temps de `python -m jobassist --help` (médiane, p95),
+modules les plus longs à importer (python -X importtime) et dépendances lourdes chargées
+alors qu'elles ne devraient l'être qu'au premier usage ; échoue au-delà du budget
+Usage: python scripts/bench_startup.py [--runs 20] [--budget 300] [--top 15] [--json mesure.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / 'src'
+
+# Dépendances chargées au premier usage (PDF, DOCX, réseau, score local) : jamais pour --help
+HEAVY_MODULES = ('requests', 'urllib3', 'aiohttp', 'numpy', 'pypdf', 'docx', 'docxtpl', 'jinja2', 'reportlab')
+
+
+def python_env() -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(SRC), env.get('PYTHONPATH')]))
+    # Pas de .pyc obsolètes ni de cache désactivé : on mesure un démarrage ordinaire
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def time_command(command: list, runs: int, env: dict) -> list:
+    """Durées (secondes) de runs exécutions de command, après une exécution de chauffe"""
+    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def import_times(env: dict) -> list:
+    """Modules importés par `import jobassist.cli` : (temps cumulé µs, temps propre µs, nom)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import jobassist.cli'],
+                            env=env, capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative), int(own), name.rstrip()))
+    return modules
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage de la CLI jobassist")
+    parser.add_argument('--runs', type=int, default=20, help="Exécutions mesurées (défaut: 20)")
+    parser.add_argument('--budget', type=float, default=300,
+                        help="Médiane maximale de `python -m jobassist --help` en ms (défaut: 300)")
+    parser.add_argument('--top', type=int, default=15, help="Modules affichés (défaut: 15)")
+    parser.add_argument('--json', help="Enregistre les mesures")
+    args = parser.parse_args()
+
+    env = python_env()
+    interpreter = time_command([sys.executable, '-c', 'pass'], args.runs, env)
+    cli = time_command([sys.executable, '-m', 'jobassist', '--help'], args.runs, env)
+    modules = import_times(env)
+
+    print(f"🐍 Interpréteur seul      médiane {statistics.median(interpreter) * 1000:6.1f} ms")
+    print(f"🚀 jobassist --help       médiane {statistics.median(cli) * 1000:6.1f} ms | "
+          f"p95 {percentile(cli, 95) * 1000:.1f} ms | min {min(cli) * 1000:.1f} ms ({args.runs} exécutions)")
+
+    print(f"\n📦 Imports de jobassist.cli (les {args.top} plus longs, temps cumulé / propre):")
+    for cumulative, own, name in sorted(modules, reverse=True)[:args.top]:
+        print(f"   {cumulative / 1000:7.1f} ms {own / 1000:7.1f} ms  {name}")
+
+    imported = {name.strip().split('.')[0] for _, _, name in modules}
+    heavy = sorted(imported.intersection(HEAVY_MODULES))
+    median = statistics.median(cli) * 1000
+    failures = []
+    if heavy:
+        failures.append(f"dépendances lourdes importées au démarrage: {', '.join(heavy)}")
+    if median > args.budget:
+        failures.append(f"médiane {median:.1f} ms au-delà du budget de {args.budget:.0f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'runs': args.runs, 'budget_ms': args.budget,
+                'interpreter_ms': round(statistics.median(interpreter) * 1000, 1),
+                'help_ms': {'median': round(median, 1), 'p95': round(percentile(cli, 95) * 1000, 1),
+                            'min': round(min(cli) * 1000, 1)},
+                'heavy_modules': heavy,
+                'imports': [{'module': name.strip(), 'cumulative_us': cumulative, 'self_us': own}
+                            for cumulative, own, name in sorted(modules, reverse=True)[:args.top]],
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n📝 Mesures: {args.json}")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"✅ Démarrage dans le budget ({median:.1f} ms ≤ {args.budget:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
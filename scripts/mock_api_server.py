@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur local imitant les APIs Perplexity (chat/completions) et Gemini (generateContent,
+streamGenerateContent) : latence aléatoire, erreurs 429/503 injectées, taille des réponses
+Usage: python scripts/mock_api_server.py [--port 8765] [--latency lognormal:0.8:0.4] [--gemini-errors 503=0.1]
+Puis: JOBASSIST_PERPLEXITY_URL=http://127.0.0.1:8765 JOBASSIST_GEMINI_URL=http://127.0.0.1:8765 python -m jobassist ...
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROVIDERS = ('perplexity', 'gemini')
+WORDS = ['Python', 'Kafka', 'AWS', 'conception', 'migration', 'équipe', 'API', 'plateforme', 'données',
+         'performance', 'Django', 'CI/CD', 'livraison', 'architecture', 'microservices', 'PostgreSQL']
+
+
+def latency_sampler(spec: str):
+    """Distribution de latence (secondes) : fixed:S, uniform:MIN:MAX, normal:MOY:ET,
+    lognormal:MEDIANE:SIGMA ou exp:MOY"""
+    kind, *values = spec.split(':')
+    values = [float(value) for value in values]
+    distributions = {
+        'fixed': (1, lambda rng, s: s),
+        'uniform': (2, lambda rng, low, high: rng.uniform(low, high)),
+        'normal': (2, lambda rng, mean, sd: max(0.0, rng.gauss(mean, sd))),
+        'lognormal': (2, lambda rng, median, sigma: median * rng.lognormvariate(0, sigma)),
+        'exp': (1, lambda rng, mean: rng.expovariate(1 / mean) if mean else 0.0),
+    }
+    if kind not in distributions or len(values) != distributions[kind][0]:
+        raise argparse.ArgumentTypeError(f"Latence invalide: {spec}")
+    sample = distributions[kind][1]
+    return lambda rng: sample(rng, *values)
+
+
+def error_rates(spec: str) -> dict:
+    """Taux d'erreurs injectées : "429=0.05,503=0.1" """
+    rates = {}
+    for item in filter(None, spec.split(',')):
+        status, rate = item.split('=')
+        rates[int(status)] = float(rate)
+    if sum(rates.values()) > 1:
+        raise argparse.ArgumentTypeError(f"Taux d'erreurs > 1: {spec}")
+    return rates
+
+
+def latency_spec(spec: str) -> str:
+    """Type argparse : valide la distribution et garde sa spécification (sérialisable)"""
+    latency_sampler(spec)
+    return spec
+
+
+def errors_spec(spec: str) -> str:
+    error_rates(spec)
+    return spec
+
+
+def text_of_size(rng: random.Random, chars: int, title: str) -> str:
+    """Texte pseudo-CV (titres, puces) d'environ chars caractères"""
+    lines = [f"# {title}"]
+    size = len(lines[0])
+    while size < chars:
+        line = '- ' + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+        if rng.random() < 0.1:
+            line = f"\n## **{rng.choice(WORDS).upper()}**"
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines)[:max(chars, 1)]
+
+
+class MockAPIServer:
+    """Serveur HTTP multi-thread ; configuration par fournisseur (latence, erreurs, tailles)
+
+    latency et errors associent à chaque fournisseur une spécification texte
+    ("lognormal:0.5:0.4", "429=0.02,503=0.05").
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: dict = None, errors: dict = None,
+                 adapt_chars: int = 3000, analysis_chars: int = 1500, chunk_chars: int = 40,
+                 chunk_interval: float = 0.01, retry_after: str = None, malformed: float = 0.0, seed: int = 0):
+        latency = latency or {}
+        errors = errors or {}
+        self.latency = {provider: latency_sampler(latency.get(provider, 'fixed:0')) for provider in PROVIDERS}
+        self.errors = {provider: error_rates(errors.get(provider, '')) for provider in PROVIDERS}
+        self.adapt_chars = adapt_chars
+        self.analysis_chars = analysis_chars
+        self.chunk_chars = chunk_chars
+        self.chunk_interval = chunk_interval
+        self.retry_after = retry_after
+        self.malformed = malformed
+        self.rng = random.Random(seed)
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockAPIServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def draw(self, provider: str, generation: bool):
+        """Tire la latence et le statut d'une requête"""
+        with self._lock:
+            delay = self.latency[provider](self.rng)
+            roll = self.rng.random()
+        status = 200
+        if generation:
+            for code, rate in self.errors[provider].items():
+                if roll < rate:
+                    status = code
+                    break
+                roll -= rate
+        return delay, status
+
+    def count(self, provider: str, status: int):
+        with self._lock:
+            self.counts[f"{provider} {status}"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, body: dict, headers: dict = None):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, events):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                try:
+                    for i, event in enumerate(events):
+                        if i:
+                            time.sleep(server.chunk_interval)
+                        data = f"data: {event}\n\n".encode('utf-8')
+                        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client parti en cours de flux (abandon, stall timeout)
+                    self.close_connection = True
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path == '/_stats':
+                    return self._send_json(200, server.stats())
+                if self.path.startswith('/v1beta/models/'):
+                    server.count('gemini', 200)
+                    return self._send_json(200, {'name': self.path.split('?')[0].rsplit('/', 1)[-1]})
+                self._send_json(404, {'error': {'message': 'not found'}})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if self.path.startswith('/chat/completions'):
+                    provider = 'perplexity'
+                    max_tokens = body.get('max_tokens')
+                    stream = body.get('stream', False)
+                    structured = 'response_format' in body
+                elif re.match(r'/v1beta/models/[^:]+:(stream)?[gG]enerateContent', self.path):
+                    provider = 'gemini'
+                    max_tokens = body.get('generationConfig', {}).get('maxOutputTokens')
+                    stream = ':streamGenerateContent' in self.path
+                    structured = 'responseSchema' in body.get('generationConfig', {})
+                else:
+                    return self._send_json(404, {'error': {'message': 'not found'}})
+
+                # Sondes de santé (1 token) jamais en erreur : seules les générations le sont
+                delay, status = server.draw(provider, generation=max_tokens != 1)
+                time.sleep(delay)
+                server.count(provider, status)
+                if status != 200:
+                    message = 'Resource has been exhausted' if status == 429 else 'The model is overloaded'
+                    headers = {'Retry-After': server.retry_after} if server.retry_after else None
+                    return self._send_json(status, {'error': {'code': status, 'message': message}}, headers)
+
+                with server._lock:
+                    if max_tokens in (1, 10):
+                        text = 'OK' if max_tokens == 1 else str(server.rng.randint(40, 95))
+                    elif 'ressources humaines' in json.dumps(body.get('messages', [])):
+                        text = text_of_size(server.rng, server.analysis_chars, 'Analyse')
+                    else:
+                        text = text_of_size(server.rng, server.adapt_chars, 'CV adapté')
+                    # Sortie structurée (adaptation + score), hors schéma dans une fraction malformed des cas
+                    if structured and server.rng.random() >= server.malformed:
+                        text = json.dumps({'cv': text, 'score': server.rng.randint(40, 95)}, ensure_ascii=False)
+
+                if provider == 'perplexity':
+                    if not stream:
+                        return self._send_json(200, {'choices': [{'message': {'role': 'assistant', 'content': text}}]})
+                    pieces = [text[i:i + server.chunk_chars] for i in range(0, len(text), server.chunk_chars)]
+                    events = [json.dumps({'choices': [{'delta': {'content': piece}}]}) for piece in pieces]
+                    return self._send_stream(events + ['[DONE]'])
+
+                if not stream:
+                    return self._send_json(200, {'candidates': [{'content': {'parts': [{'text': text}]}}]})
+                pieces = [text[i:i + server.chunk_chars] for i in range(0, len(text), server.chunk_chars)]
+                self._send_stream(json.dumps({'candidates': [{'content': {'parts': [{'text': piece}]}}]})
+                                  for piece in pieces)
+
+        return Handler
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """Options du serveur (partagées avec scripts/bench_pipeline.py)"""
+    parser.add_argument('--latency', type=latency_spec, default='lognormal:0.5:0.4',
+                        help="Latence des deux APIs: fixed:S, uniform:MIN:MAX, normal:MOY:ET, "
+                             "lognormal:MEDIANE:SIGMA, exp:MOY (défaut: lognormal:0.5:0.4)")
+    parser.add_argument('--perplexity-latency', type=latency_spec, help="Latence de Perplexity uniquement")
+    parser.add_argument('--gemini-latency', type=latency_spec, help="Latence de Gemini uniquement")
+    parser.add_argument('--errors', type=errors_spec, default='', help="Erreurs des deux APIs, ex. 429=0.02,503=0.05")
+    parser.add_argument('--perplexity-errors', type=errors_spec, help="Erreurs de Perplexity uniquement")
+    parser.add_argument('--gemini-errors', type=errors_spec, help="Erreurs de Gemini uniquement")
+    parser.add_argument('--adapt-chars', type=int, default=3000, help="Taille du CV adapté renvoyé (défaut: 3000)")
+    parser.add_argument('--analysis-chars', type=int, default=1500, help="Taille de l'analyse renvoyée (défaut: 1500)")
+    parser.add_argument('--chunk-interval', type=float, default=0.01,
+                        help="Délai entre deux fragments d'une réponse en streaming (défaut: 0.01s)")
+    parser.add_argument('--retry-after', help="En-tête Retry-After des erreurs injectées (secondes)")
+    parser.add_argument('--malformed', type=float, default=0.0,
+                        help="Fraction des réponses structurées (JSON) renvoyées hors schéma (défaut: 0)")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def server_options(args) -> dict:
+    """Paramètres de MockAPIServer tirés des options (dictionnaire sérialisable)"""
+    return {
+        'latency': {'perplexity': args.perplexity_latency or args.latency,
+                    'gemini': args.gemini_latency or args.latency},
+        'errors': {'perplexity': args.errors if args.perplexity_errors is None else args.perplexity_errors,
+                   'gemini': args.errors if args.gemini_errors is None else args.gemini_errors},
+        'adapt_chars': args.adapt_chars, 'analysis_chars': args.analysis_chars,
+        'chunk_interval': args.chunk_interval, 'retry_after': args.retry_after,
+        'malformed': args.malformed, 'seed': args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local imitant les APIs Perplexity et Gemini")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765, help="Port (0: port libre)")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockAPIServer(args.host, args.port, **server_options(args))
+    print(f"🧪 Serveur de test: {server.url}", flush=True)
+    print(f"   JOBASSIST_PERPLEXITY_URL={server.url} JOBASSIST_GEMINI_URL={server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n📊 Requêtes: {server.stats()}")
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
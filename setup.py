@@ -35,14 +35,15 @@ setup(
         "Topic :: Office/Business",
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.7",
-        "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
     ],
-    python_requires=">=3.7",
+    python_requires=">=3.9",
     install_requires=requirements,
+    extras_require={
+        "async": ["aiohttp"],
+    },
     entry_points={
         "console_scripts": [
             "jobassist=jobassist.cli:main",
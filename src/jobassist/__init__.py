@@ -5,7 +5,24 @@ JobAssist - Agent IA d'adaptation de CV
 __version__ = "1.0.0"
 __author__ = "JobAssist Team"
 
-from .adapter import CVAdapter
-from .config import load_api_keys
+__all__ = ['CVAdapter', 'AsyncCVAdapter', 'load_api_keys']
 
-__all__ = ['CVAdapter', 'load_api_keys']
+# Exports chargés au premier accès (PEP 562) : `import jobassist` et `--help` restent rapides
+_EXPORTS = {
+    'CVAdapter': '.adapter',
+    'AsyncCVAdapter': '.async_adapter',
+    'load_api_keys': '.config',
+}
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
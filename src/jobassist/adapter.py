@@ -2,123 +2,229 @@
 Classe principale CVAdapter pour l'adaptation de CV
 """
 
-import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-try:
-    from pypdf import PdfReader
-except ImportError:
-    PdfReader = None
+from .api_client import (
+    GEMINI_MODEL,
+    PERPLEXITY_MODEL,
+    APIError,
+    PerplexityClient,
+    GeminiClient,
+    create_session,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_STALL_TIMEOUT,
+    MalformedOutputError,
+)
+from .batch import safe_filename
+from .cache import ResponseCache
+from .extraction import PdfExtractor
+from .hedging import DEFAULT_HEDGE_AFTER, Hedger
+from .health import HealthChecker, InvalidAPIKeyError, OK, QUOTA, OVERLOADED, UNREACHABLE, INVALID_KEY
+from .jobs import JobStore, STAGE_LABELS, file_hash, job_key
+from .lazy import LazyModule
+from .pdf_generator import PdfRenderer, PdfStreamWriter
+from .router import ProviderRouter, PROVIDER_LABELS
+from .scoring import LocalScorer, SCORE_ENGINES, combine_scores
+from .templates import CompiledTemplate, TemplateCache
+from .tracing import instant, span
+from .utils import Loader, silent_loaders
 
-try:
-    from docxtpl import DocxTemplate
-except ImportError:
-    DocxTemplate = None
-
-from .api_client import PerplexityClient, GeminiClient
-from .pdf_generator import generate_pdf
-from .utils import Loader
+pypdf = LazyModule('pypdf')
+docxtpl = LazyModule('docxtpl')
 
 
 class CVAdapter:
     """Adaptateur CV utilisant Perplexity et Gemini"""
     
-    def __init__(self, perplexity_key: str, gemini_key: str):
-        """Initialise l'adaptateur CV"""
-        self.perplexity_client = PerplexityClient(perplexity_key)
-        self.gemini_client = GeminiClient(gemini_key)
-        self.gemini_available = True
-        self._test_api_connections()
+    def __init__(self,
+                 perplexity_key: str,
+                 gemini_key: str,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 keep_alive: bool = True,
+                 check_connections: bool = True,
+                 cache: Union[bool, ResponseCache] = True,
+                 router: Optional[ProviderRouter] = None,
+                 hedging: Union[bool, Hedger] = False,
+                 hedge_after: Optional[float] = DEFAULT_HEDGE_AFTER,
+                 score_engine: str = 'llm',
+                 stream: bool = False,
+                 stall_timeout: float = DEFAULT_STALL_TIMEOUT,
+                 jobs: Union[bool, JobStore] = True,
+                 fused: bool = False):
+        """Initialise l'adaptateur CV (une session HTTP poolée par fournisseur)
+        
+        cache: True pour le cache disque par défaut, False pour le désactiver,
+        ou une instance de ResponseCache.
+        router: routage adaptatif Gemini/Perplexity (latence, erreurs, circuit breaker).
+        check_connections: vérifie les clés au premier appel réseau (voir ensure_ready).
+        hedging: relance adapt/score sur l'autre fournisseur si le premier tarde (opt-in) ;
+        hedge_after: délai avant relance tant que les latences ne sont pas mesurées.
+        score_engine: 'llm' (appel API), 'local' (TF-IDF NumPy, sans réseau) ou 'hybrid' (moyenne des deux).
+        stream: affiche et écrit le CV adapté au fil de la génération (abandon après
+        stall_timeout secondes sans donnée).
+        jobs: journal des jobs (True: DEFAULT_CACHE_DIR/jobs.sqlite, False: désactivé, ou une
+        instance de JobStore) ; generate_* et adapt_many reprennent un job interrompu après
+        sa dernière étape terminée.
+        fused: adaptation et score LLM en une seule requête (sortie JSON structurée), au
+        lieu de deux requêtes successives ; sans effet en streaming ou avec score_engine='local'.
+        """
+        if score_engine not in SCORE_ENGINES:
+            raise ValueError(f"Moteur de score inconnu: {score_engine} (choix: {', '.join(SCORE_ENGINES)})")
+        session_options = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'keep_alive': keep_alive
+        }
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache or None
+        if jobs is True:
+            jobs = JobStore()
+        self.jobs = jobs or None
+        self.perplexity_client = PerplexityClient(perplexity_key, create_session(**session_options), self.cache)
+        self.gemini_client = GeminiClient(gemini_key, create_session(**session_options), self.cache)
+        self.router = router or ProviderRouter()
+        if hedging is True:
+            hedging = Hedger(self.router, initial_delay=hedge_after)
+        self.hedger = hedging or None
+        self.score_engine = score_engine
+        self.local_scorer = LocalScorer() if score_engine != 'llm' else None
+        self.stream = stream
+        self.stall_timeout = stall_timeout
+        self.fused = fused
+        self._extractor = None
+        self._renderer = None
+        self.templates = TemplateCache()
+        self.check_connections = check_connections
+        self.health = HealthChecker({'perplexity': self.perplexity_client, 'gemini': self.gemini_client})
+        self._ready = False
+        self._ready_lock = threading.Lock()
     
-    def _test_api_connections(self):
-        """Test la connexion aux APIs"""
-        print("\n🔐 Vérification des clés API et connexions...\n")
+    def ensure_ready(self):
+        """Vérifie les clés et la disponibilité des APIs au premier appel réseau
         
-        # Test Perplexity
-        loader = Loader("Vérification Perplexity API")
-        loader.start()
-        try:
-            import requests
-            response = requests.post(
-                "https://api.perplexity.ai/chat/completions",
-                headers={
-                    'Authorization': f'Bearer {self.perplexity_client.api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'sonar-pro',
-                    'messages': [{'role': 'user', 'content': 'test'}]
-                },
-                timeout=10
-            )
-            loader.stop()
+        Les deux fournisseurs sont sondés en parallèle ; le résultat est persisté
+        (TTL) et réutilisé par les exécutions suivantes. Lève InvalidAPIKeyError
+        si une clé est refusée ; un fournisseur en quota ou indisponible est mis
+        de côté par le routeur jusqu'à sa prochaine requête de test.
+        """
+        if self._ready or not self.check_connections:
+            return
+        
+        with self._ready_lock:
+            if self._ready:
+                return
             
-            if response.status_code == 401:
-                print("❌ Erreur Perplexity: Clé API invalide")
-                sys.exit(1)
-            elif response.status_code == 429:
-                print("⚠️  Perplexity: Quota atteint")
-                sys.exit(1)
-            elif response.status_code == 200:
-                print("✅ Perplexity API: OK")
-            else:
-                print(f"⚠️  Perplexity: Statut {response.status_code}")
-        except Exception as e:
-            loader.stop()
-            print(f"❌ Erreur Perplexity: {str(e)[:100]}")
-            sys.exit(1)
+            statuses = self.health.cached()
+            probed = len(statuses) < len(self.health.clients)
+            if probed:
+                print("\n🔐 Vérification des clés API et connexions...\n")
+                loader = Loader("Vérification Perplexity et Gemini API")
+                loader.start()
+                try:
+                    with span('health_check', providers=list(self.health.clients)) as current:
+                        statuses = self.health.check()
+                        current.set(statuses=statuses)
+                finally:
+                    loader.stop()
+            
+            self._apply_health(statuses, verbose=probed)
+            self._ready = True
+            if probed:
+                print("\n✅ Configuration complète!\n")
+    
+    def _apply_health(self, statuses: dict, verbose: bool = True):
+        """Applique le résultat des sondes au routeur"""
+        messages = {
+            OK: "✅ {name} API: OK",
+            QUOTA: "⚠️  {name}: Quota atteint (fallback sur l'autre fournisseur)",
+            OVERLOADED: "⚠️  {name}: Overloadé (fallback sur l'autre fournisseur)",
+            UNREACHABLE: "⚠️  {name}: API injoignable (fallback sur l'autre fournisseur)",
+        }
         
-        # Test Gemini
-        loader = Loader("Vérification Gemini API")
-        loader.start()
-        self.gemini_available = True
-        try:
-            import requests
-            response = requests.post(
-                f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={self.gemini_client.api_key}",
-                headers={'Content-Type': 'application/json'},
-                json={
-                    'contents': [{'role': 'user', 'parts': [{'text': 'test'}]}]
-                },
-                timeout=10
-            )
-            loader.stop()
+        for provider, status in statuses.items():
+            name = PROVIDER_LABELS[provider]
+            if status == INVALID_KEY:
+                self.health.invalidate(provider)
+                raise InvalidAPIKeyError(f"{name}: Clé API invalide")
             
-            if response.status_code == 401 or 'INVALID_ARGUMENT' in response.text:
-                print("❌ Erreur Gemini: Clé API invalide")
-                sys.exit(1)
-            elif response.status_code == 429:
-                print("⚠️  Gemini: Quota atteint - utilisation exclusive de Perplexity")
-                self.gemini_available = False
-            elif response.status_code == 200:
-                print("✅ Gemini API: OK")
-                self.gemini_available = True
-            elif response.status_code == 503:
-                print("⚠️  Gemini: Overloadé (fallback sur Perplexity)")
-                self.gemini_available = False
-            else:
-                print(f"⚠️  Gemini: Statut {response.status_code}")
-                self.gemini_available = False
-        except Exception as e:
-            loader.stop()
-            print(f"❌ Erreur Gemini: {str(e)[:100]}")
-            sys.exit(1)
+            if verbose:
+                print(messages.get(status, "⚠️  {name}: Statut {status}").format(name=name, status=status))
+            
+            if status != OK:
+                self.router.trip(provider)
+    
+    def _on_provider_failure(self, provider: str, error: Optional[Exception] = None):
+        """Suites d'un échec au-delà du circuit breaker du routeur
         
-        print("\n✅ Configuration complète!\n")
+        401/403 (clé probablement révoquée) : la prochaine étape re-vérifie les clés.
+        Circuit ouvert : l'état persisté du fournisseur est oublié, les exécutions
+        suivantes le re-sonderont ; ici, la requête de test du circuit semi-ouvert
+        tient lieu de sonde. Un 5xx ou un timeout isolé ne déclenche rien de plus.
+        """
+        if isinstance(error, APIError) and error.status in (401, 403):
+            self.health.invalidate(provider)
+            self._ready = False
+        elif not self.router.is_available(provider):
+            self.health.invalidate(provider)
+    
+    def close(self):
+        """Ferme les sessions HTTP des clients et le pool de rendu PDF"""
+        self.perplexity_client.close()
+        self.gemini_client.close()
+        if self._renderer is not None:
+            self._renderer.close()
+    
+    @property
+    def _fused_enabled(self) -> bool:
+        """Adaptation et score en une requête (inutile en streaming ou sans score LLM)"""
+        return self.fused and not self.stream and self.score_engine != 'local'
+    
+    @property
+    def job_mode(self) -> str:
+        """Mode de génération inclus dans l'identifiant des jobs (modèles, requête fusionnée, streaming)"""
+        return '+'.join([PERPLEXITY_MODEL, GEMINI_MODEL]
+                        + ['fused'] * self._fused_enabled + ['stream'] * self.stream)
+    
+    @property
+    def extractor(self) -> PdfExtractor:
+        """Moteur d'extraction PDF (créé au premier PDF, cache lié à l'option cache)"""
+        if self._extractor is None:
+            self._extractor = PdfExtractor(cache=self.cache is not None)
+        return self._extractor
+    
+    @property
+    def renderer(self) -> PdfRenderer:
+        """Moteur de rendu PDF (styles construits une fois, pool de processus créé au premier batch)"""
+        if self._renderer is None:
+            self._renderer = PdfRenderer()
+        return self._renderer
     
     def extract_pdf_text(self, pdf_path: str) -> str:
-        """Extrait le texte d'un PDF"""
-        if not PdfReader:
+        """Extrait le texte d'un PDF (une seule fois par version du fichier, grâce au cache)"""
+        if not pypdf:
             raise ImportError("pypdf not installed. Run: pip install -r requirements.txt")
         
         print(f"📄 Extraction du PDF: {pdf_path}...")
-        reader = PdfReader(pdf_path)
-        text = ""
-        
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
+        with span('extract_pdf', path=pdf_path) as current:
+            text, stats = self.extractor.extract(pdf_path)
+            current.set(pages=stats['pages'], cached=stats['cached'], workers=stats['workers'], chars=len(text))
         
+        if stats['cached']:
+            print(f"   ↳ déjà extrait (cache), {stats['seconds'] * 1000:.0f} ms")
+        else:
+            details = f"{stats['pages']} page(s) en {stats['seconds']:.2f}s"
+            if stats['workers'] > 1:
+                details += f" sur {stats['workers']} processus"
+            if stats['page_peak_memory']:
+                details += f", pic mémoire max {max(stats['page_peak_memory']) / 1024 / 1024:.1f} Mo/page"
+            print(f"   ↳ {details}")
         return text
     
     def extract_text_file(self, txt_path: str) -> str:
@@ -131,148 +237,449 @@ class CVAdapter:
         """Charge le CV (PDF ou TXT)"""
         ext = Path(cv_path).suffix.lower()
         
-        if ext == '.pdf':
-            return self.extract_pdf_text(cv_path)
-        elif ext == '.txt':
-            return self.extract_text_file(cv_path)
-        else:
-            raise ValueError(f"Format non supporté: {ext}. Utilisez PDF ou TXT.")
+        with span('load_cv', path=cv_path, format=ext):
+            if ext == '.pdf':
+                return self.extract_pdf_text(cv_path)
+            elif ext == '.txt':
+                return self.extract_text_file(cv_path)
+            else:
+                raise ValueError(f"Format non supporté: {ext}. Utilisez PDF ou TXT.")
+    
+    def load_cvs(self, cv_paths: Sequence[str]) -> List[str]:
+        """Charge plusieurs CV (PDF ou TXT), dans l'ordre de cv_paths
+        
+        Équivalent de load_cv sur chaque fichier, sans sortie par fichier : les PDF sont
+        extraits ensemble (pool de processus, cache d'extraction).
+        """
+        for cv_path in cv_paths:
+            ext = Path(cv_path).suffix.lower()
+            if ext not in ('.pdf', '.txt'):
+                raise ValueError(f"Format non supporté: {ext} ({cv_path}). Utilisez PDF ou TXT.")
+        pdf_paths = [str(p) for p in cv_paths if Path(p).suffix.lower() == '.pdf']
+        if pdf_paths and not pypdf:
+            raise ImportError("pypdf not installed. Run: pip install -r requirements.txt")
+        
+        with span('load_cvs', count=len(cv_paths), pdf=len(pdf_paths)):
+            extracted = {}
+            if pdf_paths:
+                extracted = dict(zip(pdf_paths, (text for text, _ in self.extractor.extract_many(pdf_paths))))
+            texts = []
+            for cv_path in cv_paths:
+                if str(cv_path) in extracted:
+                    texts.append(extracted[str(cv_path)])
+                else:
+                    with open(cv_path, 'r', encoding='utf-8') as f:
+                        texts.append(f.read())
+        return texts
     
     def analyze_job_offer(self, job_offer: str) -> str:
         """Analyse l'offre d'emploi avec Perplexity"""
+        self.ensure_ready()
         loader = Loader("🔍 Analyse de l'offre d'emploi")
         loader.start()
         try:
-            result = self.perplexity_client.analyze_job_offer(job_offer)
+            with span('analyze_job_offer', provider='perplexity'):
+                result = self.perplexity_client.analyze_job_offer(job_offer)
             loader.stop()
             return result
         except Exception as e:
             loader.stop()
             raise e
     
-    def adapt_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None) -> str:
-        """Adapte le CV: essaye Gemini, fallback sur Perplexity si quota/overload"""
+    @property
+    def gemini_available(self) -> bool:
+        """Gemini est-il sollicitable (circuit breaker fermé ou en test)"""
+        return self.router.is_available('gemini')
+    
+    @gemini_available.setter
+    def gemini_available(self, available: bool):
+        if available:
+            self.router.reset('gemini')
+        else:
+            self.router.trip('gemini')
+    
+    def _client(self, provider: str):
+        return self.gemini_client if provider == 'gemini' else self.perplexity_client
+    
+    def _run_stage(self, stage: str, message: str, call: Callable) -> Tuple[Optional[object], list]:
+        """Exécute une étape sur le meilleur fournisseur, avec fallback (et hedging si activé)
         
-        # Si Gemini n'est pas disponible, utiliser directement Perplexity
-        if not self.gemini_available:
-            loader = Loader("✍️  Adaptation du CV (Perplexity)")
-            loader.start()
-            try:
-                result = self.perplexity_client.adapt_cv(cv_text, job_offer, analysis, instructions)
-                loader.stop()
-                return result
-            except Exception as e:
-                loader.stop()
-                raise e
+        call(client) retourne None en cas d'échec récupérable (503/429). Tant qu'un
+        fournisseur de repli est disponible, les erreurs HTTP ne sont pas relancées
+        (RetryPolicy.fail_fast) : la bascule remplace l'attente.
+        Retourne (résultat ou None, erreurs rencontrées).
+        """
+        self.ensure_ready()
+        errors = []
         
-        # Sinon, essayer Gemini d'abord
-        loader = Loader("✍️  Adaptation du CV (Gemini)")
-        loader.start()
+        def attempt(provider: str):
+            start = time.perf_counter()
+            client = self._client(provider)
+            # Un fournisseur de repli est disponible : pas de relance sur 429/503, on bascule
+            fallback = any(self.router.is_available(p) for p in providers[providers.index(provider) + 1:])
+            with span(f"{stage} {PROVIDER_LABELS[provider]}", cat='attempt', provider=provider) as current, \
+                    client.retry.fail_fast(fallback):
+                error = None
+                try:
+                    result = call(client)
+                except Exception as e:
+                    result = None
+                    error = e
+                    errors.append(e)
+                    current.set(error=f"{type(e).__name__}: {str(e)[:200]}")
+                current.set(ok=result is not None)
+            elapsed = time.perf_counter() - start
+            
+            if result is not None:
+                self.router.record_success(provider, stage, elapsed)
+            else:
+                self.router.record_failure(provider, stage, elapsed)
+                self._on_provider_failure(provider, error)
+            return result
         
-        try:
-            result = self.gemini_client.adapt_cv(cv_text, job_offer, analysis, instructions)
+        with span(stage, stage=stage) as current:
+            providers = self.router.route(stage)
+            attempted = set()
             
-            if result is None:
-                # Gemini overloadé (503) ou quota (429), basculer sur Perplexity
-                loader.stop()
-                loader = Loader("✍️  Adaptation du CV (Perplexity - fallback)")
+            if (self.hedger and len(providers) > 1
+                    and self.router.is_available(providers[1]) and self.router.acquire(providers[0])):
+                loader = Loader(f"{message} ({PROVIDER_LABELS[providers[0]]}, hedging)")
                 loader.start()
-                result = self.perplexity_client.adapt_cv(cv_text, job_offer, analysis, instructions)
+                try:
+                    winner, result, attempted = self.hedger.run(stage, providers[0], providers[1], attempt)
+                finally:
+                    loader.stop()
+                current.set(hedged=len(attempted) > 1)
+                if result is not None:
+                    current.set(provider=winner, attempts=len(attempted), retries=len(attempted) - 1)
+                    return result, errors
             
-            loader.stop()
-            return result
+            for i, provider in enumerate(providers):
+                if provider in attempted:
+                    continue
+                if not self.router.acquire(provider) and (attempted or i < len(providers) - 1):
+                    continue
+                
+                if attempted:
+                    print(f"⚠️  Bascule sur {PROVIDER_LABELS[provider]}...")
+                    instant('fallback', provider=provider, stage=stage)
+                label = PROVIDER_LABELS[provider] + (' - fallback' if attempted else '')
+                loader = Loader(f"{message} ({label})")
+                loader.start()
+                attempted.add(provider)
+                try:
+                    result = attempt(provider)
+                finally:
+                    loader.stop()
+                
+                if result is not None:
+                    current.set(provider=provider, attempts=len(attempted), retries=len(attempted) - 1)
+                    return result, errors
             
-        except Exception as e:
-            loader.stop()
-            # Si Gemini échoue pour une autre raison, essayer Perplexity
-            print(f"⚠️  Gemini indisponible, utilisation de Perplexity...")
-            loader = Loader("✍️  Adaptation du CV (Perplexity - fallback)")
-            loader.start()
-            try:
-                result = self.perplexity_client.adapt_cv(cv_text, job_offer, analysis, instructions)
-                loader.stop()
-                return result
-            except Exception as e2:
-                loader.stop()
-                raise e2
+            current.set(provider=None, attempts=len(attempted), retries=max(0, len(attempted) - 1))
+            return None, errors
     
-    def calculate_score(self, adapted_cv: str, job_offer: str) -> int:
-        """Calcule le score: essaye Gemini, fallback sur Perplexity"""
-        
-        # Si Gemini n'est pas disponible, utiliser directement Perplexity
-        if not self.gemini_available:
-            loader = Loader("📊 Calcul du score (Perplexity)")
-            loader.start()
-            try:
-                score = self.perplexity_client.calculate_score(adapted_cv, job_offer)
-                loader.stop()
-                
-                if score is None:
-                    print("⚠️  Score non disponible")
-                    return 0
-                return score
-            except Exception as e:
-                loader.stop()
-                print(f"⚠️  Score non disponible: {str(e)[:100]}")
-                return 0
+    def adapt_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None) -> str:
+        """Adapte le CV avec le fournisseur le plus rapide et sain, bascule sur l'autre en cas d'échec"""
+        # Gemini retourne None si overloadé (503) ou quota atteint (429)
+        result, errors = self._run_stage(
+            'adapt', "✍️  Adaptation du CV",
+            lambda client: client.adapt_cv(cv_text, job_offer, analysis, instructions)
+        )
+        if result is None:
+            raise errors[-1] if errors else Exception("Aucun fournisseur disponible pour l'adaptation du CV")
+        return result
+    
+    def adapt_cv_stream(self,
+                        cv_text: str,
+                        job_offer: str,
+                        analysis: str,
+                        instructions: Optional[str] = None,
+                        on_text: Optional[Callable[[str], None]] = None) -> Tuple[str, dict]:
+        """Adapte le CV en streaming: on_text reçoit chaque fragment dès son arrivée
         
-        # Sinon, essayer Gemini d'abord
-        loader = Loader("📊 Calcul du score (Gemini)")
-        loader.start()
+        Bascule sur l'autre fournisseur si le flux échoue avant le premier fragment ;
+        une interruption en cours de flux est remontée telle quelle.
+        Retourne (CV adapté, {'provider', 'ttft', 'total'}).
+        """
+        self.ensure_ready()
+        last_error = None
+        providers = self.router.route('adapt')
+        attempted = False
         
-        try:
-            score = self.gemini_client.calculate_score(adapted_cv, job_offer)
-            
-            if score is None:
-                # Gemini overloadé ou erreur, basculer sur Perplexity
-                loader.stop()
-                loader = Loader("📊 Calcul du score (Perplexity - fallback)")
-                loader.start()
-                score = self.perplexity_client.calculate_score(adapted_cv, job_offer)
-            
-            loader.stop()
+        for i, provider in enumerate(providers):
+            if not self.router.acquire(provider) and (attempted or i < len(providers) - 1):
+                continue
+            if attempted:
+                print(f"⚠️  Bascule sur {PROVIDER_LABELS[provider]}...")
+                instant('fallback', provider=provider, stage='adapt')
+            attempted = True
             
-            if score is None:
-                print("⚠️  Score non disponible")
-                return 0
+            parts = []
+            ttft = None
+            start = time.perf_counter()
+            with span(f"adapt {PROVIDER_LABELS[provider]} (stream)", cat='attempt', provider=provider) as current:
+                try:
+                    for text in self._client(provider).adapt_cv_stream(
+                            cv_text, job_offer, analysis, instructions, stall_timeout=self.stall_timeout):
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                            current.set(ttft=round(ttft, 3))
+                        parts.append(text)
+                        if on_text:
+                            on_text(text)
+                except Exception as e:
+                    self.router.record_failure(provider, 'adapt', time.perf_counter() - start)
+                    self._on_provider_failure(provider, e)
+                    if parts:
+                        raise
+                    current.set(error=f"{type(e).__name__}: {str(e)[:200]}")
+                    last_error = e
+                    continue
+                finally:
+                    current.set(fragments=len(parts))
             
-            return score
+            total = time.perf_counter() - start
+            if not parts:
+                last_error = Exception(f"Réponse {PROVIDER_LABELS[provider]} vide")
+                self.router.record_failure(provider, 'adapt', total)
+                continue
             
-        except Exception as e:
-            loader.stop()
-            print(f"⚠️  Score non disponible: {str(e)[:100]}")
-            return 0
+            self.router.record_success(provider, 'adapt', total)
+            return ''.join(parts), {'provider': provider, 'ttft': ttft, 'total': total}
+        
+        raise last_error or Exception("Aucun fournisseur disponible pour l'adaptation du CV")
     
-    def generate_adapted_cv(self, 
-                          cv_path: str, 
-                          job_offer_path: str, 
-                          output_path: str = "CV_Adapte.pdf",
-                          instructions: Optional[str] = None) -> dict:
-        """Génère le CV adapté complet (offre depuis fichier)"""
+    def _stream_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str],
+                   output_path: Optional[str] = None) -> str:
+        """Adaptation en streaming affichée en console et écrite (PDF/TXT) au fil de l'eau"""
+        pdf_writer = PdfStreamWriter(output_path) if output_path and output_path.endswith('.pdf') else None
+        txt_file = open(output_path, 'w', encoding='utf-8', buffering=1) if output_path and not pdf_writer else None
         
-        cv_text = self.load_cv(cv_path)
+        def on_text(text: str):
+            print(text, end='', flush=True)
+            if pdf_writer:
+                pdf_writer.write(text)
+            elif txt_file:
+                txt_file.write(text)
         
-        with open(job_offer_path, 'r', encoding='utf-8') as f:
-            job_offer = f.read()
+        print("\n✍️  Adaptation du CV (streaming):\n")
+        try:
+            adapted_cv, stats = self.adapt_cv_stream(cv_text, job_offer, analysis, instructions, on_text)
+        finally:
+            print()
+            if txt_file:
+                txt_file.close()
         
-        analysis = self.analyze_job_offer(job_offer)
-        adapted_cv = self.adapt_cv(cv_text, job_offer, analysis, instructions)
-        score = self.calculate_score(adapted_cv, job_offer)
+        timing = f"premier fragment en {stats['ttft']:.2f}s, génération complète en {stats['total']:.2f}s"
+        if pdf_writer:
+            start = time.perf_counter()
+            pdf_writer.close()
+            timing += f", finalisation du PDF en {time.perf_counter() - start:.2f}s"
+        print(f"\n⏱️  {PROVIDER_LABELS[stats['provider']]}: {timing}")
+        return adapted_cv
+    
+    def adapt_and_score(self, cv_text: str, job_offer: str, analysis: str,
+                        instructions: Optional[str] = None) -> Tuple[str, int]:
+        """Adapte le CV et calcule son score en une requête (sortie JSON structurée)
         
-        # Générer PDF par défaut
-        if output_path.endswith('.pdf'):
-            loader = Loader("📝 Génération du PDF")
-            loader.start()
+        Même routage et fallback qu'adapt_cv. Si la réponse ne respecte pas le schéma,
+        retombe sur adapt_cv puis calculate_score ; si seul le score manque, seul
+        calculate_score est appelé. Avec score_engine='hybrid', le score LLM est combiné
+        au score local.
+        """
+        malformed = []
+        
+        def call(client):
             try:
-                generate_pdf(adapted_cv, output_path)
-                loader.stop()
-            except Exception as e:
-                loader.stop()
-                raise e
+                return client.adapt_and_score(cv_text, job_offer, analysis, instructions)
+            except MalformedOutputError as e:
+                # Le fournisseur a répondu : pas de bascule, repli sur les deux requêtes
+                malformed.append(e)
+                return ()
+        
+        result, errors = self._run_stage('adapt_score', "✍️  Adaptation et score du CV", call)
+        if result is None:
+            raise errors[-1] if errors else Exception("Aucun fournisseur disponible pour l'adaptation du CV")
+        
+        if not result:
+            print(f"⚠️  {malformed[-1]} : adaptation et score séparés")
+            instant('structured fallback', stage='adapt_score', error=str(malformed[-1])[:200])
+            adapted_cv = self.adapt_cv(cv_text, job_offer, analysis, instructions)
+            return adapted_cv, self.calculate_score(adapted_cv, job_offer)
+        
+        adapted_cv, score = result
+        if score is None:
+            return adapted_cv, self.calculate_score(adapted_cv, job_offer)
+        if self.score_engine == 'hybrid':
+            with span('score local', cat='attempt', provider='local'):
+                score = combine_scores(score, self.local_scorer.score(adapted_cv, job_offer))
+        return adapted_cv, score
+    
+    def calculate_score(self, adapted_cv: str, job_offer: str) -> int:
+        """Calcule le score selon score_engine : localement, par le fournisseur le plus rapide
+        et sain (bascule sur l'autre en cas d'échec), ou moyenne des deux"""
+        if self.score_engine == 'local':
+            with span('score', stage='score', provider='local'):
+                return self.local_scorer.score(adapted_cv, job_offer)
+        
+        score, _ = self._run_stage(
+            'score', "📊 Calcul du score",
+            lambda client: client.calculate_score(adapted_cv, job_offer)
+        )
+        if self.score_engine == 'hybrid':
+            with span('score local', cat='attempt', provider='local'):
+                return combine_scores(score, self.local_scorer.score(adapted_cv, job_offer))
+        if score is None:
+            print("⚠️  Score non disponible")
+            return 0
+        return score
+    
+    def write_output(self, adapted_cv: str, output_path: str, parallel: bool = False):
+        """Écrit le CV adapté en PDF (défaut) ou en TXT selon l'extension
+
+        Avec parallel=True, la mise en page du PDF est faite dans le pool de processus
+        du renderer (plusieurs CV rendus en même temps sans se disputer le GIL).
+        """
+        if output_path.endswith('.pdf'):
+            with span('render_pdf', path=output_path, parallel=parallel):
+                if parallel:
+                    self.renderer.submit(adapted_cv, output_path).result()
+                else:
+                    self.renderer.render(adapted_cv, output_path)
         else:
             # Fallback sur TXT si extension différente
-            with open(output_path, 'w', encoding='utf-8') as f:
+            with span('write_txt', path=output_path), open(output_path, 'w', encoding='utf-8') as f:
                 f.write(adapted_cv)
+    
+    def load_template(self, template_path: str) -> CompiledTemplate:
+        """Charge un template Word (compilé une fois, puis servi par le cache tant qu'il n'est pas modifié)"""
+        if not docxtpl:
+            raise ImportError("docxtpl not installed. Run: pip install -r requirements.txt")
+        
+        with span('load_template', path=str(template_path)):
+            return self.templates.get(template_path)
+    
+    def write_docx(self, adapted_cv: str, template, output_path: str):
+        """Écrit le CV adapté dans un template Word (chemin, template compilé ou DocxTemplate)"""
+        tpl = self.load_template(template) if isinstance(template, (str, Path)) else template
+        context = {'cv_content': adapted_cv}
+        with span('render_docx', path=output_path):
+            if isinstance(tpl, CompiledTemplate):
+                tpl.render(context, output_path)
+            else:
+                tpl.render(context)
+                tpl.save(output_path)
+    
+    def _prepare_inputs(self, cv_path: str, job_offer: str, template_path: Optional[str] = None,
+                        analysis: Optional[str] = None):
+        """Lance en parallèle l'analyse de l'offre, l'extraction du CV, le chargement du
+        template et l'ouverture de la connexion de l'étape d'adaptation
+        
+        L'analyse ne dépend pas du CV : la seule jointure a lieu avant adapt_cv. Une
+        analyse déjà connue (job repris) n'est pas refaite.
+        Retourne (cv_text, analysis, template).
+        """
+        executor = ThreadPoolExecutor(max_workers=3)
+        try:
+            cv_future = executor.submit(self.load_cv, cv_path)
+            template_future = executor.submit(self.load_template, template_path) if template_path else None
+            # Vérification des APIs d'abord : le préchauffage vise le fournisseur qui sera réellement routé
+            self.ensure_ready()
+            adapt_provider = self.router.route('adapt')[0]
+            executor.submit(self._client(adapt_provider).warm_up)
+            
+            if analysis is None:
+                analysis = self.analyze_job_offer(job_offer)
+            cv_text = cv_future.result()
+            template = template_future.result() if template_future else None
+        finally:
+            executor.shutdown(wait=False)
+        
+        return cv_text, analysis, template
+    
+    def _open_job(self, cv_hash: Optional[str], job_offer: str, instructions: Optional[str], **inputs) -> dict:
+        """Job du journal pour ces entrées (créé, repris s'il est inachevé) ; {} sans journal"""
+        if not self.jobs or cv_hash is None:
+            return {}
+        return self.jobs.start(job_key(cv_hash, job_offer, instructions, self.job_mode), job_offer=job_offer,
+                               instructions=instructions, **inputs)
+    
+    def _checkpoint(self, job: dict, stage: str, **values):
+        """Enregistre la sortie d'une étape terminée du job (rien sans journal)"""
+        if job:
+            self.jobs.record(job['id'], stage, **values)
+            job.update(values, stage=stage)
+    
+    def _resumed_score(self, job: dict) -> Optional[int]:
+        """Score déjà calculé par le même moteur, sinon None"""
+        if job.get('score') is not None and job.get('score_engine') == self.score_engine:
+            return job['score']
+        return None
+    
+    def _generate(self,
+                  cv_path: str,
+                  job_offer: str,
+                  output_path: str,
+                  instructions: Optional[str] = None,
+                  template_path: Optional[str] = None) -> dict:
+        """Analyse, adaptation, score puis écriture du CV (PDF, TXT ou template Word)
+        
+        Avec le journal des jobs, chaque étape terminée est enregistrée : un job
+        interrompu reprend après sa dernière étape terminée, sans refaire ses appels
+        réseau. Le fichier de sortie est toujours réécrit.
+        """
+        job = self._open_job(file_hash(cv_path) if self.jobs else None, job_offer, instructions,
+                             cv_path=str(cv_path), template_path=template_path, output_path=output_path)
+        if job.get('stage'):
+            print(f"♻️  Reprise du job {job['id'][:12]} après l'étape: {STAGE_LABELS[job['stage']]}")
+        
+        try:
+            analysis, adapted_cv = job.get('analysis'), job.get('adapted_cv')
+            score = self._resumed_score(job)
+            written = False
+            
+            if adapted_cv is None:
+                cv_text, analysis, template = self._prepare_inputs(cv_path, job_offer, template_path, analysis)
+                self._checkpoint(job, 'analysis', analysis=analysis)
+                if self.stream:
+                    # PDF et TXT sont écrits pendant la génération, le template Word après
+                    adapted_cv = self._stream_cv(cv_text, job_offer, analysis, instructions,
+                                                 None if template_path else output_path)
+                    written = not template_path
+                elif self._fused_enabled:
+                    adapted_cv, score = self.adapt_and_score(cv_text, job_offer, analysis, instructions)
+                else:
+                    adapted_cv = self.adapt_cv(cv_text, job_offer, analysis, instructions)
+                self._checkpoint(job, 'adaptation', adapted_cv=adapted_cv)
+            else:
+                template = self.load_template(template_path) if template_path else None
+            
+            if score is None:
+                score = self.calculate_score(adapted_cv, job_offer)
+            self._checkpoint(job, 'score', score=score, score_engine=self.score_engine)
+            
+            if not written:
+                if template_path:
+                    message = "📝 Création du document Word"
+                elif output_path.endswith('.pdf'):
+                    message = "📝 Génération du PDF"
+                else:
+                    message = "📝 Écriture du CV"
+                loader = Loader(message)
+                loader.start()
+                try:
+                    if template_path:
+                        self.write_docx(adapted_cv, template, output_path)
+                    else:
+                        self.write_output(adapted_cv, output_path)
+                finally:
+                    loader.stop()
+            self._checkpoint(job, 'output', output_file=output_path)
+        except Exception as e:
+            if job:
+                self.jobs.fail(job['id'], e)
+            raise
         
         print(f"\n✅ CV adapté sauvegardé: {output_path}")
         print(f"📈 Score de pertinence: {score}%")
@@ -281,46 +688,29 @@ class CVAdapter:
             'cv': adapted_cv,
             'analysis': analysis,
             'score': score,
-            'output_file': output_path
+            'output_file': output_path,
+            'job_id': job.get('id')
         }
     
+    def generate_adapted_cv(self, 
+                          cv_path: str, 
+                          job_offer_path: str, 
+                          output_path: str = "CV_Adapte.pdf",
+                          instructions: Optional[str] = None) -> dict:
+        """Génère le CV adapté complet (offre depuis fichier)"""
+        
+        with open(job_offer_path, 'r', encoding='utf-8') as f:
+            job_offer = f.read()
+        
+        return self._generate(cv_path, job_offer, output_path, instructions)
+    
     def generate_adapted_cv_direct(self, 
                                    cv_path: str, 
                                    job_offer: str,
                                    output_path: str = "CV_Adapte.pdf",
                                    instructions: Optional[str] = None) -> dict:
         """Génère le CV adapté avec l'offre passée directement (pas de fichier)"""
-        
-        cv_text = self.load_cv(cv_path)
-        
-        analysis = self.analyze_job_offer(job_offer)
-        adapted_cv = self.adapt_cv(cv_text, job_offer, analysis, instructions)
-        score = self.calculate_score(adapted_cv, job_offer)
-        
-        # Générer PDF par défaut
-        if output_path.endswith('.pdf'):
-            loader = Loader("📝 Génération du PDF")
-            loader.start()
-            try:
-                generate_pdf(adapted_cv, output_path)
-                loader.stop()
-            except Exception as e:
-                loader.stop()
-                raise e
-        else:
-            # Fallback sur TXT si extension différente
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(adapted_cv)
-        
-        print(f"\n✅ CV adapté sauvegardé: {output_path}")
-        print(f"📈 Score de pertinence: {score}%")
-        
-        return {
-            'cv': adapted_cv,
-            'analysis': analysis,
-            'score': score,
-            'output_file': output_path
-        }
+        return self._generate(cv_path, job_offer, output_path, instructions)
     
     def generate_with_template(self,
                               cv_path: str,
@@ -330,33 +720,170 @@ class CVAdapter:
                               instructions: Optional[str] = None) -> dict:
         """Génère le CV adapté en préservant la mise en page du template Word"""
         
-        if not DocxTemplate:
+        if not docxtpl:
+            raise ImportError("docxtpl not installed. Run: pip install -r requirements.txt")
+        
+        return self._generate(cv_path, job_offer, output_path, instructions, template_path)
+    
+    def _process_offer(self,
+                       cv_text: str,
+                       offer_id: str,
+                       job_offer: str,
+                       output_path: str,
+                       instructions: Optional[str] = None,
+                       template_path: Optional[str] = None,
+                       cv_path: Optional[str] = None,
+                       cv_hash: Optional[str] = None) -> dict:
+        """Traite une offre du batch et retourne un résultat compact (sans les textes)
+        
+        Avec cv_path et cv_hash (empreinte du fichier du CV), l'offre est suivie dans le
+        journal des jobs et reprend après sa dernière étape terminée ('resumed') ; les
+        étapes reprises n'ont pas de durée dans timings.
+        """
+        timings = {}
+        start = time.perf_counter()
+        result = {'id': offer_id, 'score': None, 'output_file': None, 'error': None, 'resumed': None,
+                  'timings': timings}
+        
+        with silent_loaders(), span('offer', cat='offer', id=offer_id) as current:
+            job = {}
+            try:
+                job = self._open_job(cv_hash, job_offer, instructions, cv_path=cv_path, label=offer_id,
+                                     template_path=template_path, output_path=output_path)
+                result['resumed'] = job.get('stage')
+                analysis, adapted_cv = job.get('analysis'), job.get('adapted_cv')
+                result['score'] = self._resumed_score(job)
+                
+                if adapted_cv is None:
+                    if analysis is None:
+                        t = time.perf_counter()
+                        analysis = self.analyze_job_offer(job_offer)
+                        timings['analysis'] = round(time.perf_counter() - t, 3)
+                        self._checkpoint(job, 'analysis', analysis=analysis)
+                    
+                    t = time.perf_counter()
+                    if self._fused_enabled:
+                        # Le score est calculé par la même requête (durée comprise dans adaptation)
+                        adapted_cv, result['score'] = self.adapt_and_score(cv_text, job_offer, analysis, instructions)
+                    else:
+                        adapted_cv = self.adapt_cv(cv_text, job_offer, analysis, instructions)
+                    timings['adaptation'] = round(time.perf_counter() - t, 3)
+                    self._checkpoint(job, 'adaptation', adapted_cv=adapted_cv)
+                
+                if result['score'] is None:
+                    t = time.perf_counter()
+                    result['score'] = self.calculate_score(adapted_cv, job_offer)
+                    timings['score'] = round(time.perf_counter() - t, 3)
+                self._checkpoint(job, 'score', score=result['score'], score_engine=self.score_engine)
+                
+                t = time.perf_counter()
+                if template_path:
+                    self.write_docx(adapted_cv, template_path, output_path)
+                else:
+                    self.write_output(adapted_cv, output_path, parallel=True)
+                timings['output'] = round(time.perf_counter() - t, 3)
+                self._checkpoint(job, 'output', output_file=output_path)
+                result['output_file'] = output_path
+            except Exception as e:
+                result['error'] = str(e)[:500]
+                if job:
+                    self.jobs.fail(job['id'], e)
+            current.set(score=result['score'], error=result['error'], resumed=result['resumed'])
+        
+        timings['total'] = round(time.perf_counter() - start, 3)
+        return result
+    
+    
+    def adapt_many(self,
+                   cv_path: str,
+                   offers: Iterable[Tuple[str, str]],
+                   output_dir: str = "CV_Adaptes",
+                   max_workers: int = 4,
+                   instructions: Optional[str] = None,
+                   template_path: Optional[str] = None,
+                   output_format: str = "pdf") -> Iterator[dict]:
+        """Adapte un CV à plusieurs offres (identifiant, texte) en parallèle
+        
+        Les résultats sont produits au fur et à mesure qu'ils se terminent. Les offres
+        sont consommées au rythme des workers (au plus 2 x max_workers en vol), la
+        mémoire reste donc constante quel que soit le nombre d'offres. Avec le journal
+        des jobs, relancer un batch interrompu ne refait que les étapes manquantes.
+        """
+        if template_path and not docxtpl:
             raise ImportError("docxtpl not installed. Run: pip install -r requirements.txt")
         
         cv_text = self.load_cv(cv_path)
+        cv_hash = file_hash(cv_path) if self.jobs else None
+        self.ensure_ready()
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        extension = 'docx' if template_path else output_format
         
-        analysis = self.analyze_job_offer(job_offer)
-        adapted_cv = self.adapt_cv(cv_text, job_offer, analysis, instructions)
-        score = self.calculate_score(adapted_cv, job_offer)
+        tasks = ((cv_text, offer_id, job_offer, str(Path(output_dir) / f"{safe_filename(offer_id)}.{extension}"),
+                  instructions, template_path, str(cv_path), cv_hash)
+                 for offer_id, job_offer in offers)
+        yield from self._process_all(tasks, max_workers)
+    
+    def adapt_pairs(self,
+                    pairs: Iterable[Tuple[str, str, str, str]],
+                    output_dir: str = "CV_Adaptes",
+                    max_workers: int = 4,
+                    instructions: Optional[str] = None,
+                    template_path: Optional[str] = None,
+                    output_format: str = "pdf") -> Iterator[dict]:
+        """Adapte des couples (chemin du CV, texte du CV, identifiant de l'offre, texte de l'offre)
         
-        loader = Loader("📝 Création du document Word")
-        loader.start()
-        try:
-            tpl = DocxTemplate(template_path)
-            context = {'cv_content': adapted_cv}
-            tpl.render(context)
-            tpl.save(output_path)
-            loader.stop()
-        except Exception as e:
-            loader.stop()
-            raise e
+        Même traitement qu'adapt_many, pour des CV différents (couples retenus par
+        jobassist rank) : chaque fichier est nommé <CV>__<offre>, chaque résultat
+        porte en plus le chemin de son CV ('cv').
+        """
+        if template_path and not docxtpl:
+            raise ImportError("docxtpl not installed. Run: pip install -r requirements.txt")
         
-        print(f"\n✅ CV adapté sauvegardé: {output_path}")
-        print(f"📈 Score de pertinence: {score}%")
+        self.ensure_ready()
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        extension = 'docx' if template_path else output_format
+        hashes = {}
         
-        return {
-            'cv': adapted_cv,
-            'analysis': analysis,
-            'score': score,
-            'output_file': output_path
-        }
+        def tasks():
+            for cv_path, cv_text, offer_id, job_offer in pairs:
+                cv_path = str(cv_path)
+                if self.jobs and cv_path not in hashes:
+                    hashes[cv_path] = file_hash(cv_path)
+                name = f"{safe_filename(Path(cv_path).stem)}__{safe_filename(offer_id)}.{extension}"
+                yield (cv_text, offer_id, job_offer, str(Path(output_dir) / name),
+                       instructions, template_path, cv_path, hashes.get(cv_path))
+        
+        for task, result in self._process_all(tasks(), max_workers, with_tasks=True):
+            result['cv'] = task[6]
+            yield result
+    
+    def _process_all(self, tasks: Iterator[tuple], max_workers: int, with_tasks: bool = False) -> Iterator:
+        """Exécute _process_offer sur chaque tâche (ses arguments) au fil de l'eau
+        
+        Les tâches sont consommées au rythme des workers (au plus 2 x max_workers en
+        vol) ; les résultats sont produits dans l'ordre où ils se terminent, avec leur
+        tâche si with_tasks.
+        """
+        tasks = iter(tasks)
+        max_in_flight = max(1, max_workers) * 2
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            pending = {}
+            exhausted = False
+            
+            while True:
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        task = next(tasks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(self._process_offer, *task)] = task
+                
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = pending.pop(future)
+                    yield (task, future.result()) if with_tasks else future.result()
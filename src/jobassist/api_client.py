@@ -2,23 +2,220 @@
 Clients API pour Perplexity et Gemini
 """
 
-import requests
-from typing import Optional
+import json
+import os
+import re
+from urllib.parse import urlsplit
 
-# API Endpoints
-PERPLEXITY_API = "https://api.perplexity.ai/chat/completions"
-GEMINI_API = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+from typing import Callable, Iterable, Iterator, Optional, Tuple
 
+from .cache import ResponseCache, cache_key
+from .cv_model import PROMPT_BUDGETS, compact_lossless, compact_text, estimate_tokens, pack_cv, pack_text
+from .lazy import LazyModule
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .tracing import instant, span
 
-class PerplexityClient:
-    """Client pour l'API Perplexity"""
-    
-    def __init__(self, api_key: str):
-        self.api_key = api_key
+requests = LazyModule('requests')
+
+# API Endpoints (hôtes surchargeables, ex. serveur local de benchmark)
+PERPLEXITY_MODEL = "sonar-pro"
+GEMINI_MODEL = "gemini-2.0-flash"
+PERPLEXITY_URL = os.getenv('JOBASSIST_PERPLEXITY_URL', "https://api.perplexity.ai").rstrip('/')
+GEMINI_URL = os.getenv('JOBASSIST_GEMINI_URL', "https://generativelanguage.googleapis.com").rstrip('/')
+PERPLEXITY_API = f"{PERPLEXITY_URL}/chat/completions"
+GEMINI_MODEL_API = f"{GEMINI_URL}/v1beta/models/{GEMINI_MODEL}"
+GEMINI_API = f"{GEMINI_MODEL_API}:generateContent"
+GEMINI_STREAM_API = f"{GEMINI_MODEL_API}:streamGenerateContent"
+
+# Durée maximale sans nouvelle donnée avant d'abandonner un flux (secondes)
+DEFAULT_STALL_TIMEOUT = 30
+
+# Pool de connexions par défaut
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def create_session(pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                   pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                   keep_alive: bool = True,
+                   pool_block: bool = False) -> "requests.Session":
+    """Crée une session HTTP avec un pool de connexions réutilisables
+
+    - pool_connections: nombre d'hôtes dont les pools sont conservés
+    - pool_maxsize: nombre maximum de connexions gardées ouvertes par hôte
+    - keep_alive: réutilise les connexions TCP/TLS entre les appels
+    - pool_block: bloque au lieu d'ouvrir une connexion de plus que pool_maxsize
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def received_bytes(response: "requests.Response") -> int:
+    """Octets du corps reçus sur le réseau (compressés), ou taille du contenu à défaut"""
+    tell = getattr(response.raw, 'tell', None)
+    return tell() if tell else len(response.content)
+
+
+def traced_request(session: "requests.Session", method: str, url: str, provider: str, retry: int = 0,
+                   **kwargs) -> "requests.Response":
+    """Requête HTTP enregistrée comme span (fournisseur, statut, octets envoyés et reçus)
+
+    Pour une réponse en streaming, le span s'arrête à la réception des en-têtes.
+    retry: numéro de la relance (0 pour la première tentative).
+    """
+    with span(f"{method} {provider}", cat='http', provider=provider,
+              endpoint=urlsplit(url).path) as current:
+        if retry:
+            current.set(retry=retry)
+        response = session.request(method, url, **kwargs)
+        body = response.request.body
+        current.set(status=response.status_code, bytes_sent=len(body) if body else 0)
+        if not kwargs.get('stream'):
+            current.set(bytes_received=received_bytes(response))
+        return response
+
+
+def payload_tokens(payload: dict) -> Tuple[int, int]:
+    """Tokens estimés du prompt et maximum de tokens générés d'une requête Perplexity ou Gemini"""
+    if 'messages' in payload:
+        prompt = ' '.join(message['content'] for message in payload['messages'])
+        return estimate_tokens(prompt), payload.get('max_tokens') or 0
+    prompt = ' '.join(part.get('text', '') for content in payload['contents'] for part in content['parts'])
+    return estimate_tokens(prompt), payload.get('generationConfig', {}).get('maxOutputTokens') or 0
+
+
+def usage_tokens(body: str) -> Optional[int]:
+    """Tokens consommés selon le corps de la réponse (usage Perplexity, usageMetadata Gemini)"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return (data.get('usage') or {}).get('total_tokens') or (data.get('usageMetadata') or {}).get('totalTokenCount')
+
+
+def limited_request(limiter: RateLimiter, payload: dict, send: Callable[[], "requests.Response"],
+                    stream: bool = False) -> "requests.Response":
+    """Envoie une requête dans les quotas du limiteur (prompt + tokens générés maximum réservés)
+
+    La réservation est corrigée d'après la réponse : rendue si la requête est refusée ou échoue,
+    ramenée à la consommation réelle sinon (pour un flux, par l'appelant en fin de flux).
+    """
+    if not limiter.enabled:
+        return send()
+    prompt, output = payload_tokens(payload)
+    limiter.acquire(prompt + output)
+    try:
+        response = send()
+    except requests.RequestException:
+        # Pas de réponse : la réservation est rendue avant relance ou propagation
+        limiter.settle(prompt + output, 0)
+        raise
+    if response.status_code != 200:
+        limiter.settle(prompt + output, 0)
+    elif not stream:
+        limiter.settle(prompt + output, usage_tokens(response.text) or prompt + estimate_tokens(response.text))
+    return response
+
+
+def warm_up_session(session: "requests.Session", url: str, provider: str, timeout: float = 5):
+    """Ouvre à l'avance une connexion TCP/TLS vers l'hôte de l'API (réutilisée par le pool)"""
+    parts = urlsplit(url)
+    try:
+        traced_request(session, 'HEAD', f"{parts.scheme}://{parts.netloc}/", provider, timeout=timeout)
+    except requests.RequestException:
+        pass
+
+
+class APIError(Exception):
+    """Réponse en erreur d'une API (statut HTTP conservé dans status)"""
     
-    def analyze_job_offer(self, job_offer: str) -> str:
-        """Analyse l'offre d'emploi avec Perplexity"""
-        prompt = f"""Analyse cette offre d'emploi et extrais les éléments clés:
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class MalformedOutputError(ValueError):
+    """Réponse reçue mais non conforme au schéma de sortie structurée demandé"""
+
+
+class StreamStalledError(Exception):
+    """Flux interrompu: aucune donnée reçue pendant stall_timeout secondes"""
+
+
+def iter_sse(lines: Iterable[str]) -> Iterator[str]:
+    """Champs data des événements server-sent events, au fil de leur réception
+
+    Les lignes data consécutives d'un même événement sont jointes ; le flux se
+    termine à la fin de la réponse ou sur le marqueur [DONE].
+    """
+    data = []
+    for line in lines:
+        if line:
+            if line.startswith('data:'):
+                data.append(line[5:].lstrip(' '))
+            continue
+        if data:
+            event = '\n'.join(data)
+            data = []
+            if event == '[DONE]':
+                return
+            yield event
+    if data and data != ['[DONE]']:
+        yield '\n'.join(data)
+
+
+def stream_events(response: "requests.Response", stall_timeout: float, provider: str) -> Iterator[dict]:
+    """Événements JSON d'une réponse SSE ; lève StreamStalledError si le flux se fige"""
+    try:
+        # chunk_size=None: chaque bloc reçu est traité immédiatement (pas de tampon de 512 octets)
+        for event in iter_sse(response.iter_lines(chunk_size=None, decode_unicode=True)):
+            yield json.loads(event)
+    except requests.exceptions.ChunkedEncodingError as e:
+        raise Exception(f"Flux {provider} interrompu par le serveur") from e
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        raise StreamStalledError(f"Flux {provider} interrompu: aucune donnée depuis {stall_timeout}s") from e
+    finally:
+        response.close()
+
+
+# Dernière consigne du prompt d'adaptation, seule ou avec le score (sortie structurée)
+ADAPT_OUTPUT = "Fournit uniquement le CV adapté, sans explications additionnelles."
+ADAPT_SCORE_OUTPUT = """Réponds uniquement avec un objet JSON de la forme {"cv": "...", "score": 0}:
+- cv: le CV adapté, sans explications additionnelles
+- score: pertinence entre le CV adapté et l'offre, entier de 0 à 100"""
+
+# Sortie structurée de l'adaptation avec score (JSON Schema ; Gemini n'en accepte qu'un sous-ensemble)
+ADAPT_SCORE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'cv': {'type': 'string'},
+        'score': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+    },
+    'required': ['cv', 'score'],
+}
+GEMINI_ADAPT_SCORE_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {'cv': {'type': 'STRING'}, 'score': {'type': 'INTEGER'}},
+    'required': ['cv', 'score'],
+    'propertyOrdering': ['cv', 'score'],
+}
+
+
+def build_analysis_prompt(job_offer: str) -> str:
+    """Prompt d'analyse de l'offre d'emploi"""
+    return f"""Analyse cette offre d'emploi et extrais les éléments clés:
 1. Compétences techniques requises
 2. Compétences humaines
 3. Années d'expérience
@@ -26,47 +223,35 @@ class PerplexityClient:
 5. Responsabilités principales
 
 Offre d'emploi:
-{job_offer}
+{compact_text(job_offer)}
 
 Réponse (format structuré):"""
-        
-        response = requests.post(
-            PERPLEXITY_API,
-            headers={
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'sonar-pro',
-                'messages': [
-                    {'role': 'system', 'content': 'Tu es un assistant expert en ressources humaines et CV.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.7,
-                'max_tokens': 2000
-            },
-            timeout=120
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"Erreur Perplexity ({response.status_code}): {response.text[:200]}")
-        
-        return response.json()['choices'][0]['message']['content']
-    
-    def adapt_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None) -> str:
-        """Adapte le CV avec Perplexity"""
-        prompt = f"""Tu es un expert en CV. Adapte ce CV à l'offre d'emploi suivante:
+
+
+def build_adapt_prompt(cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None,
+                       with_score: bool = False) -> str:
+    """Prompt d'adaptation du CV (commun à Perplexity et Gemini)
+
+    Le CV et l'offre sont la matière réécrite par le modèle : ils ne sont que compactés
+    sans perte (espaces, lignes répétées), jamais tronqués ; les références [1] de
+    l'analyse sont retirées. Avec with_score, la réponse attendue est l'objet JSON
+    d'ADAPT_SCORE_SCHEMA (CV adapté et score de pertinence).
+    """
+    extra_instructions = f'Instructions supplémentaires:\n{instructions}' if instructions else ''
+    cv_text = compact_lossless(cv_text)
+    analysis = compact_text(re.sub(r'\[\d+\]', '', analysis))
+    return f"""Tu es un expert en CV. Adapte ce CV à l'offre d'emploi suivante:
 
 CV original:
 {cv_text}
 
 Offre d'emploi:
-{job_offer}
+{compact_lossless(job_offer)}
 
 Analyse clés:
 {analysis}
 
-{f'Instructions supplémentaires:\n{instructions}' if instructions else ''}
+{extra_instructions}
 
 Instructions:
 - Garde la structure du CV
@@ -75,68 +260,283 @@ Instructions:
 - Utilise les mots-clés de l'offre
 - Sois concis et impactant
 
-Fournit uniquement le CV adapté, sans explications additionnelles."""
+{ADAPT_SCORE_OUTPUT if with_score else ADAPT_OUTPUT}"""
+
+
+def build_score_prompt(adapted_cv: str, job_offer: str) -> str:
+    """Prompt de calcul du score de pertinence (CV et offre réduits à leurs budgets de tokens)"""
+    return f"""Sur une échelle de 0 à 100, quel est le score de pertinence entre ce CV et cette offre?
+Réponds uniquement avec un nombre entre 0 et 100.
+
+CV adapté:
+{pack_cv(adapted_cv, job_offer, PROMPT_BUDGETS['score_cv'])}
+
+Offre:
+{pack_text(job_offer, PROMPT_BUDGETS['score_offer'])}"""
+
+
+def parse_score(score_text: str) -> int:
+    """Extrait le score (0-100) de la réponse du modèle"""
+    match = re.search(r'\d+', score_text)
+    score = int(match.group()) if match else 0
+    return min(100, max(0, score))
+
+
+def parse_adapt_score(text: str) -> Tuple[str, Optional[int]]:
+    """Valide la réponse structurée de l'adaptation avec score : retourne (CV adapté, score)
+
+    Lève MalformedOutputError si la réponse n'est pas un objet JSON avec un CV non vide ;
+    un score absent ou hors de [0, 100] est retourné à None (le CV reste utilisable).
+    """
+    text = text.strip()
+    # Certains modèles entourent le JSON d'un bloc ```json malgré la consigne
+    fenced = re.fullmatch(r'```(?:json)?\s*(.*?)\s*```', text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise MalformedOutputError(f"Sortie structurée invalide: {e}") from e
+    if not isinstance(data, dict) or not isinstance(data.get('cv'), str) or not data['cv'].strip():
+        raise MalformedOutputError("Sortie structurée invalide: champ cv absent ou vide")
+    
+    score = data.get('score')
+    if isinstance(score, float) and score.is_integer():
+        score = int(score)
+    if isinstance(score, bool) or not isinstance(score, int) or not 0 <= score <= 100:
+        score = None
+    return data['cv'], score
+
+
+def perplexity_payload(prompt: str, temperature: float, max_tokens: int, system: Optional[str] = None,
+                       schema: Optional[dict] = None) -> dict:
+    """Corps d'une requête Perplexity chat/completions (sortie JSON conforme à schema si fourni)"""
+    messages = []
+    if system:
+        messages.append({'role': 'system', 'content': system})
+    messages.append({'role': 'user', 'content': prompt})
+    payload = {
+        'model': PERPLEXITY_MODEL,
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens
+    }
+    if schema:
+        payload['response_format'] = {'type': 'json_schema', 'json_schema': {'schema': schema}}
+    return payload
+
+
+def gemini_payload(prompt: str, temperature: float, max_output_tokens: int, schema: Optional[dict] = None) -> dict:
+    """Corps d'une requête Gemini generateContent (sortie JSON conforme à schema si fourni)"""
+    payload = {
+        'contents': [
+            {'role': 'user', 'parts': [{'text': prompt}]}
+        ],
+        'generationConfig': {
+            'temperature': temperature,
+            'maxOutputTokens': max_output_tokens
+        }
+    }
+    if schema:
+        payload['generationConfig'].update({'responseMimeType': 'application/json', 'responseSchema': schema})
+    return payload
+
+
+def gemini_error_message(response_text: str) -> str:
+    """Message d'erreur lisible à partir du corps d'une réponse Gemini"""
+    error_msg = response_text[:200]
+    try:
+        json_error = json.loads(response_text)
+        if 'error' in json_error:
+            error_msg = json_error['error'].get('message', error_msg)
+    except Exception:
+        pass
+    return error_msg
+
+
+def gemini_text(data: dict) -> str:
+    """Extrait le texte généré d'une réponse Gemini"""
+    if 'candidates' not in data or not data['candidates']:
+        raise Exception(f"Réponse Gemini invalide (pas de candidates)")
+    
+    candidate = data['candidates'][0]
+    if 'content' not in candidate or 'parts' not in candidate['content']:
+        raise Exception(f"Réponse Gemini invalide (structure)")
+    
+    return candidate['content']['parts'][0]['text']
+
+
+class PerplexityClient:
+    """Client pour l'API Perplexity"""
+    
+    def __init__(self, api_key: str, session: Optional["requests.Session"] = None,
+                 cache: Optional[ResponseCache] = None, retry: Optional[RetryPolicy] = None,
+                 limiter: Optional[RateLimiter] = None):
+        self.api_key = api_key
+        self.session = session or create_session()
+        self.cache = cache
+        self.retry = retry or RetryPolicy()
+        self.limiter = limiter or RateLimiter('perplexity', api_key)
+    
+    def _post(self, payload: dict, timeout: float, stream: bool = False) -> "requests.Response":
+        """Envoie une requête chat/completions via la session partagée (quotas et relances compris)"""
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        if stream:
+            headers['Accept'] = 'text/event-stream'
+        # Génération sans effet de bord côté serveur : relançable comme une requête idempotente
+        return self.retry.call(lambda retry: limited_request(self.limiter, payload, lambda: traced_request(
+            self.session, 'POST', PERPLEXITY_API, 'perplexity', retry,
+            headers=headers,
+            json=payload,
+            timeout=timeout,
+            stream=stream
+        ), stream), 'perplexity', idempotent=True)
+    
+    def _call(self, payload: dict, timeout: float) -> Tuple[int, str]:
+        """Requête avec cache de réponses: retourne (statut, corps)"""
+        key = cache_key('perplexity', PERPLEXITY_MODEL, payload) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                instant('cache hit', cat='cache', provider='perplexity')
+                return 200, cached
         
-        response = requests.post(
-            PERPLEXITY_API,
+        response = self._post(payload, timeout)
+        if key and response.status_code == 200:
+            self.cache.set(key, response.text)
+        return response.status_code, response.text
+    
+    def probe(self, timeout: float = 10) -> "requests.Response":
+        """Requête minimale (1 token généré) pour vérifier la clé API et la connexion (sans relance)"""
+        return traced_request(
+            self.session, 'POST', PERPLEXITY_API, 'perplexity',
             headers={
                 'Authorization': f'Bearer {self.api_key}',
                 'Content-Type': 'application/json'
             },
             json={
-                'model': 'sonar-pro',
-                'messages': [
-                    {'role': 'system', 'content': 'Tu es un expert en CV.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.7,
-                'max_tokens': 3000
+                'model': PERPLEXITY_MODEL,
+                'messages': [{'role': 'user', 'content': 'test'}],
+                'max_tokens': 1
             },
-            timeout=120
+            timeout=timeout
         )
+    
+    def _settle_stream(self, payload: dict, parts: list):
+        """Ramène la réservation de tokens d'un flux terminé au texte effectivement généré"""
+        if self.limiter.enabled:
+            prompt, output = payload_tokens(payload)
+            self.limiter.settle(prompt + output, prompt + estimate_tokens(''.join(parts)))
+    
+    def warm_up(self):
+        """Prépare une connexion vers l'API"""
+        warm_up_session(self.session, PERPLEXITY_API, 'perplexity')
+    
+    def close(self):
+        """Ferme les connexions du pool"""
+        self.session.close()
+    
+    def analyze_job_offer(self, job_offer: str) -> str:
+        """Analyse l'offre d'emploi avec Perplexity"""
+        status, body = self._call(perplexity_payload(
+            build_analysis_prompt(job_offer),
+            temperature=0.7,
+            max_tokens=2000,
+            system='Tu es un assistant expert en ressources humaines et CV.'
+        ), timeout=120)
         
-        if response.status_code != 200:
-            raise Exception(f"Erreur Perplexity ({response.status_code}): {response.text[:200]}")
+        if status != 200:
+            raise APIError(status, f"Erreur Perplexity ({status}): {body[:200]}")
         
-        return response.json()['choices'][0]['message']['content']
+        return json.loads(body)['choices'][0]['message']['content']
     
-    def calculate_score(self, adapted_cv: str, job_offer: str) -> Optional[int]:
-        """Calcule le score de pertinence avec Perplexity"""
-        prompt = f"""Sur une échelle de 0 à 100, quel est le score de pertinence entre ce CV et cette offre?
-Réponds uniquement avec un nombre entre 0 et 100.
+    def adapt_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None) -> str:
+        """Adapte le CV avec Perplexity"""
+        status, body = self._call(perplexity_payload(
+            build_adapt_prompt(cv_text, job_offer, analysis, instructions),
+            temperature=0.7,
+            max_tokens=3000,
+            system='Tu es un expert en CV.'
+        ), timeout=120)
+        
+        if status != 200:
+            raise APIError(status, f"Erreur Perplexity ({status}): {body[:200]}")
+        
+        return json.loads(body)['choices'][0]['message']['content']
+    
+    def adapt_cv_stream(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None,
+                        stall_timeout: float = DEFAULT_STALL_TIMEOUT) -> Iterator[str]:
+        """Adapte le CV avec Perplexity en streaming: produit le texte au fil de la génération
 
-CV adapté:
-{adapted_cv[:1000]}
+        Partage le cache d'adapt_cv (même clé, réponse complète enregistrée en fin de flux).
+        """
+        payload = perplexity_payload(
+            build_adapt_prompt(cv_text, job_offer, analysis, instructions),
+            temperature=0.7,
+            max_tokens=3000,
+            system='Tu es un expert en CV.'
+        )
+        key = cache_key('perplexity', PERPLEXITY_MODEL, payload) if self.cache else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            yield json.loads(cached)['choices'][0]['message']['content']
+            return
+        
+        response = self._post({**payload, 'stream': True}, timeout=(10, stall_timeout), stream=True)
+        if response.status_code != 200:
+            body = response.text
+            response.close()
+            raise APIError(response.status_code, f"Erreur Perplexity ({response.status_code}): {body[:200]}")
+        
+        parts = []
+        with span('stream perplexity', cat='http', provider='perplexity') as current:
+            for event in stream_events(response, stall_timeout, 'Perplexity'):
+                choices = event.get('choices') or [{}]
+                text = (choices[0].get('delta') or {}).get('content')
+                if text:
+                    parts.append(text)
+                    yield text
+            current.set(fragments=len(parts), bytes_received=received_bytes(response))
+        
+        self._settle_stream(payload, parts)
+        if key and parts:
+            self.cache.set(key, json.dumps({'choices': [{'message': {'content': ''.join(parts)}}]}))
+    
+    def adapt_and_score(self, cv_text: str, job_offer: str, analysis: str,
+                        instructions: Optional[str] = None) -> Tuple[str, Optional[int]]:
+        """Adapte le CV et calcule son score en une requête (sortie JSON structurée)
 
-Offre:
-{job_offer[:1000]}"""
+        Lève MalformedOutputError si la réponse ne respecte pas ADAPT_SCORE_SCHEMA.
+        """
+        status, body = self._call(perplexity_payload(
+            build_adapt_prompt(cv_text, job_offer, analysis, instructions, with_score=True),
+            temperature=0.7,
+            max_tokens=3500,
+            system='Tu es un expert en CV.',
+            schema=ADAPT_SCORE_SCHEMA
+        ), timeout=120)
+        
+        if status != 200:
+            raise APIError(status, f"Erreur Perplexity ({status}): {body[:200]}")
         
+        return parse_adapt_score(json.loads(body)['choices'][0]['message']['content'])
+    
+    def calculate_score(self, adapted_cv: str, job_offer: str) -> Optional[int]:
+        """Calcule le score de pertinence avec Perplexity"""
         try:
-            response = requests.post(
-                PERPLEXITY_API,
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'sonar-pro',
-                    'messages': [
-                        {'role': 'user', 'content': prompt}
-                    ],
-                    'temperature': 0.3,
-                    'max_tokens': 10
-                },
-                timeout=60
-            )
+            status, body = self._call(perplexity_payload(
+                build_score_prompt(adapted_cv, job_offer),
+                temperature=0.3,
+                max_tokens=10
+            ), timeout=60)
             
-            if response.status_code != 200:
+            if status != 200:
                 return None
             
-            score_text = response.json()['choices'][0]['message']['content']
-            import re
-            match = re.search(r'\d+', score_text)
-            score = int(match.group()) if match else 0
-            return min(100, max(0, score))
+            return parse_score(json.loads(body)['choices'][0]['message']['content'])
         except Exception:
             return None
 
@@ -144,125 +544,150 @@ Offre:
 class GeminiClient:
     """Client pour l'API Gemini"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: Optional["requests.Session"] = None,
+                 cache: Optional[ResponseCache] = None, retry: Optional[RetryPolicy] = None,
+                 limiter: Optional[RateLimiter] = None):
         self.api_key = api_key
+        self.session = session or create_session()
+        self.cache = cache
+        self.retry = retry or RetryPolicy()
+        self.limiter = limiter or RateLimiter('gemini', api_key)
+    
+    def _post(self, payload: dict, timeout: float, stream: bool = False) -> "requests.Response":
+        """Envoie une requête generateContent (ou streamGenerateContent) via la session partagée
+        (quotas et relances compris)"""
+        url = f"{GEMINI_STREAM_API}?alt=sse&key={self.api_key}" if stream else f"{GEMINI_API}?key={self.api_key}"
+        # Génération sans effet de bord côté serveur : relançable comme une requête idempotente
+        return self.retry.call(lambda retry: limited_request(self.limiter, payload, lambda: traced_request(
+            self.session, 'POST', url, 'gemini', retry,
+            headers={'Content-Type': 'application/json'},
+            json=payload,
+            timeout=timeout,
+            stream=stream
+        ), stream), 'gemini', idempotent=True)
+    
+    def _call(self, payload: dict, timeout: float) -> Tuple[int, str]:
+        """Requête avec cache de réponses: retourne (statut, corps)"""
+        key = cache_key('gemini', GEMINI_MODEL, payload) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                instant('cache hit', cat='cache', provider='gemini')
+                return 200, cached
+        
+        response = self._post(payload, timeout)
+        if key and response.status_code == 200:
+            self.cache.set(key, response.text)
+        return response.status_code, response.text
+    
+    def probe(self, timeout: float = 10) -> "requests.Response":
+        """Lecture des métadonnées du modèle: vérifie la clé sans génération"""
+        return traced_request(self.session, 'GET', f"{GEMINI_MODEL_API}?key={self.api_key}", 'gemini',
+                              timeout=timeout)
+    
+    def _settle_stream(self, payload: dict, parts: list):
+        """Ramène la réservation de tokens d'un flux terminé au texte effectivement généré"""
+        if self.limiter.enabled:
+            prompt, output = payload_tokens(payload)
+            self.limiter.settle(prompt + output, prompt + estimate_tokens(''.join(parts)))
+    
+    def warm_up(self):
+        """Prépare une connexion vers l'API"""
+        warm_up_session(self.session, GEMINI_API, 'gemini')
+    
+    def close(self):
+        """Ferme les connexions du pool"""
+        self.session.close()
     
     def adapt_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None) -> Optional[str]:
-        """Adapte le CV avec Gemini (retourne None si erreur 503/429)"""
-        prompt = f"""Tu es un expert en CV. Adapte ce CV à l'offre d'emploi suivante:
-
-CV original:
-{cv_text}
-
-Offre d'emploi:
-{job_offer}
-
-Analyse clés:
-{analysis}
-
-{f'Instructions supplémentaires:\n{instructions}' if instructions else ''}
+        """Adapte le CV avec Gemini (retourne None si erreur 503/429 persistante)"""
+        status, body = self._call(gemini_payload(
+            build_adapt_prompt(cv_text, job_offer, analysis, instructions),
+            temperature=0.7,
+            max_output_tokens=3000
+        ), timeout=120)
+        
+        # Toujours overloadé (503) ou quota atteint (429) après relances : retourner None pour fallback
+        if status == 503 or status == 429:
+            return None
+        
+        if status != 200:
+            raise APIError(status, f"Erreur Gemini ({status}): {gemini_error_message(body)}")
+        
+        return gemini_text(json.loads(body))
+    
+    def adapt_cv_stream(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None,
+                        stall_timeout: float = DEFAULT_STALL_TIMEOUT) -> Iterator[str]:
+        """Adapte le CV avec Gemini en streaming (streamGenerateContent, SSE)
 
-Instructions:
-- Garde la structure du CV
-- Mets en avant les compétences pertinentes
-- Adapte les descriptions pour matcher l'offre
-- Utilise les mots-clés de l'offre
-- Sois concis et impactant
+        Partage le cache d'adapt_cv (même clé, réponse complète enregistrée en fin de flux).
+        """
+        payload = gemini_payload(
+            build_adapt_prompt(cv_text, job_offer, analysis, instructions),
+            temperature=0.7,
+            max_output_tokens=3000
+        )
+        key = cache_key('gemini', GEMINI_MODEL, payload) if self.cache else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            yield gemini_text(json.loads(cached))
+            return
+        
+        response = self._post(payload, timeout=(10, stall_timeout), stream=True)
+        if response.status_code != 200:
+            body = response.text
+            response.close()
+            raise APIError(response.status_code, f"Erreur Gemini ({response.status_code}): {gemini_error_message(body)}")
+        
+        parts = []
+        with span('stream gemini', cat='http', provider='gemini') as current:
+            for event in stream_events(response, stall_timeout, 'Gemini'):
+                candidates = event.get('candidates') or [{}]
+                for part in (candidates[0].get('content') or {}).get('parts', []):
+                    text = part.get('text')
+                    if text:
+                        parts.append(text)
+                        yield text
+            current.set(fragments=len(parts), bytes_received=received_bytes(response))
+        
+        self._settle_stream(payload, parts)
+        if key and parts:
+            self.cache.set(key, json.dumps({'candidates': [{'content': {'parts': [{'text': ''.join(parts)}]}}]}))
+    
+    def adapt_and_score(self, cv_text: str, job_offer: str, analysis: str,
+                        instructions: Optional[str] = None) -> Optional[Tuple[str, Optional[int]]]:
+        """Adapte le CV et calcule son score en une requête (responseSchema), None si erreur 503/429 persistante
 
-Fournit uniquement le CV adapté, sans explications additionnelles."""
+        Lève MalformedOutputError si la réponse ne respecte pas le schéma.
+        """
+        status, body = self._call(gemini_payload(
+            build_adapt_prompt(cv_text, job_offer, analysis, instructions, with_score=True),
+            temperature=0.7,
+            max_output_tokens=3500,
+            schema=GEMINI_ADAPT_SCORE_SCHEMA
+        ), timeout=120)
         
-        try:
-            response = requests.post(
-                f"{GEMINI_API}?key={self.api_key}",
-                headers={'Content-Type': 'application/json'},
-                json={
-                    'contents': [
-                        {'role': 'user', 'parts': [{'text': prompt}]}
-                    ],
-                    'generationConfig': {
-                        'temperature': 0.7,
-                        'maxOutputTokens': 3000
-                    }
-                },
-                timeout=120
-            )
-            
-            # Si Gemini est overloadé (503) ou quota atteint (429), retourner None pour fallback
-            if response.status_code == 503 or response.status_code == 429:
-                return None
-            
-            if response.status_code != 200:
-                error_msg = response.text[:200]
-                try:
-                    json_error = response.json()
-                    if 'error' in json_error:
-                        error_msg = json_error['error'].get('message', error_msg)
-                except:
-                    pass
-                raise Exception(f"Erreur Gemini ({response.status_code}): {error_msg}")
-            
-            data = response.json()
-            
-            if 'candidates' not in data or not data['candidates']:
-                raise Exception(f"Réponse Gemini invalide (pas de candidates)")
-            
-            candidate = data['candidates'][0]
-            if 'content' not in candidate or 'parts' not in candidate['content']:
-                raise Exception(f"Réponse Gemini invalide (structure)")
-            
-            return candidate['content']['parts'][0]['text']
-        except Exception as e:
-            if '503' in str(e) or '429' in str(e):
-                return None
-            raise e
+        if status == 503 or status == 429:
+            return None
+        
+        if status != 200:
+            raise APIError(status, f"Erreur Gemini ({status}): {gemini_error_message(body)}")
+        
+        return parse_adapt_score(gemini_text(json.loads(body)))
     
     def calculate_score(self, adapted_cv: str, job_offer: str) -> Optional[int]:
         """Calcule le score de pertinence avec Gemini (retourne None si erreur)"""
-        prompt = f"""Sur une échelle de 0 à 100, quel est le score de pertinence entre ce CV et cette offre?
-Réponds uniquement avec un nombre entre 0 et 100.
-
-CV adapté:
-{adapted_cv[:1000]}
-
-Offre:
-{job_offer[:1000]}"""
-        
         try:
-            response = requests.post(
-                f"{GEMINI_API}?key={self.api_key}",
-                headers={'Content-Type': 'application/json'},
-                json={
-                    'contents': [
-                        {'role': 'user', 'parts': [{'text': prompt}]}
-                    ],
-                    'generationConfig': {
-                        'temperature': 0.3,
-                        'maxOutputTokens': 10
-                    }
-                },
-                timeout=60
-            )
+            status, body = self._call(gemini_payload(
+                build_score_prompt(adapted_cv, job_offer),
+                temperature=0.3,
+                max_output_tokens=10
+            ), timeout=60)
             
             # Si Gemini est overloadé ou quota atteint, retourner None pour fallback
-            if response.status_code == 503 or response.status_code == 429:
-                return None
-            
-            if response.status_code != 200:
-                return None
-            
-            data = response.json()
-            
-            if 'candidates' not in data or not data['candidates']:
-                return None
-            
-            candidate = data['candidates'][0]
-            if 'content' not in candidate or 'parts' not in candidate['content']:
+            if status != 200:
                 return None
             
-            score_text = candidate['content']['parts'][0]['text']
-            import re
-            match = re.search(r'\d+', score_text)
-            score = int(match.group()) if match else 0
-            return min(100, max(0, score))
+            return parse_score(gemini_text(json.loads(body)))
         except Exception:
             return None
@@ -0,0 +1,191 @@
+"""
+Pipeline CVAdapter asynchrone : plusieurs adaptations en parallèle dans un seul processus
+"""
+
+import asyncio
+import time
+from typing import Optional, Union
+
+from .adapter import CVAdapter
+from .api_client import DEFAULT_POOL_MAXSIZE
+from .async_client import AsyncPerplexityClient, AsyncGeminiClient
+from .cache import ResponseCache
+from .router import ProviderRouter, PROVIDER_LABELS
+from .scoring import combine_scores
+
+
+class AsyncCVAdapter:
+    """Adaptateur CV asynchrone utilisant Perplexity et Gemini
+
+    Les appels réseau sont faits avec aiohttp ; l'extraction du CV et l'écriture
+    des fichiers (PDF, TXT, DOCX) tournent dans l'exécuteur par défaut de la boucle.
+    Le nombre d'adaptations simultanées est borné par max_concurrency.
+    """
+    
+    def __init__(self,
+                 perplexity_key: str,
+                 gemini_key: str,
+                 max_concurrency: int = 10,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 keep_alive: bool = True,
+                 cache: Union[bool, ResponseCache] = True,
+                 router: Optional[ProviderRouter] = None,
+                 check_connections: bool = True,
+                 score_engine: str = 'llm'):
+        """Initialise l'adaptateur (les clés sont vérifiées à la première génération)"""
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache or None
+        self.perplexity_client = AsyncPerplexityClient(perplexity_key, pool_maxsize, keep_alive, self.cache)
+        self.gemini_client = AsyncGeminiClient(gemini_key, pool_maxsize, keep_alive, self.cache)
+        self.router = router or ProviderRouter()
+        # Vérification des clés, chargement du CV et écriture des documents délégués à l'adaptateur synchrone
+        self.adapter = CVAdapter(perplexity_key, gemini_key, cache=False, router=self.router,
+                                 check_connections=check_connections, score_engine=score_engine,
+                                 jobs=False)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self):
+        """Ferme les sessions HTTP"""
+        await self.perplexity_client.close()
+        await self.gemini_client.close()
+        self.adapter.close()
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Créé dans la boucle en cours (requis avant Python 3.10)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    async def _run_blocking(self, func, *args):
+        """Exécute une fonction bloquante (I/O disque, ReportLab) hors de la boucle"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+    
+    async def analyze_job_offer(self, job_offer: str) -> str:
+        """Analyse l'offre d'emploi avec Perplexity"""
+        return await self.perplexity_client.analyze_job_offer(job_offer)
+    
+    @property
+    def gemini_available(self) -> bool:
+        return self.router.is_available('gemini')
+    
+    @gemini_available.setter
+    def gemini_available(self, available: bool):
+        if available:
+            self.router.reset('gemini')
+        else:
+            self.router.trip('gemini')
+    
+    def _client(self, provider: str):
+        return self.gemini_client if provider == 'gemini' else self.perplexity_client
+    
+    async def adapt_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None) -> str:
+        """Adapte le CV avec le fournisseur le plus rapide et sain, bascule sur l'autre en cas d'échec"""
+        last_error = None
+        attempted = False
+        providers = self.router.route('adapt')
+        
+        for i, provider in enumerate(providers):
+            if not self.router.acquire(provider) and (attempted or i < len(providers) - 1):
+                continue
+            
+            attempted = True
+            client = self._client(provider)
+            # Un fournisseur de repli est disponible : pas de relance sur 429/503, on bascule
+            fallback = any(self.router.is_available(p) for p in providers[i + 1:])
+            start = time.perf_counter()
+            try:
+                # Gemini retourne None si overloadé (503) ou quota atteint (429)
+                with client.retry.fail_fast(fallback):
+                    result = await client.adapt_cv(cv_text, job_offer, analysis, instructions)
+            except Exception as e:
+                result = None
+                last_error = e
+            elapsed = time.perf_counter() - start
+            
+            if result is not None:
+                self.router.record_success(provider, 'adapt', elapsed)
+                return result
+            
+            self.router.record_failure(provider, 'adapt', elapsed)
+            print(f"⚠️  {PROVIDER_LABELS[provider]} indisponible, bascule sur le fournisseur suivant...")
+        
+        raise last_error or Exception("Aucun fournisseur disponible pour l'adaptation du CV")
+    
+    async def calculate_score(self, adapted_cv: str, job_offer: str) -> int:
+        """Calcule le score selon le moteur de l'adaptateur (local, LLM ou hybride)"""
+        engine = self.adapter.score_engine
+        if engine == 'local':
+            return self.adapter.local_scorer.score(adapted_cv, job_offer)
+        
+        score = await self._llm_score(adapted_cv, job_offer)
+        if engine == 'hybrid':
+            return combine_scores(score, self.adapter.local_scorer.score(adapted_cv, job_offer))
+        if score is None:
+            print("⚠️  Score non disponible")
+            return 0
+        return score
+    
+    async def _llm_score(self, adapted_cv: str, job_offer: str) -> Optional[int]:
+        """Score LLM par le fournisseur le plus rapide et sain, bascule sur l'autre en cas d'échec"""
+        attempted = False
+        providers = self.router.route('score')
+        
+        for i, provider in enumerate(providers):
+            if not self.router.acquire(provider) and (attempted or i < len(providers) - 1):
+                continue
+            
+            attempted = True
+            client = self._client(provider)
+            fallback = any(self.router.is_available(p) for p in providers[i + 1:])
+            start = time.perf_counter()
+            with client.retry.fail_fast(fallback):
+                score = await client.calculate_score(adapted_cv, job_offer)
+            elapsed = time.perf_counter() - start
+            
+            if score is not None:
+                self.router.record_success(provider, 'score', elapsed)
+                return score
+            
+            self.router.record_failure(provider, 'score', elapsed)
+        
+        return None
+    
+    async def generate(self,
+                       cv_path: str,
+                       job_offer: str,
+                       output_path: str = "CV_Adapte.pdf",
+                       instructions: Optional[str] = None,
+                       template_path: Optional[str] = None) -> dict:
+        """Génère le CV adapté complet (PDF/TXT, ou DOCX si template_path est fourni)"""
+        async with self._get_semaphore():
+            await self._run_blocking(self.adapter.ensure_ready)
+            # L'analyse de l'offre ne dépend pas du CV : extraction et analyse en parallèle
+            cv_text, analysis = await asyncio.gather(
+                self._run_blocking(self.adapter.load_cv, cv_path),
+                self.analyze_job_offer(job_offer)
+            )
+            adapted_cv = await self.adapt_cv(cv_text, job_offer, analysis, instructions)
+            score = await self.calculate_score(adapted_cv, job_offer)
+            
+            if template_path:
+                await self._run_blocking(self.adapter.write_docx, adapted_cv, template_path, output_path)
+            else:
+                await self._run_blocking(self.adapter.write_output, adapted_cv, output_path, True)
+        
+        print(f"✅ CV adapté sauvegardé: {output_path} (score: {score}%)")
+        
+        return {
+            'cv': adapted_cv,
+            'analysis': analysis,
+            'score': score,
+            'output_file': output_path
+        }
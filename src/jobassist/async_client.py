@@ -0,0 +1,234 @@
+"""
+Clients API asynchrones (asyncio) pour Perplexity et Gemini
+"""
+
+import asyncio
+import json
+import time
+from typing import Optional, Tuple
+
+from .api_client import (
+    PERPLEXITY_API,
+    PERPLEXITY_MODEL,
+    GEMINI_API,
+    GEMINI_MODEL,
+    DEFAULT_POOL_MAXSIZE,
+    APIError,
+    build_analysis_prompt,
+    build_adapt_prompt,
+    build_score_prompt,
+    parse_score,
+    perplexity_payload,
+    gemini_payload,
+    gemini_error_message,
+    gemini_text,
+    payload_tokens,
+    usage_tokens,
+)
+from .cache import ResponseCache, cache_key
+from .cv_model import estimate_tokens
+from .lazy import LazyModule
+from .ratelimit import RateLimiter
+from .retry import CONNECT_ERROR, TRANSPORT_ERROR, RetryPolicy, parse_retry_after
+
+aiohttp = LazyModule('aiohttp')
+
+
+class _AsyncClientBase:
+    """Session aiohttp partagée, créée à la première requête dans la boucle courante"""
+    
+    provider = None
+    model = None
+    
+    def __init__(self, api_key: str, pool_maxsize: int = DEFAULT_POOL_MAXSIZE, keep_alive: bool = True,
+                 cache: Optional[ResponseCache] = None, retry: Optional[RetryPolicy] = None,
+                 limiter: Optional[RateLimiter] = None):
+        if not aiohttp:
+            raise ImportError("aiohttp not installed. Run: pip install aiohttp")
+        self.api_key = api_key
+        self.cache = cache
+        self.retry = retry or RetryPolicy()
+        self.limiter = limiter or RateLimiter(self.provider, api_key)
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self._session = None
+    
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.pool_maxsize,
+                force_close=not self.keep_alive
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+    
+    async def _send(self, url: str, headers: dict, payload: dict, timeout: float) -> Tuple[int, str]:
+        """Envoie la requête (quotas et relances compris, voir RateLimiter et RetryPolicy) et retourne (statut, corps)"""
+        self.retry.budget.deposit()
+        started = time.monotonic()
+        retry = 0
+        prompt, output = payload_tokens(payload) if self.limiter.enabled else (0, 0)
+        while True:
+            if self.limiter.enabled:
+                # Attente de quota hors de la boucle d'événements (SQLite, sleep)
+                await asyncio.to_thread(self.limiter.acquire, prompt + output)
+            try:
+                async with self._get_session().post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as response:
+                    status, body = response.status, await response.text()
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if self.limiter.enabled:
+                    # Consommation déclarée par l'API (estimée à défaut), comme le client synchrone
+                    used = (usage_tokens(body) or prompt + estimate_tokens(body)) if status == 200 else 0
+                    await asyncio.to_thread(self.limiter.settle, prompt + output, used)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self.limiter.enabled:
+                    # Pas de réponse : la réservation de tokens est rendue
+                    await asyncio.to_thread(self.limiter.settle, prompt + output, 0)
+                error = CONNECT_ERROR if isinstance(e, aiohttp.ClientConnectorError) else TRANSPORT_ERROR
+                # Génération sans effet de bord côté serveur : relançable comme une requête idempotente
+                delay = self.retry.decide(retry, started, True, error=error)
+                if delay is None:
+                    raise
+            else:
+                if status < 400:
+                    return status, body
+                delay = self.retry.decide(retry, started, True, status=status, retry_after=retry_after)
+                if delay is None:
+                    return status, body
+            await asyncio.sleep(delay)
+            retry += 1
+    
+    async def _call(self, payload: dict, timeout: float) -> Tuple[int, str]:
+        """Requête avec cache de réponses: retourne (statut, corps)"""
+        key = cache_key(self.provider, self.model, payload) if self.cache else None
+        if key:
+            # Cache SQLite lu et écrit hors de la boucle d'événements
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return 200, cached
+        
+        status, body = await self._post(payload, timeout)
+        if key and status == 200:
+            await asyncio.to_thread(self.cache.set, key, body)
+        return status, body
+    
+    async def close(self):
+        """Ferme la session et les connexions du pool"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncPerplexityClient(_AsyncClientBase):
+    """Client asynchrone pour l'API Perplexity"""
+    
+    provider = 'perplexity'
+    model = PERPLEXITY_MODEL
+    
+    async def _post(self, payload: dict, timeout: float) -> Tuple[int, str]:
+        return await self._send(
+            PERPLEXITY_API,
+            {
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json'
+            },
+            payload,
+            timeout
+        )
+    
+    async def analyze_job_offer(self, job_offer: str) -> str:
+        """Analyse l'offre d'emploi avec Perplexity"""
+        status, body = await self._call(perplexity_payload(
+            build_analysis_prompt(job_offer),
+            temperature=0.7,
+            max_tokens=2000,
+            system='Tu es un assistant expert en ressources humaines et CV.'
+        ), timeout=120)
+        
+        if status != 200:
+            raise APIError(status, f"Erreur Perplexity ({status}): {body[:200]}")
+        
+        return json.loads(body)['choices'][0]['message']['content']
+    
+    async def adapt_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None) -> str:
+        """Adapte le CV avec Perplexity"""
+        status, body = await self._call(perplexity_payload(
+            build_adapt_prompt(cv_text, job_offer, analysis, instructions),
+            temperature=0.7,
+            max_tokens=3000,
+            system='Tu es un expert en CV.'
+        ), timeout=120)
+        
+        if status != 200:
+            raise APIError(status, f"Erreur Perplexity ({status}): {body[:200]}")
+        
+        return json.loads(body)['choices'][0]['message']['content']
+    
+    async def calculate_score(self, adapted_cv: str, job_offer: str) -> Optional[int]:
+        """Calcule le score de pertinence avec Perplexity"""
+        try:
+            status, body = await self._call(perplexity_payload(
+                build_score_prompt(adapted_cv, job_offer),
+                temperature=0.3,
+                max_tokens=10
+            ), timeout=60)
+            
+            if status != 200:
+                return None
+            
+            return parse_score(json.loads(body)['choices'][0]['message']['content'])
+        except Exception:
+            return None
+
+
+class AsyncGeminiClient(_AsyncClientBase):
+    """Client asynchrone pour l'API Gemini"""
+    
+    provider = 'gemini'
+    model = GEMINI_MODEL
+    
+    async def _post(self, payload: dict, timeout: float) -> Tuple[int, str]:
+        return await self._send(
+            f"{GEMINI_API}?key={self.api_key}",
+            {'Content-Type': 'application/json'},
+            payload,
+            timeout
+        )
+    
+    async def adapt_cv(self, cv_text: str, job_offer: str, analysis: str, instructions: Optional[str] = None) -> Optional[str]:
+        """Adapte le CV avec Gemini (retourne None si erreur 503/429)"""
+        status, body = await self._call(gemini_payload(
+            build_adapt_prompt(cv_text, job_offer, analysis, instructions),
+            temperature=0.7,
+            max_output_tokens=3000
+        ), timeout=120)
+        
+        # Si Gemini est overloadé (503) ou quota atteint (429), retourner None pour fallback
+        if status == 503 or status == 429:
+            return None
+        
+        if status != 200:
+            raise APIError(status, f"Erreur Gemini ({status}): {gemini_error_message(body)}")
+        
+        return gemini_text(json.loads(body))
+    
+    async def calculate_score(self, adapted_cv: str, job_offer: str) -> Optional[int]:
+        """Calcule le score de pertinence avec Gemini (retourne None si erreur)"""
+        try:
+            status, body = await self._call(gemini_payload(
+                build_score_prompt(adapted_cv, job_offer),
+                temperature=0.3,
+                max_output_tokens=10
+            ), timeout=60)
+            
+            if status != 200:
+                return None
+            
+            return parse_score(gemini_text(json.loads(body)))
+        except Exception:
+            return None
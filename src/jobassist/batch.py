@@ -0,0 +1,58 @@
+"""
+Mode batch : lecture paresseuse des offres et écriture des résultats en JSONL
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Iterator, Tuple, TextIO
+
+
+def iter_offers(source: str) -> Iterator[Tuple[str, str]]:
+    """Itère sur les offres (identifiant, texte) d'un dossier de .txt ou d'un fichier JSONL
+
+    Les offres sont lues une par une : seule l'offre en cours est en mémoire.
+    Format JSONL: une offre par ligne, {"id": "...", "text": "..."} ou {"id": "...", "path": "offre.txt"}
+    """
+    path = Path(source)
+    
+    if path.is_dir():
+        names = sorted(entry.name for entry in os.scandir(path)
+                       if entry.is_file() and entry.name.lower().endswith('.txt'))
+        for name in names:
+            with open(path / name, 'r', encoding='utf-8') as f:
+                yield Path(name).stem, f.read()
+        return
+    
+    if path.suffix.lower() not in ('.jsonl', '.ndjson'):
+        raise ValueError(f"Source batch non supportée: {source}. Utilisez un dossier de .txt ou un fichier .jsonl")
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            offer_id = str(record.get('id', line_number))
+            if 'text' in record:
+                yield offer_id, record['text']
+            elif 'path' in record:
+                offer_path = Path(record['path'])
+                if not offer_path.is_absolute():
+                    offer_path = path.parent / offer_path
+                with open(offer_path, 'r', encoding='utf-8') as offer_file:
+                    yield offer_id, offer_file.read()
+            else:
+                raise ValueError(f"Ligne {line_number}: champ 'text' ou 'path' manquant")
+
+
+def safe_filename(offer_id: str) -> str:
+    """Nom de fichier sûr dérivé de l'identifiant d'une offre"""
+    return re.sub(r'[^\w.-]+', '_', offer_id).strip('._') or 'offre'
+
+
+def write_result(stream: TextIO, result: dict):
+    """Écrit un résultat sur une ligne JSONL et le rend visible immédiatement"""
+    stream.write(json.dumps(result, ensure_ascii=False) + '\n')
+    stream.flush()
@@ -0,0 +1,146 @@
+"""
+Cache disque des réponses LLM (SQLite, LRU borné en taille, TTL)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Emplacement et limites par défaut (surchargeables par variables d'environnement)
+DEFAULT_CACHE_DIR = Path(os.getenv('JOBASSIST_CACHE_DIR', str(Path.home() / '.cache' / 'jobassist')))
+DEFAULT_MAX_SIZE = int(os.getenv('JOBASSIST_CACHE_MAX_MB', '200')) * 1024 * 1024
+DEFAULT_TTL = int(os.getenv('JOBASSIST_CACHE_TTL', str(7 * 24 * 3600)))
+
+
+def cache_key(provider: str, model: str, payload: dict) -> str:
+    """Clé de contenu: hash du fournisseur, du modèle, du prompt et des paramètres de génération"""
+    material = json.dumps(
+        {'provider': provider, 'model': model, 'payload': payload},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Cache persistant des réponses brutes des APIs, partageable entre processus
+
+    Les entrées plus vieilles que ttl secondes sont ignorées ; au-delà de max_size
+    octets, les entrées les moins récemment lues sont supprimées.
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE, ttl: int = DEFAULT_TTL):
+        self.path = Path(path) if path else DEFAULT_CACHE_DIR / 'responses.sqlite'
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Connexion SQLite propre au thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)')
+        conn.execute('''CREATE TABLE IF NOT EXISTS stats (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )''')
+        conn.execute("INSERT OR IGNORE INTO stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+    
+    def _count(self, name: str):
+        with self._lock:
+            if name == 'hits':
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._connect().execute('UPDATE stats SET value = value + 1 WHERE name = ?', (name,))
+    
+    def get(self, key: str) -> Optional[str]:
+        """Retourne la réponse en cache, ou None si absente ou expirée"""
+        conn = self._connect()
+        row = conn.execute('SELECT value, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+        
+        if row is None or (self.ttl and now - row[1] > self.ttl):
+            if row is not None:
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._count('misses')
+            return None
+        
+        conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        self._count('hits')
+        return row[0]
+    
+    def set(self, key: str, value: str):
+        """Enregistre une réponse puis applique la limite de taille"""
+        now = time.time()
+        size = len(value.encode('utf-8'))
+        if size > self.max_size:
+            return
+        
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+            (key, value, size, now, now)
+        )
+        self._evict(conn)
+    
+    def _evict(self, conn: sqlite3.Connection):
+        """Supprime les entrées expirées puis les moins récemment utilisées (LRU)"""
+        if self.ttl:
+            conn.execute('DELETE FROM responses WHERE created_at < ?', (time.time() - self.ttl,))
+        
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_size:
+            return
+        
+        to_free = total - self.max_size
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY accessed_at'):
+            victims.append((key,))
+            to_free -= size
+            if to_free <= 0:
+                break
+        conn.executemany('DELETE FROM responses WHERE key = ?', victims)
+    
+    def stats(self) -> dict:
+        """Compteurs du processus courant et totaux persistés"""
+        conn = self._connect()
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        totals = dict(conn.execute('SELECT name, value FROM stats').fetchall())
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'total_hits': totals.get('hits', 0),
+            'total_misses': totals.get('misses', 0),
+            'entries': entries,
+            'size': size
+        }
+    
+    def clear(self):
+        """Vide le cache"""
+        self._connect().execute('DELETE FROM responses')
@@ -3,12 +3,22 @@ Interface en ligne de commande pour JobAssist
 """
 
 import sys
+import json
+import time
 import argparse
 from pathlib import Path
 from typing import Optional
 
 from .adapter import CVAdapter
+from .api_client import DEFAULT_POOL_MAXSIZE, DEFAULT_STALL_TIMEOUT
+from .batch import iter_offers, write_result
 from .config import load_api_keys
+from .hedging import DEFAULT_HEDGE_AFTER
+from .index import OfferIndex
+from .jobs import DONE, FAILED, INCOMPLETE, STAGE_LABELS, STATUSES, JobStore, file_hash, job_key
+from .rank import RANK_BY, SimilarityMatrix
+from .scoring import SCORE_ENGINES
+from .tracing import start_tracing, stop_tracing
 
 
 def get_job_offer_from_console() -> str:
@@ -91,10 +101,351 @@ def interactive_mode():
             )
         
         print(f"\n🎯 Analyse:\n{result['analysis']}")
+    
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+
+
+def batch_mode(args):
+    """Mode batch: un CV adapté à toutes les offres d'un dossier ou d'un fichier JSONL"""
+    if not args.cv or not Path(args.cv).exists():
+        print("❌ --cv est requis en mode batch")
+        sys.exit(1)
+    
+    if not Path(args.batch).exists():
+        print(f"❌ Erreur: {args.batch} n'existe pas")
+        sys.exit(1)
+    
+    if args.template and not Path(args.template).exists():
+        print(f"❌ Erreur: {args.template} n'existe pas")
+        sys.exit(1)
+    
+    perplexity_key, gemini_key = load_api_keys()
+    adapter = CVAdapter(perplexity_key, gemini_key,
+                        pool_maxsize=max(DEFAULT_POOL_MAXSIZE, args.concurrency),
+                        cache=not args.no_cache,
+                        hedging=args.hedge, hedge_after=args.hedge_after,
+                        score_engine=args.score_engine,
+                        fused=args.fused,
+                        jobs=not args.no_resume)
+    if args.extract_stats:
+        adapter.extractor.measure_memory = True
+    
+    output_dir = args.output_dir or 'CV_Adaptes'
+    results_path = args.results or str(Path(output_dir) / 'results.jsonl')
+    Path(results_path).parent.mkdir(parents=True, exist_ok=True)
+    
+    print(f"📦 Mode batch: {args.batch} ({args.concurrency} en parallèle)")
+    print(f"📝 Résultats: {results_path}\n")
+    
+    processed = failed = 0
+    try:
+        with open(results_path, 'w', encoding='utf-8') as results:
+            for result in adapter.adapt_many(
+                args.cv,
+                iter_offers(args.batch),
+                output_dir=output_dir,
+                max_workers=args.concurrency,
+                instructions=args.instructions,
+                template_path=args.template
+            ):
+                write_result(results, result)
+                processed += 1
+                total = result['timings']['total']
+                resumed = f", reprise après: {STAGE_LABELS[result['resumed']]}" if result['resumed'] else ''
+                if result['error']:
+                    failed += 1
+                    print(f"❌ [{result['id']}] {result['error'][:100]} ({total:.1f}s{resumed})")
+                else:
+                    print(f"✅ [{result['id']}] {result['score']}% → {result['output_file']} ({total:.1f}s{resumed})")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    
+    print(f"\n📊 {processed} offre(s) traitée(s), {failed} erreur(s)")
+    if adapter.cache:
+        stats = adapter.cache.stats()
+        print(f"💾 Cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+    if adapter.hedger:
+        stats = adapter.hedger.stats()
+        print(f"🔀 Hedging: {stats['hedges']}/{stats['requests']} requête(s) relancée(s), victoires: {stats['wins']}")
+
+
+def index_mode(args):
+    """Index des offres: construction/mise à jour, recherche des meilleures offres pour un CV"""
+    index = OfferIndex(args.index)
+    
+    if args.index_command == 'build':
+        if not Path(args.source).exists():
+            print(f"❌ Erreur: {args.source} n'existe pas")
+            sys.exit(1)
+        start = time.perf_counter()
+        counts = index.update(iter_offers(args.source), prune=args.prune)
+        elapsed = time.perf_counter() - start
+        print(f"🗂️  Index mis à jour en {elapsed:.2f}s: {counts['added']} ajoutée(s), "
+              f"{counts['updated']} modifiée(s), {counts['unchanged']} inchangée(s), {counts['removed']} retirée(s)")
+    
+    elif args.index_command == 'query':
+        if not Path(args.cv).exists():
+            print(f"❌ Erreur: {args.cv} n'existe pas")
+            sys.exit(1)
+        # Lecture du CV uniquement: aucune clé ni requête réseau nécessaire
+        adapter = CVAdapter('', '', cache=False, check_connections=False, jobs=False)
+        cv_text = adapter.load_cv(args.cv)
+        start = time.perf_counter()
+        matches = index.query(cv_text, k=args.top)
+        elapsed = time.perf_counter() - start
         
+        print(f"\n🎯 {len(matches)} meilleure(s) offre(s) ({elapsed * 1000:.0f} ms):")
+        for rank, match in enumerate(matches, 1):
+            print(f"  {rank:>3}. {match['id']} (score: {match['score']})")
+        
+        if args.output:
+            texts = dict(index.iter_offers(match['id'] for match in matches))
+            with open(args.output, 'w', encoding='utf-8') as f:
+                for match in matches:
+                    f.write(json.dumps({**match, 'text': texts[match['id']]}, ensure_ascii=False) + '\n')
+            print(f"\n📝 Offres exportées: {args.output} (utilisable avec --batch)")
+    
+    else:
+        stats = index.stats()
+        print(f"🗂️  {stats['path']}: {stats['offers']} offre(s), {stats['terms']} terme(s), "
+              f"{stats['size'] / 1024 / 1024:.1f} Mo")
+
+
+def collect_cvs(paths: list) -> list:
+    """Chemins des CV (PDF ou TXT) : fichiers donnés et contenu des dossiers"""
+    cv_paths = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            cv_paths.extend(sorted(str(p) for p in path.iterdir()
+                                   if p.is_file() and p.suffix.lower() in ('.pdf', '.txt')))
+        else:
+            cv_paths.append(str(path))
+    return cv_paths
+
+
+def rank_mode(args):
+    """Classement: matrice de similarité de tous les CV x toutes les offres, puis adaptation des meilleurs couples"""
+    for path in args.cvs + [args.offers]:
+        if not Path(path).exists():
+            print(f"❌ Erreur: {path} n'existe pas")
+            sys.exit(1)
+    
+    if args.template and not Path(args.template).exists():
+        print(f"❌ Erreur: {args.template} n'existe pas")
+        sys.exit(1)
+    
+    try:
+        cv_paths = collect_cvs(args.cvs)
+        if Path(args.offers).suffix.lower() == '.txt':
+            with open(args.offers, 'r', encoding='utf-8') as f:
+                offers = [(Path(args.offers).stem, f.read())]
+        else:
+            offers = list(iter_offers(args.offers))
+        if not cv_paths or not offers:
+            print(f"❌ Rien à classer: {len(cv_paths)} CV, {len(offers)} offre(s)")
+            sys.exit(1)
+        
+        # Lecture et classement sans réseau ; clés chargées seulement pour --adapt
+        keys = load_api_keys() if args.adapt else ('', '')
+        adapter = CVAdapter(*keys,
+                            pool_maxsize=max(DEFAULT_POOL_MAXSIZE, args.concurrency),
+                            cache=not args.no_cache,
+                            check_connections=bool(args.adapt),
+                            hedging=args.hedge, hedge_after=args.hedge_after,
+                            score_engine=args.score_engine,
+                            fused=args.fused,
+                            jobs=not args.no_resume)
+        
+        print(f"📄 Lecture de {len(cv_paths)} CV...")
+        start = time.perf_counter()
+        cv_texts = adapter.load_cvs(cv_paths)
+        loaded = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        matrix = SimilarityMatrix.from_texts(list(zip(cv_paths, cv_texts)), offers)
+        shortlists = matrix.shortlist(args.by, args.top)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    
+    print(f"🧮 {len(cv_paths)} CV x {len(offers)} offre(s) classés en {elapsed:.2f}s (lecture: {loaded:.2f}s)")
+    output = args.output or 'shortlist.jsonl'
+    key, items = ('offer', 'cvs') if args.by == 'offer' else ('cv', 'offers')
+    with open(output, 'w', encoding='utf-8') as f:
+        for name, shortlist in shortlists.items():
+            f.write(json.dumps({key: name, items: shortlist}, ensure_ascii=False) + '\n')
+    print(f"📝 Listes courtes ({args.top} par {'offre' if args.by == 'offer' else 'CV'}): {output}")
+    
+    pairs = matrix.top_pairs(max(args.adapt, 10), args.min_score)
+    print("\n🎯 Meilleurs couples:")
+    for rank, pair in enumerate(pairs[:10], 1):
+        print(f"  {rank:>3}. {pair['cv']} × {pair['offer']} (score: {pair['score']})")
+    
+    if not args.adapt:
+        return
+    
+    pairs = pairs[:args.adapt]
+    cv_by_path = dict(zip(cv_paths, cv_texts))
+    offer_by_id = dict(offers)
+    similarity = {(pair['cv'], pair['offer']): pair['score'] for pair in pairs}
+    output_dir = args.output_dir or 'CV_Adaptes'
+    results_path = args.results or str(Path(output_dir) / 'results.jsonl')
+    Path(results_path).parent.mkdir(parents=True, exist_ok=True)
+    print(f"\n📦 Adaptation des {len(pairs)} meilleur(s) couple(s) ({args.concurrency} en parallèle)")
+    print(f"📝 Résultats: {results_path}\n")
+    
+    processed = failed = 0
+    try:
+        with open(results_path, 'w', encoding='utf-8') as results:
+            for result in adapter.adapt_pairs(
+                ((pair['cv'], cv_by_path[pair['cv']], pair['offer'], offer_by_id[pair['offer']]) for pair in pairs),
+                output_dir=output_dir,
+                max_workers=args.concurrency,
+                instructions=args.instructions,
+                template_path=args.template
+            ):
+                result['rank_score'] = similarity[(result['cv'], result['id'])]
+                write_result(results, result)
+                processed += 1
+                label = f"{Path(result['cv']).stem} × {result['id']}"
+                total = result['timings']['total']
+                resumed = f", reprise après: {STAGE_LABELS[result['resumed']]}" if result['resumed'] else ''
+                if result['error']:
+                    failed += 1
+                    print(f"❌ [{label}] {result['error'][:100]} ({total:.1f}s{resumed})")
+                else:
+                    print(f"✅ [{label}] {result['score']}% → {result['output_file']} ({total:.1f}s{resumed})")
     except Exception as e:
         print(f"❌ Erreur: {e}")
         sys.exit(1)
+    
+    print(f"\n📊 {processed} couple(s) adapté(s), {failed} erreur(s)")
+
+
+def serve_mode(args):
+    """Service HTTP: CVAdapter initialisé une fois (clés vérifiées, connexions et rendu PDF prêts)"""
+    from .server import serve
+    
+    perplexity_key, gemini_key = load_api_keys()
+    adapter = CVAdapter(perplexity_key, gemini_key,
+                        pool_maxsize=max(DEFAULT_POOL_MAXSIZE, args.workers),
+                        cache=not args.no_cache,
+                        hedging=args.hedge, hedge_after=args.hedge_after,
+                        score_engine=args.score_engine,
+                        fused=args.fused,
+                        jobs=False)
+    try:
+        adapter.ensure_ready()
+        adapter.renderer.submit("Préchauffage").result()
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    
+    serve(adapter, args.host, args.port, args.workers, args.queue_size, args.work_dir, args.job_ttl,
+          args.max_upload_mb * 1024 * 1024, args.wait_timeout)
+
+
+def jobs_mode(args):
+    """Journal des jobs: liste, relance des jobs inachevés, purge"""
+    store = JobStore(args.jobs_db)
+    
+    if args.jobs_command == 'list':
+        jobs = store.list(args.status, args.limit)
+        icons = {DONE: '✅', FAILED: '❌', INCOMPLETE: '⏸️ '}
+        for job in jobs:
+            updated = time.strftime('%Y-%m-%d %H:%M', time.localtime(job['updated_at']))
+            score = f"{job['score']}%" if job['score'] is not None else '-'
+            print(f"{icons[job['status']]} {job['id'][:12]}  {updated}  {STAGE_LABELS[job['stage']]:<10} "
+                  f"{score:>4}  {job['label'] or Path(job['cv_path']).name} → {job['output_path']}")
+            if job['error']:
+                print(f"   ↳ {job['error'][:120]}")
+        stats = store.stats()
+        print(f"\n🗃️  {stats['path']}: {stats['jobs']} job(s), {stats[DONE]} terminé(s), "
+              f"{stats[FAILED]} en échec, {stats[INCOMPLETE]} inachevé(s)")
+    
+    elif args.jobs_command == 'retry':
+        if args.ids:
+            jobs = [job for prefix in args.ids for job in store.find(prefix)]
+        else:
+            jobs = store.list((FAILED, INCOMPLETE))
+        jobs = [job for job in jobs if job['status'] != DONE]
+        if not jobs:
+            print("✅ Aucun job à relancer")
+            return
+        
+        perplexity_key, gemini_key = load_api_keys()
+        adapter = CVAdapter(perplexity_key, gemini_key, cache=not args.no_cache,
+                            hedging=args.hedge, hedge_after=args.hedge_after,
+                            score_engine=args.score_engine, stream=args.stream, stall_timeout=args.stall_timeout,
+                            fused=args.fused, jobs=store)
+        failed = 0
+        for job in jobs:
+            print(f"\n🔁 Job {job['id'][:12]} ({job['label'] or Path(job['cv_path']).name})")
+            # Le job est identifié par le contenu du CV et le mode (modèles, --fused, --stream) : sinon ce serait un autre job
+            if not Path(job['cv_path']).exists() or job_key(file_hash(job['cv_path']), job['job_offer'],
+                                                            job['instructions'], adapter.job_mode) != job['id']:
+                print(f"❌ CV introuvable ou modifié depuis, ou mode différent de celui du job "
+                      f"(modèles, --fused, --stream ; actuel: {adapter.job_mode}): {job['cv_path']}")
+                failed += 1
+                continue
+            output = job['output_path'] or ('CV_Adapte.docx' if job['template_path'] else 'CV_Adapte.pdf')
+            try:
+                if job['template_path']:
+                    adapter.generate_with_template(job['cv_path'], job['job_offer'], job['template_path'],
+                                                   output, job['instructions'])
+                else:
+                    adapter.generate_adapted_cv_direct(job['cv_path'], job['job_offer'], output, job['instructions'])
+            except Exception as e:
+                print(f"❌ Erreur: {e}")
+                failed += 1
+        print(f"\n📊 {len(jobs)} job(s) relancé(s), {failed} erreur(s)")
+        if failed:
+            sys.exit(1)
+    
+    else:
+        if not (args.ids or args.status or args.older_than is not None or args.all):
+            print("❌ Précisez les jobs à purger (identifiants, --status, --older-than ou --all)")
+            sys.exit(1)
+        job_ids = [job['id'] for prefix in args.ids for job in store.find(prefix)] if args.ids else None
+        older_than = args.older_than * 24 * 3600 if args.older_than is not None else None
+        removed = store.purge(job_ids, args.status, older_than)
+        print(f"🗑️  {removed} job(s) supprimé(s)")
+
+
+def add_adaptation_options(parser: argparse.ArgumentParser, defaults: bool = True):
+    """Options du pipeline d'adaptation, communes à la commande principale et aux sous-commandes
+
+    Sur une sous-commande (defaults=False), une option absente n'écrase pas la valeur
+    donnée avant la sous-commande : `jobassist --concurrency 8 rank ...` reste valable.
+    """
+    def default(value):
+        return value if defaults else argparse.SUPPRESS
+    
+    parser.add_argument('--template', default=default(None), help='Chemin du template Word (.docx)')
+    parser.add_argument('--instructions', default=default(None), help='Instructions additionnelles')
+    parser.add_argument('--output-dir', default=default(None),
+                        help='Dossier de sortie du mode batch (défaut: CV_Adaptes)')
+    parser.add_argument('--concurrency', type=int, default=default(4),
+                        help='Nombre d\'offres traitées en parallèle en mode batch (défaut: 4)')
+    parser.add_argument('--results', default=default(None),
+                        help='Fichier JSONL des résultats du batch (défaut: <output-dir>/results.jsonl)')
+    parser.add_argument('--no-cache', action='store_true', default=default(False),
+                        help='Désactive le cache disque des réponses des APIs')
+    parser.add_argument('--no-resume', action='store_true', default=default(False),
+                        help='Ne reprend pas un job déjà commencé (journal des jobs désactivé)')
+    parser.add_argument('--hedge', action='store_true', default=default(False),
+                        help='Relance adaptation/score sur l\'autre fournisseur si le premier tarde')
+    parser.add_argument('--hedge-after', type=float, default=default(DEFAULT_HEDGE_AFTER), metavar='SECONDES',
+                        help=f'Délai avant relance tant que les latences ne sont pas mesurées '
+                             f'(défaut: {DEFAULT_HEDGE_AFTER:g}, ensuite p95 des latences)')
+    parser.add_argument('--score-engine', choices=SCORE_ENGINES, default=default('llm'),
+                        help='Calcul du score: llm (API), local (sans réseau) ou hybrid (défaut: llm)')
+    parser.add_argument('--fused', action='store_true', default=default(False),
+                        help='Adaptation et score en une seule requête (sortie JSON structurée)')
 
 
 def main():
@@ -112,18 +463,138 @@ Exemples:
   
   # Avec template Word
   python -m jobassist --cv CV.pdf --job-offer offre.txt --template template.docx
+  
+  # Batch: un CV, toutes les offres d'un dossier (ou d'un fichier .jsonl)
+  python -m jobassist --cv CV.pdf --batch offres/ --concurrency 8
+  
+  # Index des offres: présélection locale puis batch sur les meilleures
+  python -m jobassist index build offres/
+  python -m jobassist index query --cv CV.pdf --top 20 --output top.jsonl
+  python -m jobassist --cv CV.pdf --batch top.jsonl
+  
+  # Classement: tous les CV x toutes les offres, adaptation des 5 meilleurs couples
+  python -m jobassist rank --cvs cvs/ --offers offres/ --top 20 --adapt 5 --concurrency 8
+  
+  # Reprise: relancer la même commande reprend après la dernière étape terminée
+  python -m jobassist jobs list --status failed
+  python -m jobassist jobs retry
+  python -m jobassist jobs purge --status done --older-than 30
+  
+  # Service HTTP local (adapter gardé chaud, file d'attente et workers)
+  python -m jobassist serve --port 8080 --workers 4
+  curl -F cv=@CV.pdf -F offer=@offre.txt 'http://127.0.0.1:8080/jobs?wait=1' -o CV_Adapte.pdf
+  
+  # Chronologie des étapes (extraction, analyse, fallback, score, rendu)
+  python -m jobassist --cv CV.pdf --job-offer offre.txt --trace trace.json
         """
     )
     parser.add_argument('--interactive', '-i', action='store_true',
                        help='Mode interactif (défaut si pas d\'autres args)')
     parser.add_argument('--cv', help='Chemin du CV (PDF ou TXT)')
     parser.add_argument('--job-offer', help='Chemin de l\'offre d\'emploi (TXT)')
-    parser.add_argument('--template', help='Chemin du template Word (.docx)')
     parser.add_argument('--output', help='Chemin du fichier de sortie')
-    parser.add_argument('--instructions', help='Instructions additionnelles')
+    parser.add_argument('--batch', help='Dossier d\'offres .txt ou fichier .jsonl (mode batch)')
+    add_adaptation_options(parser)
+    parser.add_argument('--extract-stats', action='store_true',
+                       help='Mesure le pic mémoire par page lors de l\'extraction du PDF')
+    parser.add_argument('--stream', action='store_true',
+                       help='Affiche et écrit le CV adapté au fil de la génération')
+    parser.add_argument('--stall-timeout', type=float, default=DEFAULT_STALL_TIMEOUT,
+                       help=f'Abandon du flux après N secondes sans donnée (défaut: {DEFAULT_STALL_TIMEOUT})')
+    parser.add_argument('--trace', metavar='FICHIER.json',
+                       help='Enregistre la chronologie des étapes et requêtes HTTP (format Chrome trace-event)')
+    
+    subparsers = parser.add_subparsers(dest='command')
+    index_parser = subparsers.add_parser('index', help='Index local des offres (présélection sans API)')
+    index_parser.add_argument('--index', help='Fichier d\'index (défaut: <cache>/offers.sqlite)')
+    index_commands = index_parser.add_subparsers(dest='index_command', required=True)
+    build_parser = index_commands.add_parser('build', help='Construit ou met à jour l\'index')
+    build_parser.add_argument('source', help='Dossier d\'offres .txt ou fichier .jsonl')
+    build_parser.add_argument('--prune', action='store_true',
+                              help='Retire de l\'index les offres absentes de la source')
+    query_parser = index_commands.add_parser('query', help='Meilleures offres pour un CV')
+    query_parser.add_argument('--cv', required=True, help='Chemin du CV (PDF ou TXT)')
+    query_parser.add_argument('--top', '-k', type=int, default=10, help='Nombre d\'offres (défaut: 10)')
+    query_parser.add_argument('--output', help='Exporte les offres trouvées en JSONL (pour --batch)')
+    index_commands.add_parser('stats', help='Taille de l\'index')
+    serve_parser = subparsers.add_parser('serve', help='Service HTTP local (POST /jobs: CV + offre)')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Adresse d\'écoute (défaut: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=8080, help='Port (défaut: 8080)')
+    serve_parser.add_argument('--workers', type=int, default=4, help='Adaptations simultanées (défaut: 4)')
+    serve_parser.add_argument('--queue-size', type=int, default=32,
+                              help='Jobs en attente au-delà desquels les soumissions sont refusées (503, défaut: 32)')
+    serve_parser.add_argument('--work-dir', help='Dossier des fichiers des jobs (défaut: dossier temporaire)')
+    serve_parser.add_argument('--job-ttl', type=float, default=3600,
+                              help='Durée de conservation des jobs terminés en secondes (défaut: 3600)')
+    serve_parser.add_argument('--max-upload-mb', type=int, default=20, help='Taille maximale d\'une requête (défaut: 20)')
+    serve_parser.add_argument('--wait-timeout', type=float, default=300,
+                              help='Attente maximale d\'une requête ?wait=1 avant de répondre 202 (défaut: 300)')
+    rank_parser = subparsers.add_parser('rank', help='Classe de nombreux CV face à de nombreuses offres (sans API)')
+    rank_parser.add_argument('--cvs', nargs='+', required=True, help='CV (PDF ou TXT) ou dossiers de CV')
+    rank_parser.add_argument('--offers', required=True, help='Dossier d\'offres .txt, fichier .jsonl ou offre .txt')
+    rank_parser.add_argument('--top', '-k', type=int, default=10,
+                             help='Taille de chaque liste courte (défaut: 10)')
+    rank_parser.add_argument('--by', choices=RANK_BY, default='offer',
+                             help='Une liste de CV par offre ou une liste d\'offres par CV (défaut: offer)')
+    rank_parser.add_argument('--output', help='Listes courtes en JSONL (défaut: shortlist.jsonl)')
+    rank_parser.add_argument('--adapt', type=int, default=0, metavar='N',
+                             help='Adapte les N meilleurs couples CV x offre (API ; défaut: 0)')
+    rank_parser.add_argument('--min-score', type=int, help='Ignore les couples sous ce score de classement')
+    add_adaptation_options(rank_parser, defaults=False)
+    jobs_parser = subparsers.add_parser('jobs', help='Journal des jobs (reprise après une interruption)')
+    jobs_parser.add_argument('--jobs-db', help='Journal des jobs (défaut: <cache>/jobs.sqlite)')
+    jobs_commands = jobs_parser.add_subparsers(dest='jobs_command', required=True)
+    list_parser = jobs_commands.add_parser('list', help='Jobs du plus récent au plus ancien')
+    list_parser.add_argument('--status', action='append', choices=STATUSES,
+                             help='Filtre par statut (répétable)')
+    list_parser.add_argument('--limit', type=int, default=50, help='Nombre de jobs affichés (défaut: 50)')
+    retry_parser = jobs_commands.add_parser('retry', help='Relance des jobs inachevés (après leur dernière étape)')
+    retry_parser.add_argument('ids', nargs='*', help='Identifiants (ou débuts d\'identifiants) ; défaut: tous')
+    purge_parser = jobs_commands.add_parser('purge', help='Supprime des jobs du journal')
+    purge_parser.add_argument('ids', nargs='*', help='Identifiants (ou débuts d\'identifiants)')
+    purge_parser.add_argument('--status', action='append', choices=STATUSES, help='Statut (répétable)')
+    purge_parser.add_argument('--older-than', type=float, metavar='JOURS',
+                              help='Jobs non modifiés depuis N jours')
+    purge_parser.add_argument('--all', action='store_true', help='Tous les jobs')
     
     args = parser.parse_args()
     
+    if not args.trace:
+        run(args)
+        return
+    
+    start_tracing()
+    try:
+        run(args)
+    finally:
+        tracer = stop_tracing()
+        tracer.save(args.trace)
+        spans = sum(1 for event in tracer.events if event['ph'] == 'X')
+        print(f"\n🧭 Trace enregistrée: {args.trace} ({spans} span(s), à ouvrir dans ui.perfetto.dev)")
+
+
+def run(args):
+    """Exécute la commande demandée"""
+    if args.command == 'index':
+        index_mode(args)
+        return
+    
+    if args.command == 'serve':
+        serve_mode(args)
+        return
+    
+    if args.command == 'jobs':
+        jobs_mode(args)
+        return
+    
+    if args.command == 'rank':
+        rank_mode(args)
+        return
+    
+    if args.batch:
+        batch_mode(args)
+        return
+    
     if args.interactive or (not args.cv and not args.job_offer):
         interactive_mode()
         return
@@ -141,7 +612,12 @@ Exemples:
         sys.exit(1)
     
     perplexity_key, gemini_key = load_api_keys()
-    adapter = CVAdapter(perplexity_key, gemini_key)
+    adapter = CVAdapter(perplexity_key, gemini_key, cache=not args.no_cache,
+                        hedging=args.hedge, hedge_after=args.hedge_after,
+                        score_engine=args.score_engine, stream=args.stream, stall_timeout=args.stall_timeout,
+                        fused=args.fused, jobs=not args.no_resume)
+    if args.extract_stats:
+        adapter.extractor.measure_memory = True
     output = args.output or ('CV_Adapte.docx' if args.template else 'CV_Adapte.pdf')
     
     try:
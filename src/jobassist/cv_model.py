@@ -0,0 +1,196 @@
+"""
+Modèle structuré du CV (contact, sections, entrées) et compactage des prompts sous budget de tokens
+"""
+
+import math
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from .scoring import normalize, tokenize
+
+# Budgets (tokens estimés) du CV et de l'offre dans chaque prompt, surchargeables par variables d'environnement
+# (le prompt d'adaptation n'en a pas : le CV et l'offre y sont la source à réécrire, seulement compactés sans perte)
+PROMPT_BUDGETS = {
+    'score_cv': int(os.getenv('JOBASSIST_SCORE_BUDGET', '250')),
+    'score_offer': int(os.getenv('JOBASSIST_SCORE_OFFER_BUDGET', '200')),
+}
+
+SECTION_KEYWORDS = {
+    'summary': ('profil', 'resume', 'summary', 'about', 'a propos', 'objectif', 'objective'),
+    'experience': ('experience', 'parcours', 'employment', 'work history', 'emplois', 'carriere'),
+    'education': ('formation', 'education', 'diplome', 'etudes', 'cursus'),
+    'skills': ('competence', 'skills', 'technologies', 'outils', 'stack', 'savoir-faire', 'expertise'),
+    'languages': ('langue', 'language'),
+    'certifications': ('certification', 'accreditation'),
+    'projects': ('projet', 'project', 'realisation'),
+    'interests': ('centres d', 'interets', 'loisirs', 'interests', 'hobbies', 'activites'),
+}
+
+# Sections jamais réduites ; ordre de suppression des sections accessoires si le budget l'exige
+ESSENTIAL_SECTIONS = ('skills',)
+OPTIONAL_SECTIONS = ('interests',)
+
+TOKEN_PIECE = re.compile(r'\w+|[^\w\s]')
+YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation locale du nombre de tokens (mots découpés par tranches de 4 caractères, ponctuation)"""
+    return sum(math.ceil(len(piece) / 4) for piece in TOKEN_PIECE.findall(text))
+
+
+def compact_text(text: str) -> str:
+    """Supprime les espaces superflus (fin de ligne, répétitions, lignes vides multiples) sans perte"""
+    text = re.sub(r'[ \t ]+', ' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def compact_lossless(text: str) -> str:
+    """compact_text, puis suppression des lignes répétées à la suite (en-têtes et pieds de page d'un PDF extrait)"""
+    lines = compact_text(text).split('\n')
+    return '\n'.join(line for i, line in enumerate(lines) if i == 0 or not line or line != lines[i - 1])
+
+
+def section_kind(line: str) -> Optional[str]:
+    """Type de section si la ligne est un titre de section connu, sinon None"""
+    title = normalize(line).strip(' #*:-_=|\t')
+    if not title or len(title) > 40 or len(title.split()) > 5 or line.rstrip().endswith('.'):
+        return None
+    for kind, keywords in SECTION_KEYWORDS.items():
+        if title.startswith(keywords):
+            return kind
+    return None
+
+
+class CVSection:
+    """Section du CV: titre d'origine et entrées (blocs de lignes)"""
+    
+    def __init__(self, kind: str, title: str, entries: List[str]):
+        self.kind = kind
+        self.title = title
+        self.entries = entries
+    
+    def text(self, entries: Optional[List[str]] = None) -> str:
+        return '\n\n'.join([self.title] + (self.entries if entries is None else entries))
+
+
+class StructuredCV:
+    """CV découpé en coordonnées (lignes avant la première section) et sections"""
+    
+    def __init__(self, contact: List[str], sections: List[CVSection]):
+        self.contact = contact
+        self.sections = sections
+    
+    def section(self, kind: str) -> Optional[CVSection]:
+        return next((s for s in self.sections if s.kind == kind), None)
+    
+    def to_text(self) -> str:
+        parts = ['\n'.join(self.contact)] if self.contact else []
+        return '\n\n'.join(parts + [section.text() for section in self.sections])
+
+
+def _split_entries(kind: str, lines: List[str]) -> List[str]:
+    """Entrées d'une section: blocs séparés par une ligne vide (ou par une date pour les expériences)"""
+    entries, current = [], []
+    for line in lines:
+        starts_entry = (kind in ('experience', 'education', 'projects')
+                        and len(current) >= 2 and YEAR.search(line))
+        if not line or starts_entry:
+            if current:
+                entries.append('\n'.join(current))
+            current = [line] if line else []
+        else:
+            current.append(line)
+    if current:
+        entries.append('\n'.join(current))
+    return entries
+
+
+@lru_cache(maxsize=32)
+def parse_cv(cv_text: str) -> StructuredCV:
+    """Découpe le texte du CV en modèle structuré (mis en cache: un CV n'est analysé qu'une fois)"""
+    contact, sections = [], []
+    kind, title, lines = None, None, []
+    
+    for line in compact_text(cv_text).split('\n'):
+        new_kind = section_kind(line)
+        if new_kind:
+            if kind:
+                sections.append(CVSection(kind, title, _split_entries(kind, lines)))
+            kind, title, lines = new_kind, line, []
+        elif kind:
+            lines.append(line)
+        elif line:
+            contact.append(line)
+    
+    if kind:
+        sections.append(CVSection(kind, title, _split_entries(kind, lines)))
+    return StructuredCV(contact, sections)
+
+
+def _relevance(text: str, offer_terms: set) -> float:
+    """Part des termes d'un bloc présents dans l'offre"""
+    terms = tokenize(text)
+    if not terms:
+        return 0.0
+    return sum(term in offer_terms for term in terms) / math.sqrt(len(terms))
+
+
+def pack_cv(cv_text: str, job_offer: str, budget: int) -> str:
+    """Texte du CV tenant dans budget tokens, en gardant ce qui compte pour l'offre
+
+    Le CV est d'abord compacté (sans perte). S'il dépasse encore le budget, les
+    sections accessoires (centres d'intérêt) sont retirées, puis les entrées les
+    moins liées à l'offre sont réduites à leur première ligne (intitulé, dates). Les
+    coordonnées, les titres de section et les compétences sont toujours conservés.
+    """
+    compact = compact_text(cv_text)
+    total = estimate_tokens(compact)
+    cv = parse_cv(cv_text)
+    if total <= budget or not cv.sections:
+        return compact
+    
+    dropped = set()
+    for kind in OPTIONAL_SECTIONS:
+        for i, section in enumerate(cv.sections):
+            if total > budget and section.kind == kind:
+                total -= estimate_tokens(section.text())
+                dropped.add(i)
+    
+    offer_terms = set(tokenize(job_offer))
+    kept = [list(section.entries) for section in cv.sections]
+    candidates = [
+        (_relevance(entry, offer_terms), i, j)
+        for i, section in enumerate(cv.sections)
+        if section.kind not in ESSENTIAL_SECTIONS and i not in dropped
+        for j, entry in enumerate(section.entries) if '\n' in entry
+    ]
+    for _, i, j in sorted(candidates):
+        if total <= budget:
+            break
+        entry = kept[i][j]
+        headline = entry.split('\n', 1)[0]
+        total -= estimate_tokens(entry) - estimate_tokens(headline)
+        kept[i][j] = headline
+    
+    parts = ['\n'.join(cv.contact)] if cv.contact else []
+    parts += [section.text(kept[i]) for i, section in enumerate(cv.sections) if i not in dropped]
+    return '\n\n'.join(parts)
+
+
+def pack_text(text: str, budget: int) -> str:
+    """Premières lignes d'un texte compacté tenant dans budget tokens"""
+    kept, total = [], 0
+    for line in compact_text(text).split('\n'):
+        tokens = estimate_tokens(line)
+        if total + tokens > budget:
+            if not kept:
+                # Ligne unique trop longue: coupe approximative (4 caractères par token)
+                kept.append(line[:budget * 4])
+            break
+        kept.append(line)
+        total += tokens
+    return '\n'.join(kept)
@@ -0,0 +1,150 @@
+"""
+Extraction du texte des PDF : pages en parallèle (pool de processus), cache disque, mesures
+"""
+
+import hashlib
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .cache import DEFAULT_CACHE_DIR, ResponseCache
+from .lazy import LazyModule
+
+pypdf = LazyModule('pypdf')
+
+# En dessous de ce nombre de pages, le démarrage d'un pool coûte plus qu'il ne rapporte
+PARALLEL_MIN_PAGES = 40
+PAGES_PER_TASK = 20
+
+
+def file_key(path: str) -> str:
+    """Clé de cache d'un fichier: hash du contenu et date de modification"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return f"pdf:{digest.hexdigest()}:{os.stat(path).st_mtime_ns}"
+
+
+def extract_pages(path: str, start: int = 0, stop: Optional[int] = None,
+                  measure_memory: bool = False) -> Tuple[List[str], List[float], List[int]]:
+    """Texte des pages [start, stop) d'un PDF, durée et pic mémoire (octets, si mesuré) par page
+
+    Fonction de module : exécutable dans un processus du pool.
+    """
+    if not pypdf:
+        raise ImportError("pypdf not installed. Run: pip install -r requirements.txt")
+    return read_pages(pypdf.PdfReader(path), start, stop, measure_memory)
+
+
+def read_pages(reader: "pypdf.PdfReader", start: int = 0, stop: Optional[int] = None,
+               measure_memory: bool = False) -> Tuple[List[str], List[float], List[int]]:
+    """Comme extract_pages, sur un PDF déjà ouvert (pas de seconde analyse du fichier)"""
+    if measure_memory:
+        tracemalloc.start()
+    try:
+        pages = reader.pages[start:stop]
+        texts, seconds, peaks = [], [], []
+        for page in pages:
+            if measure_memory:
+                tracemalloc.reset_peak()
+            page_start = time.perf_counter()
+            texts.append(page.extract_text() or '')
+            seconds.append(time.perf_counter() - page_start)
+            if measure_memory:
+                peaks.append(tracemalloc.get_traced_memory()[1])
+        return texts, seconds, peaks
+    finally:
+        if measure_memory:
+            tracemalloc.stop()
+
+
+class PdfExtractor:
+    """Extrait le texte des PDF une seule fois
+
+    Les pages sont collectées dans une liste puis jointes (pas de concaténation
+    quadratique). Un PDF seul d'au moins parallel_min_pages pages est découpé en
+    tranches de pages_per_task pages réparties sur un pool de processus ; plusieurs PDF
+    à la fois (extract_many) y sont répartis à raison d'un PDF par tâche. Chaque PDF
+    n'est analysé qu'une fois : le nombre de pages n'est lu que pour un PDF seul, et le
+    même lecteur sert alors à l'extraction séquentielle. Le texte est mis en cache sur
+    disque, indexé par le hash du fichier et sa date de modification.
+    """
+    
+    def __init__(self,
+                 cache: bool = True,
+                 max_workers: Optional[int] = None,
+                 parallel_min_pages: int = PARALLEL_MIN_PAGES,
+                 pages_per_task: int = PAGES_PER_TASK,
+                 measure_memory: bool = False):
+        if not pypdf:
+            raise ImportError("pypdf not installed. Run: pip install -r requirements.txt")
+        self.cache = ResponseCache(DEFAULT_CACHE_DIR / 'extractions.sqlite') if cache else None
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_task = pages_per_task
+        self.measure_memory = measure_memory
+    
+    def _ranges(self, page_count: int) -> List[Tuple[int, int]]:
+        """Tranches de pages d'un PDF"""
+        return [(start, min(start + self.pages_per_task, page_count))
+                for start in range(0, page_count, self.pages_per_task)] or [(0, 0)]
+    
+    def extract_many(self, paths: Sequence[str]) -> List[Tuple[str, dict]]:
+        """Texte et mesures de chaque PDF: (texte, {'pages', 'seconds', 'cached', 'workers', ...})"""
+        start = time.perf_counter()
+        keys = [file_key(path) if self.cache else None for path in paths]
+        results: Dict[int, Tuple[str, dict]] = {}
+        
+        for i, key in enumerate(keys):
+            text = self.cache.get(key) if key else None
+            if text is not None:
+                results[i] = (text, {'pages': None, 'seconds': time.perf_counter() - start, 'cached': True,
+                                     'workers': 0, 'page_seconds': [], 'page_peak_memory': []})
+        
+        pending = [i for i in range(len(paths)) if i not in results]
+        tasks: Dict[int, List[Tuple[int, Optional[int]]]] = {}
+        chunks: Dict[int, list] = {}
+        if self.max_workers > 1 and len(pending) > 1:
+            tasks = {i: [(0, None)] for i in pending}
+        elif self.max_workers > 1 and pending:
+            # PDF seul : le lecteur ouvert pour compter les pages sert aussi à l'extraction séquentielle
+            i = pending[0]
+            reader = pypdf.PdfReader(paths[i])
+            page_count = len(reader.pages)
+            if page_count >= self.parallel_min_pages and page_count > self.pages_per_task:
+                tasks = {i: self._ranges(page_count)}
+            else:
+                chunks[i] = [read_pages(reader, 0, None, self.measure_memory)]
+        workers = min(self.max_workers, sum(len(ranges) for ranges in tasks.values())) if tasks else 1
+        
+        if tasks:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {i: [executor.submit(extract_pages, paths[i], first, last, self.measure_memory)
+                               for first, last in tasks[i]]
+                           for i in tasks}
+                chunks = {i: [future.result() for future in futures[i]] for i in tasks}
+        for i in pending:
+            if i not in chunks:
+                chunks[i] = [extract_pages(paths[i], 0, None, self.measure_memory)]
+        
+        for i in pending:
+            texts, seconds, peaks = [], [], []
+            for chunk_texts, chunk_seconds, chunk_peaks in chunks[i]:
+                texts.extend(chunk_texts)
+                seconds.extend(chunk_seconds)
+                peaks.extend(chunk_peaks)
+            text = ''.join(page + '\n' for page in texts)
+            if keys[i]:
+                self.cache.set(keys[i], text)
+            results[i] = (text, {'pages': len(texts), 'seconds': time.perf_counter() - start, 'cached': False,
+                                 'workers': workers, 'page_seconds': seconds, 'page_peak_memory': peaks})
+        
+        return [results[i] for i in range(len(paths))]
+    
+    def extract(self, path: str) -> Tuple[str, dict]:
+        """Texte d'un PDF et mesures de l'extraction"""
+        return self.extract_many([str(Path(path))])[0]
@@ -0,0 +1,123 @@
+"""
+Vérification paresseuse et mise en cache de l'état des APIs (clés, quota, disponibilité)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from .cache import DEFAULT_CACHE_DIR
+
+# Durée de validité d'une vérification (secondes)
+DEFAULT_HEALTH_TTL = int(os.getenv('JOBASSIST_HEALTH_TTL', '300'))
+
+OK = 'ok'
+INVALID_KEY = 'invalid_key'
+QUOTA = 'quota'
+OVERLOADED = 'overloaded'
+UNREACHABLE = 'unreachable'
+
+
+class InvalidAPIKeyError(Exception):
+    """Clé API refusée par le fournisseur"""
+
+
+def classify_response(status_code: int, text: str) -> str:
+    """Traduit la réponse d'une sonde en état du fournisseur"""
+    if status_code == 200:
+        return OK
+    if status_code in (401, 403) or 'API_KEY_INVALID' in text or 'INVALID_ARGUMENT' in text:
+        return INVALID_KEY
+    if status_code == 429:
+        return QUOTA
+    if status_code == 503:
+        return OVERLOADED
+    return f'status_{status_code}'
+
+
+class HealthChecker:
+    """Sonde les deux fournisseurs en parallèle et persiste le résultat avec un TTL
+
+    Le fichier d'état est partagé entre exécutions : des lancements rapprochés de la
+    CLI réutilisent la dernière vérification au lieu de refaire les requêtes.
+    Les clés ne sont jamais écrites, seulement un hash.
+    """
+    
+    def __init__(self, clients: Dict[str, object], ttl: int = DEFAULT_HEALTH_TTL, path: Optional[str] = None):
+        self.clients = clients
+        self.ttl = ttl
+        self.path = path or str(DEFAULT_CACHE_DIR / 'health.json')
+        self._lock = threading.Lock()
+    
+    def _entry_key(self, provider: str) -> str:
+        api_key = getattr(self.clients[provider], 'api_key', '')
+        return hashlib.sha256(f'{provider}:{api_key}'.encode('utf-8')).hexdigest()[:32]
+    
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save(self, entries: dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+    
+    def _probe(self, provider: str) -> str:
+        try:
+            response = self.clients[provider].probe(timeout=10)
+            return classify_response(response.status_code, response.text)
+        except Exception:
+            return UNREACHABLE
+    
+    def cached(self) -> Dict[str, str]:
+        """États encore valides dans le fichier d'état"""
+        entries = self._load()
+        now = time.time()
+        result = {}
+        for provider in self.clients:
+            entry = entries.get(self._entry_key(provider))
+            if entry and now - entry['checked_at'] < self.ttl:
+                result[provider] = entry['status']
+        return result
+    
+    def check(self, force: bool = False) -> Dict[str, str]:
+        """État de chaque fournisseur ; ne sonde que ceux sans résultat valide en cache"""
+        with self._lock:
+            statuses = {} if force else self.cached()
+            missing = [p for p in self.clients if p not in statuses]
+            if not missing:
+                return statuses
+            
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                probed = dict(zip(missing, executor.map(self._probe, missing)))
+            statuses.update(probed)
+            
+            entries = self._load()
+            now = time.time()
+            for provider, status in probed.items():
+                entries[self._entry_key(provider)] = {'status': status, 'checked_at': now}
+            try:
+                self._save(entries)
+            except OSError:
+                pass
+            return statuses
+    
+    def invalidate(self, provider: Optional[str] = None):
+        """Oublie l'état persisté d'un fournisseur (ou de tous)"""
+        with self._lock:
+            entries = self._load()
+            for name in ([provider] if provider else list(self.clients)):
+                entries.pop(self._entry_key(name), None)
+            try:
+                self._save(entries)
+            except OSError:
+                pass
@@ -0,0 +1,118 @@
+"""
+Requêtes couvertes (hedging) entre fournisseurs pour réduire la latence de queue
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Optional, Set, Tuple
+
+from .router import ProviderRouter
+
+# Délai avant relance tant que les latences du fournisseur ne sont pas mesurées (secondes)
+DEFAULT_HEDGE_AFTER = float(os.getenv('JOBASSIST_HEDGE_AFTER', '20'))
+
+
+class Hedger:
+    """Relance la même requête sur le second fournisseur si le premier tarde
+
+    Le délai avant relance est le percentile `percentile` des latences récentes du
+    fournisseur principal pour l'étape (au moins min_delay secondes) ; sans
+    min_samples mesures (processus qui démarre, CLI sur une seule offre), c'est
+    initial_delay (None : pas de relance). La première réponse valide l'emporte,
+    l'autre est ignorée. Le nombre de relances est plafonné à max_ratio x requêtes,
+    une au moins (max_ratio <= 1 : le volume ne fait jamais plus que doubler).
+    """
+    
+    def __init__(self,
+                 router: ProviderRouter,
+                 percentile: float = 95,
+                 min_delay: float = 0.5,
+                 min_samples: int = 5,
+                 max_ratio: float = 0.2,
+                 initial_delay: Optional[float] = DEFAULT_HEDGE_AFTER):
+        self.router = router
+        self.initial_delay = initial_delay
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_ratio = min(1.0, max(0.0, max_ratio))
+        self.requests = 0
+        self.hedges = 0
+        self.wins = {}
+        self._lock = threading.Lock()
+    
+    def delay(self, provider: str, stage: str) -> Optional[float]:
+        """Délai avant relance (initial_delay tant que les mesures sont insuffisantes), None : pas de relance"""
+        snapshot = self.router.snapshot()['stages'].get(f'{provider}:{stage}')
+        if not snapshot or snapshot['samples'] < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, self.router.percentile(provider, stage, self.percentile))
+    
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > max(1.0, self.max_ratio * self.requests):
+                return False
+            self.hedges += 1
+            return True
+    
+    def _release_budget(self):
+        with self._lock:
+            self.hedges -= 1
+    
+    def _win(self, provider: str):
+        with self._lock:
+            self.wins[provider] = self.wins.get(provider, 0) + 1
+    
+    def run(self,
+            stage: str,
+            primary: str,
+            secondary: str,
+            attempt: Callable[[str], Optional[object]]) -> Tuple[Optional[str], Optional[object], Set[str]]:
+        """Exécute attempt(primary), couvert par attempt(secondary) après le délai
+
+        attempt retourne None en cas d'échec et enregistre le résultat auprès du routeur
+        (record_success / record_failure). Le principal doit déjà être réservé
+        (router.acquire) ; le second l'est ici avant sa relance, qui est abandonnée si
+        son circuit la refuse. Retourne (fournisseur gagnant, résultat, fournisseurs
+        sollicités) ; (None, None, ...) si aucun n'a abouti.
+        """
+        with self._lock:
+            self.requests += 1
+        
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = {executor.submit(attempt, primary): primary}
+            delay = self.delay(primary, stage)
+            done, _ = wait(futures, timeout=delay)
+            
+            # La relance passe par le circuit du second fournisseur (ouvert : pas de relance,
+            # semi-ouvert : elle devient la requête de test)
+            if not done and self._take_budget():
+                if self.router.acquire(secondary):
+                    futures[executor.submit(attempt, secondary)] = secondary
+                else:
+                    self._release_budget()
+            
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is not None:
+                        self._win(futures[future])
+                        return futures[future], result, set(futures.values())
+            return None, None, set(futures.values())
+        finally:
+            # La requête perdante continue en arrière-plan, son résultat est ignoré
+            executor.shutdown(wait=False)
+    
+    def stats(self) -> dict:
+        """Taux de relance et victoires par fournisseur"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedges': self.hedges,
+                'hedge_rate': self.hedges / self.requests if self.requests else 0.0,
+                'wins': dict(self.wins)
+            }
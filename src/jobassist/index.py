@@ -0,0 +1,224 @@
+"""
+Index inversé persistant des offres d'emploi (SQLite, BM25) pour présélectionner les offres d'un CV
+"""
+
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .cache import DEFAULT_CACHE_DIR
+from .lazy import LazyModule
+from .scoring import tokenize
+from .utils import clean_markdown
+
+np = LazyModule('numpy')
+
+DEFAULT_INDEX_PATH = DEFAULT_CACHE_DIR / 'offers.sqlite'
+
+# Nombre d'offres accumulées en mémoire avant fusion dans les listes de postings
+FLUSH_EVERY = 1000
+
+
+def analyze(text: str) -> Counter:
+    """Fréquence des termes d'un texte (nettoyage Markdown puis tokenisation du score local)"""
+    return Counter(tokenize(clean_markdown(text)))
+
+
+class OfferIndex:
+    """Index inversé des offres, mis à jour de façon incrémentale
+
+    Chaque terme a une liste de postings (identifiants internes et fréquences, en
+    tableaux int32 compacts) : une requête ne lit qu'une ligne par terme du CV. Une
+    offre dont le texte n'a pas changé (même hash) n'est pas réindexée. Le texte des
+    offres est conservé pour pouvoir relancer un batch sur les meilleurs résultats.
+    """
+    
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        if not np:
+            raise ImportError("numpy not installed. Run: pip install -r requirements.txt")
+        self.path = Path(path) if path else DEFAULT_INDEX_PATH
+        self.k1 = k1
+        self.b = b
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Connexion SQLite propre au thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS offers (
+            doc INTEGER PRIMARY KEY,
+            offer_id TEXT UNIQUE NOT NULL,
+            digest TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            terms TEXT NOT NULL,
+            text TEXT NOT NULL,
+            indexed_at REAL NOT NULL
+        )''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS postings (
+            term TEXT PRIMARY KEY,
+            docs BLOB NOT NULL,
+            tfs BLOB NOT NULL
+        ) WITHOUT ROWID''')
+    
+    def _merge(self, conn: sqlite3.Connection, removed: Dict[int, List[str]], added: Dict[str, List[Tuple[int, int]]]):
+        """Fusionne les offres retirées et ajoutées dans les listes de postings"""
+        removed_docs = np.fromiter(removed, dtype=np.int32, count=len(removed))
+        affected = set(added)
+        for terms in removed.values():
+            affected.update(terms)
+        
+        for term in affected:
+            row = conn.execute('SELECT docs, tfs FROM postings WHERE term = ?', (term,)).fetchone()
+            if row:
+                docs = np.frombuffer(row[0], dtype=np.int32)
+                tfs = np.frombuffer(row[1], dtype=np.int32)
+                if removed_docs.size:
+                    keep = ~np.isin(docs, removed_docs)
+                    docs, tfs = docs[keep], tfs[keep]
+            else:
+                docs = tfs = np.zeros(0, dtype=np.int32)
+            
+            if term in added:
+                new_docs, new_tfs = zip(*added[term])
+                docs = np.concatenate([docs, np.array(new_docs, dtype=np.int32)])
+                tfs = np.concatenate([tfs, np.array(new_tfs, dtype=np.int32)])
+            
+            if docs.size:
+                conn.execute('INSERT OR REPLACE INTO postings (term, docs, tfs) VALUES (?, ?, ?)',
+                             (term, docs.tobytes(), tfs.tobytes()))
+            else:
+                conn.execute('DELETE FROM postings WHERE term = ?', (term,))
+    
+    def update(self, offers: Iterable[Tuple[str, str]], prune: bool = False) -> dict:
+        """Ajoute ou met à jour les offres (identifiant, texte) ; prune retire les offres absentes
+
+        Retourne le nombre d'offres ajoutées, mises à jour, inchangées et retirées.
+        """
+        conn = self._connect()
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        seen = set()
+        removed: Dict[int, List[str]] = {}
+        added: Dict[str, List[Tuple[int, int]]] = {}
+        pending = set()
+        
+        def flush():
+            self._merge(conn, removed, added)
+            conn.execute('COMMIT')
+            conn.execute('BEGIN')
+            removed.clear()
+            added.clear()
+            pending.clear()
+        
+        conn.execute('BEGIN')
+        try:
+            for offer_id, text in offers:
+                seen.add(offer_id)
+                digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                row = conn.execute('SELECT doc, digest, terms FROM offers WHERE offer_id = ?', (offer_id,)).fetchone()
+                if row and row[1] == digest:
+                    counts['unchanged'] += 1
+                    continue
+                if row and row[0] in pending:
+                    flush()
+                
+                tf = analyze(text)
+                values = (digest, sum(tf.values()), ' '.join(tf), text, time.time())
+                if row:
+                    doc = row[0]
+                    removed[doc] = row[2].split()
+                    conn.execute('UPDATE offers SET digest = ?, length = ?, terms = ?, text = ?, indexed_at = ? '
+                                 'WHERE doc = ?', values + (doc,))
+                    counts['updated'] += 1
+                else:
+                    doc = conn.execute('INSERT INTO offers (offer_id, digest, length, terms, text, indexed_at) '
+                                       'VALUES (?, ?, ?, ?, ?, ?)', (offer_id,) + values).lastrowid
+                    counts['added'] += 1
+                
+                for term, count in tf.items():
+                    added.setdefault(term, []).append((doc, count))
+                pending.add(doc)
+                if len(pending) >= FLUSH_EVERY:
+                    flush()
+            
+            if prune:
+                for doc, offer_id, terms in conn.execute('SELECT doc, offer_id, terms FROM offers').fetchall():
+                    if offer_id not in seen:
+                        removed[doc] = terms.split()
+                        conn.execute('DELETE FROM offers WHERE doc = ?', (doc,))
+                        counts['removed'] += 1
+            
+            self._merge(conn, removed, added)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return counts
+    
+    def query(self, text: str, k: int = 10) -> List[dict]:
+        """Les k offres les plus pertinentes pour un texte (BM25), avec leur score"""
+        conn = self._connect()
+        query_tf = analyze(text)
+        rows = conn.execute('SELECT doc, length FROM offers').fetchall()
+        if not rows or not query_tf:
+            return []
+        
+        doc_ids, doc_lengths = (np.array(column) for column in zip(*rows))
+        lengths = np.zeros(doc_ids.max() + 1)
+        lengths[doc_ids] = doc_lengths
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(1.0, doc_lengths.mean()))
+        scores = np.zeros(lengths.size)
+        total = len(rows)
+        
+        terms = list(query_tf)
+        for start in range(0, len(terms), 500):
+            chunk = terms[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for term, docs_blob, tfs_blob in conn.execute(
+                    f'SELECT term, docs, tfs FROM postings WHERE term IN ({placeholders})', chunk):
+                docs = np.frombuffer(docs_blob, dtype=np.int32)
+                tfs = np.frombuffer(tfs_blob, dtype=np.int32).astype(np.float64)
+                idf = math.log(1 + (total - docs.size + 0.5) / (docs.size + 0.5))
+                weight = idf * (1 + math.log(query_tf[term]))
+                scores[docs] += weight * tfs * (self.k1 + 1) / (tfs + norm[docs])
+        
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        placeholders = ','.join('?' * len(top))
+        names = dict(conn.execute(f'SELECT doc, offer_id FROM offers WHERE doc IN ({placeholders})',
+                                  [int(doc) for doc in top]).fetchall())
+        return [{'id': names[int(doc)], 'score': round(float(scores[doc]), 3)} for doc in top]
+    
+    def iter_offers(self, offer_ids: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """Offres (identifiant, texte) indexées, dans l'ordre demandé"""
+        conn = self._connect()
+        for offer_id in offer_ids:
+            row = conn.execute('SELECT text FROM offers WHERE offer_id = ?', (offer_id,)).fetchone()
+            if row:
+                yield offer_id, row[0]
+    
+    def stats(self) -> dict:
+        """Nombre d'offres, de termes et taille du fichier d'index"""
+        conn = self._connect()
+        offers = conn.execute('SELECT COUNT(*) FROM offers').fetchone()[0]
+        terms = conn.execute('SELECT COUNT(*) FROM postings').fetchone()[0]
+        size = self.path.stat().st_size if self.path.exists() else 0
+        return {'offers': offers, 'terms': terms, 'size': size, 'path': str(self.path)}
@@ -0,0 +1,184 @@
+"""
+Journal persistant des jobs (SQLite) : sortie de chaque étape enregistrée pour reprendre
+une adaptation interrompue sans refaire les appels réseau déjà payés
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from .cache import DEFAULT_CACHE_DIR
+
+# Étapes d'un job, dans l'ordre ; la colonne stage contient la dernière terminée
+STAGES = ('analysis', 'adaptation', 'score', 'output')
+STAGE_LABELS = {
+    None: 'aucune étape',
+    'analysis': 'analyse',
+    'adaptation': 'adaptation',
+    'score': 'score',
+    'output': 'écriture',
+}
+
+# Statuts calculés (list/retry/purge)
+DONE = 'done'
+FAILED = 'failed'
+INCOMPLETE = 'incomplete'
+STATUSES = (DONE, FAILED, INCOMPLETE)
+
+INPUT_COLUMNS = ('cv_path', 'label', 'job_offer', 'instructions', 'template_path', 'output_path')
+STAGE_COLUMNS = ('analysis', 'adapted_cv', 'score', 'score_engine', 'output_file')
+
+
+def file_hash(path: str) -> str:
+    """Empreinte du contenu d'un fichier (CV)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def job_key(cv_hash: str, job_offer: str, instructions: Optional[str] = None, mode: str = '') -> str:
+    """Identifiant d'un job : hash du CV, de l'offre, des instructions et du mode de génération
+
+    mode décrit ce qui change la sortie des modèles (modèles utilisés, requête fusionnée,
+    streaming ; voir CVAdapter.job_mode). Le template et le fichier de sortie n'en font
+    pas partie : ils n'influent pas sur les appels réseau, un même job peut donc être
+    réécrit ailleurs sans les refaire.
+    """
+    material = '\0'.join((cv_hash, job_offer, instructions or '', mode))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class JobStore:
+    """Jobs d'adaptation et sortie de leurs étapes (analyse, CV adapté, score, fichier produit)
+
+    Partageable entre processus et threads (une connexion SQLite par thread, WAL).
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else DEFAULT_CACHE_DIR / 'jobs.sqlite'
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Connexion SQLite propre au thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def _init_db(self):
+        self._connect().execute('''CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            cv_path TEXT NOT NULL,
+            label TEXT,
+            job_offer TEXT NOT NULL,
+            instructions TEXT,
+            template_path TEXT,
+            output_path TEXT,
+            stage TEXT,
+            analysis TEXT,
+            adapted_cv TEXT,
+            score INTEGER,
+            score_engine TEXT,
+            output_file TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )''')
+    
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['status'] = DONE if job['stage'] == 'output' else FAILED if job['error'] else INCOMPLETE
+        return job
+    
+    def start(self, job_id: str, cv_path: str, job_offer: str, label: Optional[str] = None,
+              instructions: Optional[str] = None, template_path: Optional[str] = None,
+              output_path: Optional[str] = None) -> dict:
+        """Crée le job ou reprend celui qui existe (entrées mises à jour, tentative comptée)
+
+        Seul un job inachevé est repris après sa dernière étape ; un job terminé repart
+        de zéro (nouvelle tentative : relancer une adaptation réussie en produit une autre).
+        """
+        now = time.time()
+        values = {'cv_path': cv_path, 'label': label, 'job_offer': job_offer, 'instructions': instructions,
+                  'template_path': template_path, 'output_path': output_path}
+        self._connect().execute(
+            f'''INSERT INTO jobs (id, {', '.join(INPUT_COLUMNS)}, attempts, created_at, updated_at)
+                VALUES (?, {', '.join('?' * len(INPUT_COLUMNS))}, 1, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in INPUT_COLUMNS)},
+                {', '.join(f"{column} = CASE WHEN stage = 'output' THEN NULL ELSE {column} END"
+                           for column in ('stage',) + STAGE_COLUMNS)},
+                error = NULL, attempts = attempts + 1, updated_at = excluded.updated_at''',
+            (job_id, *(values[column] for column in INPUT_COLUMNS), now, now)
+        )
+        return self.get(job_id)
+    
+    def record(self, job_id: str, stage: str, **values):
+        """Enregistre la sortie d'une étape terminée"""
+        unknown = set(values) - set(STAGE_COLUMNS)
+        if stage not in STAGES or unknown:
+            raise ValueError(f"Étape ou colonnes inconnues: {stage} {sorted(unknown)}")
+        assignments = ''.join(f', {column} = ?' for column in values)
+        self._connect().execute(
+            f'UPDATE jobs SET stage = ?, error = NULL, updated_at = ?{assignments} WHERE id = ?',
+            (stage, time.time(), *values.values(), job_id)
+        )
+    
+    def fail(self, job_id: str, error: Exception):
+        """Note l'échec d'une tentative (les étapes déjà terminées restent acquises)"""
+        self._connect().execute('UPDATE jobs SET error = ?, updated_at = ? WHERE id = ?',
+                                (f"{type(error).__name__}: {str(error)[:500]}", time.time(), job_id))
+    
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._row(self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone())
+    
+    def find(self, prefix: str) -> List[dict]:
+        """Jobs dont l'identifiant commence par prefix (identifiants abrégés de la CLI)"""
+        rows = self._connect().execute('SELECT * FROM jobs WHERE id LIKE ? ORDER BY updated_at DESC',
+                                       (prefix.replace('%', '').replace('_', '') + '%',))
+        return [self._row(row) for row in rows]
+    
+    def list(self, statuses: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[dict]:
+        """Jobs du plus récent au plus ancien, éventuellement filtrés par statut"""
+        statuses = set(statuses or STATUSES)
+        jobs = []
+        for row in self._connect().execute('SELECT * FROM jobs ORDER BY updated_at DESC'):
+            job = self._row(row)
+            if job['status'] in statuses:
+                jobs.append(job)
+                if limit and len(jobs) >= limit:
+                    break
+        return jobs
+    
+    def purge(self, job_ids: Optional[Iterable[str]] = None, statuses: Optional[Iterable[str]] = None,
+              older_than: Optional[float] = None) -> int:
+        """Supprime des jobs (identifiants, statuts, dernière mise à jour plus vieille que
+        older_than secondes ; critères cumulés) ; retourne le nombre supprimé"""
+        job_ids = set(job_ids) if job_ids is not None else None
+        cutoff = time.time() - older_than if older_than is not None else None
+        victims = [(job['id'],) for job in self.list(statuses)
+                   if (job_ids is None or job['id'] in job_ids)
+                   and (cutoff is None or job['updated_at'] < cutoff)]
+        self._connect().executemany('DELETE FROM jobs WHERE id = ?', victims)
+        return len(victims)
+    
+    def stats(self) -> dict:
+        counts = {status: 0 for status in STATUSES}
+        for job in self.list():
+            counts[job['status']] += 1
+        return {'path': str(self.path), 'jobs': sum(counts.values()), **counts}
@@ -0,0 +1,37 @@
+"""
+Imports différés des dépendances lourdes : chargées au premier usage, pas à l'import de jobassist
+"""
+
+import importlib
+
+
+class LazyModule:
+    """Module importé au premier accès à l'un de ses attributs
+
+    Remplace le couple try/import/except ImportError des dépendances optionnelles :
+    `if not module` importe le module et vaut True s'il est installé, False sinon.
+    Le premier accès à un attribut d'un module absent lève l'ImportError d'origine.
+    """
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+    
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+    
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+    
+    def __bool__(self) -> bool:
+        try:
+            self._load()
+        except ImportError:
+            return False
+        return True
+    
+    def __repr__(self) -> str:
+        state = 'chargé' if self._module is not None else 'différé'
+        return f"<LazyModule {self._name} ({state})>"
@@ -2,34 +2,28 @@
 Génération de PDF avec ReportLab
 """
 
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-    ReportLab = True
-except ImportError:
-    ReportLab = None
+import io
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 
-from .utils import clean_markdown
+from .lazy import LazyModule
+from .utils import MarkdownCleaner, clean_markdown
 
+# ReportLab (platypus surtout) est long à importer : chargé au premier rendu
+pagesizes = LazyModule('reportlab.lib.pagesizes')
+lib_styles = LazyModule('reportlab.lib.styles')
+units = LazyModule('reportlab.lib.units')
+platypus = LazyModule('reportlab.platypus')
 
-def generate_pdf(text: str, output_path: str):
-    """Génère un PDF à partir du texte nettoyé"""
-    if not ReportLab:
-        raise ImportError("reportlab not installed. Run: pip install -r requirements.txt")
-    
-    # Nettoyer le texte
-    clean_text = clean_markdown(text)
-    
-    # Créer le document PDF
-    doc = SimpleDocTemplate(output_path, pagesize=A4,
-                           rightMargin=2*cm, leftMargin=2*cm,
-                           topMargin=2*cm, bottomMargin=2*cm)
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    normal_style = ParagraphStyle(
+
+@lru_cache(maxsize=None)
+def _styles():
+    """Styles du CV (texte courant, titres de section), construits une fois par processus"""
+    styles = lib_styles.getSampleStyleSheet()
+    normal_style = lib_styles.ParagraphStyle(
         'CustomNormal',
         parent=styles['Normal'],
         fontSize=11,
@@ -38,7 +32,7 @@ def generate_pdf(text: str, output_path: str):
         fontName='Helvetica'
     )
     
-    title_style = ParagraphStyle(
+    title_style = lib_styles.ParagraphStyle(
         'CustomTitle',
         parent=styles['Heading1'],
         fontSize=14,
@@ -47,18 +41,26 @@ def generate_pdf(text: str, output_path: str):
         spaceBefore=12,
         fontName='Helvetica-Bold'
     )
-    
-    # Construire le contenu
-    story = []
-    lines = clean_text.split('\n')
-    
+    return normal_style, title_style
+
+
+def _document(output_path: str):
+    cm = units.cm
+    return platypus.SimpleDocTemplate(output_path, pagesize=pagesizes.A4,
+                                      rightMargin=2*cm, leftMargin=2*cm,
+                                      topMargin=2*cm, bottomMargin=2*cm)
+
+
+def _append_lines(story: list, lines: list, normal_style, title_style, stop: int = None):
+    """Ajoute au document les paragraphes d'un texte nettoyé, ligne par ligne (jusqu'à stop)"""
+    stop = len(lines) if stop is None else stop
     i = 0
-    while i < len(lines):
+    while i < stop:
         line = lines[i].strip()
         
         # Ligne vide
         if not line:
-            story.append(Spacer(1, 6))
+            story.append(platypus.Spacer(1, 6))
             i += 1
             continue
         
@@ -75,11 +77,127 @@ def generate_pdf(text: str, output_path: str):
         line_escaped = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
         
         if is_title:
-            story.append(Paragraph(line_escaped, title_style))
+            story.append(platypus.Paragraph(line_escaped, title_style))
         else:
-            story.append(Paragraph(line_escaped, normal_style))
+            story.append(platypus.Paragraph(line_escaped, normal_style))
         
         i += 1
+
+
+def generate_pdf(text: str, output_path: str):
+    """Génère un PDF à partir du texte nettoyé"""
+    PdfRenderer(max_workers=1).render(text, output_path)
+
+
+# Moteur de chaque processus du pool (styles construits une fois par processus)
+_process_renderer = None
+
+
+def _render_in_process(text: str, output_path: Optional[str]) -> Optional[bytes]:
+    """Rendu exécuté dans un processus du pool"""
+    global _process_renderer
+    if _process_renderer is None:
+        _process_renderer = PdfRenderer(max_workers=1)
+    return _process_renderer.render(text, output_path)
+
+
+class PdfRenderer:
+    """Moteur de rendu PDF réutilisable
+
+    Les styles sont construits une seule fois. render() écrit le PDF dans un fichier
+    ou le retourne en mémoire (bytes, pour un serveur). submit() et render_many()
+    répartissent la mise en page ReportLab, liée au GIL, sur un pool de processus
+    créé au premier rendu ; avec max_workers=1, le rendu reste dans le processus.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        if not platypus:
+            raise ImportError("reportlab not installed. Run: pip install -r requirements.txt")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.normal_style, self.title_style = _styles()
+        self._pool = None
+        self._lock = threading.Lock()
+    
+    def story(self, text: str) -> list:
+        """Paragraphes ReportLab du texte nettoyé"""
+        story = []
+        _append_lines(story, clean_markdown(text).split('\n'), self.normal_style, self.title_style)
+        return story
+    
+    def render(self, text: str, output_path: Optional[str] = None) -> Optional[bytes]:
+        """Rend le PDF dans output_path, ou retourne son contenu si output_path est None"""
+        target = io.BytesIO() if output_path is None else output_path
+        _document(target).build(self.story(text))
+        return target.getvalue() if output_path is None else None
+    
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+    
+    def submit(self, text: str, output_path: Optional[str] = None) -> Future:
+        """Rendu sur le pool de processus ; le Future donne les bytes (ou None si fichier)"""
+        if self.max_workers <= 1:
+            future = Future()
+            try:
+                future.set_result(self.render(text, output_path))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor().submit(_render_in_process, text, output_path)
+    
+    def render_many(self, jobs: Iterable[Tuple[str, Optional[str]]]) -> List[Optional[bytes]]:
+        """Rend plusieurs PDF (texte, chemin ou None) en parallèle ; résultats dans l'ordre"""
+        futures = [self.submit(text, output_path) for text, output_path in jobs]
+        return [future.result() for future in futures]
+    
+    def close(self):
+        """Arrête le pool de processus"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PdfStreamWriter:
+    """Construit le PDF pendant la génération du CV
+
+    Le texte reçu est nettoyé au fil de l'eau (MarkdownCleaner) et chaque ligne
+    définitive est convertie en paragraphe ReportLab dès que la suivante est connue
+    (détection des titres) ; close() ne fait plus que la mise en page et l'écriture
+    du fichier. Le PDF est identique à celui de generate_pdf sur le texte complet.
+    """
+    
+    def __init__(self, output_path: str):
+        if not platypus:
+            raise ImportError("reportlab not installed. Run: pip install -r requirements.txt")
+        self.output_path = output_path
+        self.normal_style, self.title_style = _styles()
+        self.story = []
+        self._cleaner = MarkdownCleaner()
+        self._pending = ''
+    
+    def _append(self, clean_text: str, last: bool = False):
+        lines = (self._pending + clean_text).split('\n')
+        # La dernière ligne attend la suivante, sauf en fin de texte
+        self._pending = '' if last else lines[-1]
+        _append_lines(self.story, lines, self.normal_style, self.title_style,
+                      stop=len(lines) if last else len(lines) - 1)
+    
+    def write(self, chunk: str):
+        """Ajoute un fragment de texte généré"""
+        clean_text = self._cleaner.feed(chunk)
+        if clean_text:
+            self._append(clean_text)
     
-    # Générer le PDF
-    doc.build(story)
+    def close(self):
+        """Termine le texte et écrit le PDF"""
+        self._append(self._cleaner.close(), last=True)
+        _document(self.output_path).build(self.story)
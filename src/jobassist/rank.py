@@ -0,0 +1,138 @@
+"""
+Classement de nombreux CV face à de nombreuses offres : matrice de similarité TF-IDF calculée avec NumPy
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .index import analyze
+from .lazy import LazyModule
+from .scoring import CALIBRATION_CENTER, CALIBRATION_SLOPE, COSINE_WEIGHT, COVERAGE_WEIGHT
+
+np = LazyModule('numpy')
+
+# Taille maximale (octets) d'un bloc dense de CV multiplié par la matrice des offres
+DEFAULT_BLOCK_BYTES = 64 * 1024 * 1024
+
+RANK_BY = ('offer', 'cv')
+
+
+def _sparse_tfidf(counts: Sequence[dict], vocabulary: Dict[str, int]):
+    """Matrice TF-IDF creuse (CSR : indptr, indices, data) de documents déjà tokenisés
+
+    TF sous-linéaire (1 + log tf) ; IDF calculé sur l'ensemble des documents fournis.
+    """
+    lengths = np.fromiter((len(c) for c in counts), dtype=np.int64, count=len(counts))
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    total = int(indptr[-1])
+    indices = np.fromiter((vocabulary.setdefault(term, len(vocabulary)) for c in counts for term in c),
+                          dtype=np.int64, count=total)
+    tf = np.fromiter((n for c in counts for n in c.values()), dtype=np.float64, count=total)
+    
+    df = np.bincount(indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(counts)) / (1 + df)) + 1.0
+    data = (1.0 + np.log(tf)) * idf[indices]
+    return indptr, indices, data
+
+
+class SimilarityMatrix:
+    """Scores de pertinence de n CV x m offres, calculés en une passe vectorisée
+
+    Même formule que le score local (LocalScorer) : recouvrement pondéré des termes
+    de l'offre par le CV et similarité cosinus, calibrés sur 0-100 ; l'IDF est ici
+    estimé sur l'ensemble des CV et des offres. Les CV sont projetés sur le seul
+    vocabulaire des offres (les autres termes ne comptent que dans leur norme) et
+    multipliés par blocs de block_bytes au plus : la mémoire reste bornée pour des
+    milliers de documents.
+    """
+    
+    def __init__(self, cv_ids: Sequence[str], offer_ids: Sequence[str], raw: "np.ndarray",
+                 center: float = CALIBRATION_CENTER, slope: float = CALIBRATION_SLOPE):
+        self.cv_ids = list(cv_ids)
+        self.offer_ids = list(offer_ids)
+        self.raw = raw
+        self.scores = np.rint(100 / (1 + np.exp(-slope * (raw - center)))).astype(np.int32)
+    
+    @classmethod
+    def from_texts(cls,
+                   cvs: Sequence[Tuple[str, str]],
+                   offers: Sequence[Tuple[str, str]],
+                   coverage_weight: float = COVERAGE_WEIGHT,
+                   cosine_weight: float = COSINE_WEIGHT,
+                   block_bytes: int = DEFAULT_BLOCK_BYTES) -> 'SimilarityMatrix':
+        """Matrice des CV (identifiant, texte) x offres (identifiant, texte)"""
+        if not np:
+            raise ImportError("numpy not installed. Run: pip install -r requirements.txt")
+        
+        cvs, offers = list(cvs), list(offers)
+        n, m = len(cvs), len(offers)
+        vocabulary: Dict[str, int] = {}
+        indptr, indices, data = _sparse_tfidf([analyze(text) for _, text in cvs + offers], vocabulary)
+        rows = np.repeat(np.arange(n + m), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=n + m))
+        
+        # Offres denses sur leur propre vocabulaire
+        offer_start = indptr[n]
+        offer_terms, offer_columns = np.unique(indices[offer_start:], return_inverse=True)
+        offer_matrix = np.zeros((m, len(offer_terms)), dtype=np.float32)
+        offer_matrix[rows[offer_start:] - n, offer_columns] = data[offer_start:]
+        offer_totals = offer_matrix.sum(axis=1)
+        offer_norms = norms[n:]
+        
+        column = np.full(len(vocabulary), -1, dtype=np.int64)
+        column[offer_terms] = np.arange(len(offer_terms))
+        raw = np.zeros((n, m), dtype=np.float32)
+        block = max(1, block_bytes // max(1, 4 * len(offer_terms)))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for first in range(0, n, block):
+                last = min(n, first + block)
+                start, stop = indptr[first], indptr[last]
+                columns = column[indices[start:stop]]
+                keep = columns >= 0
+                cv_block = np.zeros((last - first, len(offer_terms)), dtype=np.float32)
+                cv_block[rows[start:stop][keep] - first, columns[keep]] = data[start:stop][keep]
+                
+                coverage = (cv_block > 0).astype(np.float32) @ offer_matrix.T / offer_totals
+                cosine = cv_block @ offer_matrix.T / np.outer(norms[first:last], offer_norms)
+                raw[first:last] = np.nan_to_num(coverage_weight * coverage + cosine_weight * cosine)
+        
+        return cls([cv_id for cv_id, _ in cvs], [offer_id for offer_id, _ in offers], raw)
+    
+    def shortlist(self, by: str = 'offer', k: int = 10) -> Dict[str, List[dict]]:
+        """k meilleurs CV de chaque offre (by='offer') ou k meilleures offres de chaque CV (by='cv')"""
+        if by not in RANK_BY:
+            raise ValueError(f"Classement inconnu: {by} (choix: {', '.join(RANK_BY)})")
+        raw = self.raw.T if by == 'offer' else self.raw
+        scores = self.scores.T if by == 'offer' else self.scores
+        keys, candidates = (self.offer_ids, self.cv_ids) if by == 'offer' else (self.cv_ids, self.offer_ids)
+        k = min(k, len(candidates))
+        if k <= 0:
+            return {key: [] for key in keys}
+        
+        top = np.argpartition(-raw, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(raw, top, axis=1), axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        return {
+            key: [{'id': candidates[j], 'score': int(scores[i, j]), 'similarity': round(float(raw[i, j]), 4)}
+                  for j in top[i]]
+            for i, key in enumerate(keys)
+        }
+    
+    def top_pairs(self, n: int, min_score: Optional[int] = None) -> List[dict]:
+        """n meilleurs couples (CV, offre) de toute la matrice, du plus pertinent au moins pertinent"""
+        n = min(n, self.raw.size)
+        if n <= 0:
+            return []
+        flat = self.raw.ravel()
+        top = np.argpartition(-flat, n - 1)[:n]
+        top = top[np.argsort(-flat[top], kind='stable')]
+        pairs = []
+        for index in top:
+            i, j = divmod(int(index), len(self.offer_ids))
+            score = int(self.scores[i, j])
+            if min_score is not None and score < min_score:
+                break
+            pairs.append({'cv': self.cv_ids[i], 'offer': self.offer_ids[j], 'score': score,
+                          'similarity': round(float(self.raw[i, j]), 4)})
+        return pairs
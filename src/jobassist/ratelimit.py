@@ -0,0 +1,141 @@
+"""
+Limitation de débit côté client : requêtes et tokens par minute, par fournisseur et clé API,
+partagée entre processus (seaux de jetons SQLite)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .cache import DEFAULT_CACHE_DIR
+from .tracing import span
+
+# Quotas par minute (0: illimité) ; les valeurs configurées sont celles du fournisseur
+DEFAULT_LIMITS = {
+    'perplexity': {'rpm': int(os.getenv('JOBASSIST_PERPLEXITY_RPM', '0')),
+                   'tpm': int(os.getenv('JOBASSIST_PERPLEXITY_TPM', '0'))},
+    'gemini': {'rpm': int(os.getenv('JOBASSIST_GEMINI_RPM', '0')),
+               'tpm': int(os.getenv('JOBASSIST_GEMINI_TPM', '0'))},
+}
+# Fraction du quota visée et rafale autorisée (secondes de débit)
+DEFAULT_MARGIN = float(os.getenv('JOBASSIST_RATE_MARGIN', '0.85'))
+DEFAULT_BURST = 10.0
+
+
+class RateLimiter:
+    """Seaux de jetons requêtes/minute et tokens/minute d'un fournisseur et d'une clé API
+
+    L'état des seaux est stocké dans une base SQLite (DEFAULT_CACHE_DIR/ratelimit.sqlite)
+    et mis à jour en transaction : tous les processus et threads utilisant la même clé
+    se partagent le quota. Chaque seau se remplit à margin x quota / 60 par seconde et
+    contient au plus burst secondes de débit ; sur toute fenêtre d'une minute le débit
+    reste donc sous margin x quota x (60 + burst) / 60, soit le quota pour les valeurs
+    par défaut (0.85, 10 s).
+
+    Sans quota configuré (rpm et tpm à 0), acquire() ne fait rien.
+    """
+    
+    def __init__(self, provider: str, api_key: str, rpm: Optional[int] = None, tpm: Optional[int] = None,
+                 path: Optional[str] = None, margin: float = DEFAULT_MARGIN, burst: float = DEFAULT_BURST):
+        defaults = DEFAULT_LIMITS.get(provider, {})
+        self.provider = provider
+        self.limits = {'rpm': defaults.get('rpm', 0) if rpm is None else rpm,
+                       'tpm': defaults.get('tpm', 0) if tpm is None else tpm}
+        self.rates = {kind: margin * limit / 60 for kind, limit in self.limits.items() if limit}
+        self.capacities = {kind: max(1.0, rate * burst) for kind, rate in self.rates.items()}
+        key_hash = hashlib.sha256(f'{provider}:{api_key}'.encode('utf-8')).hexdigest()[:32]
+        self._keys = {kind: f'{key_hash}:{kind}' for kind in self.limits}
+        self.path = Path(path) if path else DEFAULT_CACHE_DIR / 'ratelimit.sqlite'
+        self.waited = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rates)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Connexion SQLite propre au thread courant (base créée au premier appel)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )''')
+            self._local.conn = conn
+        return conn
+    
+    def _update(self, costs: dict, force: bool = False) -> float:
+        """Remplit les seaux puis prélève costs s'ils y tiennent tous (ou si force) ;
+        retourne l'attente nécessaire (0 si prélevé)"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            levels = {}
+            for kind in costs:
+                row = conn.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?',
+                                   (self._keys[kind],)).fetchone()
+                capacity = self.capacities[kind]
+                levels[kind] = capacity if row is None else min(
+                    capacity, row[0] + max(0.0, now - row[1]) * self.rates[kind])
+            
+            wait = 0.0 if force else max((cost - levels[kind]) / self.rates[kind] for kind, cost in costs.items())
+            if wait <= 0:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)',
+                    [(self._keys[kind], min(self.capacities[kind], levels[kind] - cost), now)
+                     for kind, cost in costs.items()]
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return max(0.0, wait)
+    
+    def acquire(self, tokens: int = 0) -> float:
+        """Attend qu'une requête de tokens tokens tienne dans les quotas ; retourne l'attente (secondes)"""
+        if not self.enabled:
+            return 0.0
+        # Une requête plus grosse que le seau n'attend que de le trouver plein
+        costs = {kind: min(self.capacities[kind], 1 if kind == 'rpm' else tokens) for kind in self.rates}
+        wait = self._update(costs)
+        if wait <= 0:
+            return 0.0
+        
+        waited = 0.0
+        with span('rate_limit', cat='wait', provider=self.provider) as current:
+            while wait > 0:
+                time.sleep(wait)
+                waited += wait
+                wait = self._update(costs)
+            current.set(waited=round(waited, 3))
+        with self._lock:
+            self.waited += waited
+        return waited
+    
+    def settle(self, reserved: int, used: Optional[int]):
+        """Corrige le seau de tokens une fois la consommation réelle connue (rend ou prélève la différence)"""
+        if 'tpm' not in self.rates or used is None or used == reserved:
+            return
+        self._update({'tpm': used - min(reserved, self.capacities['tpm'])}, force=True)
+    
+    def stats(self) -> dict:
+        """Quotas, niveau actuel des seaux et attente cumulée du processus"""
+        levels = {}
+        if self.enabled:
+            conn = self._connect()
+            for kind in self.rates:
+                row = conn.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?',
+                                   (self._keys[kind],)).fetchone()
+                levels[kind] = round(self.capacities[kind] if row is None else min(
+                    self.capacities[kind], row[0] + max(0.0, time.time() - row[1]) * self.rates[kind]), 1)
+        return {'limits': self.limits, 'levels': levels, 'waited': round(self.waited, 3)}
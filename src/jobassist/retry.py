@@ -0,0 +1,203 @@
+"""
+Relances des requêtes API : politique par statut, backoff exponentiel avec jitter,
+Retry-After, budget de relances et échéance globale
+"""
+
+import contextlib
+import contextvars
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+from .lazy import LazyModule
+from .tracing import instant
+
+requests = LazyModule('requests')
+urllib3_exceptions = LazyModule('urllib3.exceptions')
+
+# Relances maximales par statut HTTP
+DEFAULT_STATUS_RETRIES = {429: 3, 500: 2, 502: 2, 503: 3, 504: 2}
+# Statuts d'une requête rejetée avant traitement : relançables même si elle n'est pas idempotente
+SAFE_STATUSES = frozenset({429, 503})
+# Durée totale maximale (secondes) au-delà de laquelle on ne relance plus
+DEFAULT_RETRY_DEADLINE = float(os.getenv('JOBASSIST_RETRY_DEADLINE', '60'))
+
+# Échecs réseau : connexion jamais établie (requête non envoyée) ou coupure après envoi
+CONNECT_ERROR = 'connect'
+TRANSPORT_ERROR = 'transport'
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """En-tête Retry-After (secondes ou date HTTP) converti en secondes"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """Nature d'une exception requests : CONNECT_ERROR, TRANSPORT_ERROR ou None (non relançable)"""
+    if isinstance(error, requests.exceptions.SSLError):
+        return None
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return CONNECT_ERROR
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0] if error.args else None, 'reason', None)
+        return CONNECT_ERROR if isinstance(reason, urllib3_exceptions.NewConnectionError) else TRANSPORT_ERROR
+    if isinstance(error, (requests.exceptions.ReadTimeout, requests.exceptions.ChunkedEncodingError)):
+        return TRANSPORT_ERROR
+    return None
+
+
+class RetryBudget:
+    """Plafonne les relances à une fraction des requêtes (seau de jetons)
+
+    Chaque requête dépose ratio jeton(s), chaque relance en consomme un ; le seau
+    démarre avec min_retries jetons et n'en garde jamais plus de max_tokens. Quand
+    un fournisseur est en panne franche, les relances s'arrêtent d'elles-mêmes au
+    lieu de multiplier la charge.
+    """
+    
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, max_tokens: float = 20):
+        self.ratio = ratio
+        self.max_tokens = max(max_tokens, min_retries)
+        self.tokens = float(min_retries)
+        self.requests = 0
+        self.retries = 0
+        self.refused = 0
+        self._lock = threading.Lock()
+    
+    def deposit(self):
+        with self._lock:
+            self.requests += 1
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+    
+    def withdraw(self) -> bool:
+        """Réserve une relance (False si le budget est épuisé)"""
+        with self._lock:
+            if self.tokens < 1:
+                self.refused += 1
+                return False
+            self.tokens -= 1
+            self.retries += 1
+            return True
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {'requests': self.requests, 'retries': self.retries, 'refused': self.refused,
+                    'tokens': round(self.tokens, 2)}
+
+
+class RetryPolicy:
+    """Décide si et quand relancer une requête échouée
+
+    - status_retries: relances maximales par statut HTTP (DEFAULT_STATUS_RETRIES)
+    - connection_retries: relances après un échec réseau
+    - délai: backoff exponentiel base_delay x 2^n plafonné à max_delay, tiré
+      uniformément entre 0 et ce plafond (full jitter) ; Retry-After sert de minimum,
+      et s'il dépasse max_delay on ne relance pas (mieux vaut basculer sur l'autre
+      fournisseur que d'attendre)
+    - deadline: aucune relance qui ferait dépasser cette durée totale
+    - budget: RetryBudget partagé par toutes les requêtes du client
+
+    Une requête non idempotente n'est relancée que si elle n'a pas pu être traitée :
+    connexion impossible ou statut de SAFE_STATUSES (429, 503). Dans fail_fast(),
+    les réponses en erreur ne sont pas relancées du tout (un autre fournisseur prend
+    le relais).
+    """
+    
+    def __init__(self,
+                 status_retries: Optional[Dict[int, int]] = None,
+                 connection_retries: int = 2,
+                 base_delay: float = 0.5,
+                 max_delay: float = 20.0,
+                 deadline: float = DEFAULT_RETRY_DEADLINE,
+                 budget: Optional[RetryBudget] = None):
+        self.status_retries = DEFAULT_STATUS_RETRIES if status_retries is None else status_retries
+        self.connection_retries = connection_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.budget = budget or RetryBudget()
+        # Variable de contexte : propre à chaque thread et à chaque tâche asyncio
+        self._fail_fast = contextvars.ContextVar('fail_fast', default=False)
+    
+    @contextlib.contextmanager
+    def fail_fast(self, enabled: bool = True):
+        """Pas de relance sur statut HTTP dans ce bloc (thread ou tâche asyncio courante) : quand
+        le routeur a un autre fournisseur, basculer coûte moins qu'attendre Retry-After et le backoff"""
+        token = self._fail_fast.set(enabled)
+        try:
+            yield
+        finally:
+            self._fail_fast.reset(token)
+    
+    def backoff(self, retry: int) -> float:
+        """Délai avant la relance n° retry (0, 1, ...)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+    
+    def decide(self, retry: int, started: float, idempotent: bool, status: Optional[int] = None,
+               error: Optional[str] = None, retry_after: Optional[float] = None) -> Optional[float]:
+        """Délai avant la relance n° retry, ou None s'il ne faut pas relancer
+
+        started: time.monotonic() de la première tentative ; status ou error
+        (CONNECT_ERROR / TRANSPORT_ERROR) décrivent l'échec.
+        """
+        if error is not None:
+            limit = self.connection_retries if error == CONNECT_ERROR or idempotent else 0
+        elif self._fail_fast.get():
+            limit = 0
+        else:
+            limit = self.status_retries.get(status, 0) if idempotent or status in SAFE_STATUSES else 0
+        if retry >= limit:
+            return None
+        
+        delay = self.backoff(retry)
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                return None
+            delay = max(delay, retry_after)
+        if time.monotonic() - started + delay > self.deadline:
+            return None
+        if not self.budget.withdraw():
+            return None
+        return delay
+    
+    def call(self, send: Callable[[int], "requests.Response"], provider: str,
+             idempotent: bool = False) -> "requests.Response":
+        """Exécute send(retry) jusqu'à une réponse définitive (relances comprises)
+
+        Retourne la dernière réponse (éventuellement en erreur) ou propage la
+        dernière exception réseau.
+        """
+        self.budget.deposit()
+        started = time.monotonic()
+        retry = 0
+        while True:
+            try:
+                response = send(retry)
+            except requests.RequestException as e:
+                delay = self.decide(retry, started, idempotent, error=classify_error(e))
+                if delay is None:
+                    raise
+                reason = type(e).__name__
+            else:
+                if response.status_code < 400:
+                    return response
+                delay = self.decide(retry, started, idempotent, status=response.status_code,
+                                    retry_after=parse_retry_after(response.headers.get('Retry-After')))
+                if delay is None:
+                    return response
+                reason = response.status_code
+                response.close()
+            instant('retry', cat='http', provider=provider, retry=retry + 1, reason=reason, delay=round(delay, 3))
+            time.sleep(delay)
+            retry += 1
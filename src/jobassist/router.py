@@ -0,0 +1,197 @@
+"""
+Routage adaptatif entre fournisseurs : latence (EWMA, percentiles), taux d'erreur et circuit breaker
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PROVIDER_LABELS = {'gemini': 'Gemini', 'perplexity': 'Perplexity'}
+
+
+class CircuitBreaker:
+    """Circuit breaker fermé / ouvert / semi-ouvert
+
+    Après failure_threshold échecs consécutifs le circuit s'ouvre : le fournisseur
+    n'est plus sollicité pendant reset_timeout secondes. Ensuite une seule requête
+    de test est autorisée (semi-ouvert) : un succès referme le circuit, un échec le
+    rouvre pour une nouvelle période.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = None
+    
+    def available(self) -> bool:
+        """Indique si une requête serait acceptée (sans réserver la requête de test)"""
+        now = time.monotonic()
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return now - self.opened_at >= self.reset_timeout
+        return self.probe_started_at is None or now - self.probe_started_at >= self.reset_timeout
+    
+    def acquire(self) -> bool:
+        """Autorise une requête ; en semi-ouvert, réserve l'unique requête de test"""
+        if not self.available():
+            return False
+        if self.state != self.CLOSED:
+            self.state = self.HALF_OPEN
+            self.probe_started_at = time.monotonic()
+        return True
+    
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probe_started_at = None
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip()
+    
+    def trip(self):
+        """Ouvre le circuit immédiatement"""
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.probe_started_at = None
+    
+    def reset(self):
+        """Referme le circuit"""
+        self.record_success()
+
+
+class LatencyStats:
+    """Latence d'un fournisseur pour une étape: moyenne mobile exponentielle et fenêtre glissante"""
+    
+    def __init__(self, alpha: float = 0.3, window: int = 50):
+        self.alpha = alpha
+        self.ewma = None
+        self.samples = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.last_used = 0.0
+    
+    def record(self, seconds: Optional[float], success: bool):
+        self.last_used = time.monotonic()
+        self.outcomes.append(success)
+        if seconds is None or not success:
+            return
+        self.samples.append(seconds)
+        self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+    
+    def percentile(self, p: float) -> Optional[float]:
+        """Percentile p (0-100) des latences récentes"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+    
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+class ProviderRouter:
+    """Choisit, pour chaque étape, le fournisseur sain actuellement le plus rapide
+
+    Le coût attendu d'un fournisseur est sa latence EWMA pénalisée par son taux
+    d'erreur récent. Un fournisseur sans mesure pour l'étape, ou non sollicité depuis
+    explore_after secondes, passe en premier (dans l'ordre de préférence) afin que
+    ses statistiques restent à jour.
+    """
+    
+    def __init__(self,
+                 providers: Sequence[str] = ('gemini', 'perplexity'),
+                 failure_threshold: int = 3,
+                 reset_timeout: float = 30.0,
+                 alpha: float = 0.3,
+                 window: int = 50,
+                 explore_after: float = 300.0):
+        self.providers = list(providers)
+        self.alpha = alpha
+        self.window = window
+        self.explore_after = explore_after
+        self._breakers = {p: CircuitBreaker(failure_threshold, reset_timeout) for p in self.providers}
+        self._stats: Dict[Tuple[str, str], LatencyStats] = {}
+        self._lock = threading.Lock()
+    
+    def _stats_for(self, provider: str, stage: str) -> LatencyStats:
+        key = (provider, stage)
+        if key not in self._stats:
+            self._stats[key] = LatencyStats(self.alpha, self.window)
+        return self._stats[key]
+    
+    def _expected_cost(self, provider: str, stage: str) -> float:
+        stats = self._stats_for(provider, stage)
+        if stats.ewma is None or time.monotonic() - stats.last_used >= self.explore_after:
+            return 0.0
+        return stats.ewma / max(0.1, 1 - stats.error_rate)
+    
+    def route(self, stage: str) -> List[str]:
+        """Fournisseurs dans l'ordre d'essai: disponibles du plus rapide au plus lent, puis circuits ouverts"""
+        with self._lock:
+            preference = {p: i for i, p in enumerate(self.providers)}
+            healthy = [p for p in self.providers if self._breakers[p].available()]
+            healthy.sort(key=lambda p: (self._expected_cost(p, stage), preference[p]))
+            return healthy + [p for p in self.providers if p not in healthy]
+    
+    def acquire(self, provider: str) -> bool:
+        """Réserve une requête auprès du fournisseur (False si son circuit est ouvert)"""
+        with self._lock:
+            return self._breakers[provider].acquire()
+    
+    def record_success(self, provider: str, stage: str, seconds: float):
+        with self._lock:
+            self._stats_for(provider, stage).record(seconds, True)
+            self._breakers[provider].record_success()
+    
+    def record_failure(self, provider: str, stage: str, seconds: Optional[float] = None):
+        with self._lock:
+            self._stats_for(provider, stage).record(seconds, False)
+            self._breakers[provider].record_failure()
+    
+    def is_available(self, provider: str) -> bool:
+        with self._lock:
+            return self._breakers[provider].available()
+    
+    def trip(self, provider: str):
+        """Ouvre le circuit d'un fournisseur (ex: quota atteint au démarrage)"""
+        with self._lock:
+            self._breakers[provider].trip()
+    
+    def reset(self, provider: str):
+        with self._lock:
+            self._breakers[provider].reset()
+    
+    def percentile(self, provider: str, stage: str, p: float) -> Optional[float]:
+        with self._lock:
+            return self._stats_for(provider, stage).percentile(p)
+    
+    def snapshot(self) -> dict:
+        """État courant: circuit de chaque fournisseur et statistiques par étape"""
+        with self._lock:
+            return {
+                'circuits': {p: b.state for p, b in self._breakers.items()},
+                'stages': {
+                    f"{provider}:{stage}": {
+                        'ewma': stats.ewma,
+                        'p50': stats.percentile(50),
+                        'p95': stats.percentile(95),
+                        'error_rate': stats.error_rate,
+                        'samples': len(stats.samples)
+                    }
+                    for (provider, stage), stats in self._stats.items()
+                }
+            }
@@ -0,0 +1,138 @@
+"""
+Score de pertinence local (sans réseau) : TF-IDF et recouvrement de mots-clés avec NumPy
+"""
+
+import math
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from .lazy import LazyModule
+
+np = LazyModule('numpy')
+
+SCORE_ENGINES = ('llm', 'local', 'hybrid')
+
+# Ligatures sans décomposition Unicode
+LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae', 'ß': 'ss'})
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#]*(?:[.\-/][a-z0-9+#]+)*')
+
+STOPWORDS = frozenset('''
+a ai au aux avec ce ces cette d dans de des du elle en et est etre eux il ils je
+l la le les leur leurs lui m ma mais me mes moi mon n ne nos notre nous on ou par
+pas pour qu que qui s sa se ses son sont sur t ta te tes toi ton tu un une vos
+votre vous y c j plus tres tout tous toute toutes comme afin ainsi aussi avoir
+fait faire etc sein chez entre sans sous vers dont deja bien non oui via selon
+the an and or of to in on for with by at from as is are be been was were this
+that these those it its we you your our their they he she his her will would
+can could should may must have has had not no but if so than then also such
+into over within about using use used
+'''.split())
+
+# Calibration du score 0-100: sigmoïde centrée sur un score brut "moyen"
+COVERAGE_WEIGHT = 0.7
+COSINE_WEIGHT = 0.3
+CALIBRATION_CENTER = 0.35
+CALIBRATION_SLOPE = 9.0
+
+
+def normalize(text: str) -> str:
+    """Minuscules et suppression des accents (seuls les caractères ASCII forment des termes)"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKD', text.translate(LIGATURES)).encode('ascii', 'ignore').decode('ascii')
+
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en termes normalisés (c++, node.js, ci/cd conservés), sans mots vides"""
+    return [
+        token for token in TOKEN_PATTERN.findall(normalize(text))
+        if len(token) > 1 and token not in STOPWORDS and not token.isdigit()
+    ]
+
+
+def _chunks(text: str) -> List[List[str]]:
+    """Lignes non vides d'un document, tokenisées (pseudo-corpus pour l'IDF)"""
+    return [tokens for tokens in (tokenize(line) for line in text.splitlines()) if tokens]
+
+
+class LocalScorer:
+    """Score CV/offre calculé localement en quelques millisecondes
+
+    Le texte complet des deux documents est vectorisé (TF sous-linéaire x IDF). Avec
+    seulement deux documents, l'IDF est estimé sur leurs lignes : un terme présent
+    dans beaucoup de lignes est générique. Le score brut combine le recouvrement
+    pondéré des termes de l'offre par le CV et la similarité cosinus, puis est
+    calibré sur 0-100 par une sigmoïde.
+    """
+    
+    def __init__(self,
+                 coverage_weight: float = COVERAGE_WEIGHT,
+                 cosine_weight: float = COSINE_WEIGHT,
+                 center: float = CALIBRATION_CENTER,
+                 slope: float = CALIBRATION_SLOPE):
+        if not np:
+            raise ImportError("numpy not installed. Run: pip install -r requirements.txt")
+        self.coverage_weight = coverage_weight
+        self.cosine_weight = cosine_weight
+        self.center = center
+        self.slope = slope
+    
+    def vectorize(self, cv_text: str, job_offer: str) -> Tuple["np.ndarray", "np.ndarray", Dict[str, int]]:
+        """Vecteurs TF-IDF du CV et de l'offre sur un vocabulaire commun"""
+        cv_chunks = _chunks(cv_text)
+        offer_chunks = _chunks(job_offer)
+        vocabulary: Dict[str, int] = {}
+        
+        def ids(tokens: List[str]) -> "np.ndarray":
+            return np.fromiter((vocabulary.setdefault(t, len(vocabulary)) for t in tokens),
+                               dtype=np.int64, count=len(tokens))
+        
+        cv_ids = [ids(chunk) for chunk in cv_chunks]
+        offer_ids = [ids(chunk) for chunk in offer_chunks]
+        size = len(vocabulary)
+        if size == 0:
+            return np.zeros(0), np.zeros(0), vocabulary
+        
+        all_chunks = cv_ids + offer_ids
+        df = np.bincount(np.concatenate([np.unique(c) for c in all_chunks]), minlength=size)
+        idf = np.log((1 + len(all_chunks)) / (1 + df)) + 1.0
+        
+        def tfidf(chunk_ids: List["np.ndarray"]) -> "np.ndarray":
+            if not chunk_ids:
+                return np.zeros(size)
+            tf = np.bincount(np.concatenate(chunk_ids), minlength=size).astype(np.float64)
+            weights = np.zeros(size)
+            present = tf > 0
+            weights[present] = 1.0 + np.log(tf[present])
+            return weights * idf
+        
+        return tfidf(cv_ids), tfidf(offer_ids), vocabulary
+    
+    def raw_score(self, cv_text: str, job_offer: str) -> float:
+        """Score brut entre 0 et 1"""
+        cv_vec, offer_vec, _ = self.vectorize(cv_text, job_offer)
+        offer_total = offer_vec.sum() if offer_vec.size else 0.0
+        if offer_total == 0 or not cv_vec.any():
+            return 0.0
+        
+        coverage = offer_vec[cv_vec > 0].sum() / offer_total
+        cosine = float(cv_vec @ offer_vec) / (np.linalg.norm(cv_vec) * np.linalg.norm(offer_vec))
+        return self.coverage_weight * coverage + self.cosine_weight * cosine
+    
+    def calibrate(self, raw: float) -> int:
+        """Projette le score brut sur l'échelle 0-100"""
+        return int(round(100 / (1 + math.exp(-self.slope * (raw - self.center)))))
+    
+    def score(self, cv_text: str, job_offer: str) -> int:
+        """Score de pertinence 0-100"""
+        return self.calibrate(self.raw_score(cv_text, job_offer))
+
+
+def combine_scores(llm_score: Optional[int], local_score: int) -> int:
+    """Score hybride: moyenne du score LLM et du score local (local seul si le LLM échoue)"""
+    if llm_score is None:
+        return local_score
+    return int(round((llm_score + local_score) / 2))
@@ -0,0 +1,357 @@
+"""
+Service HTTP local (jobassist serve) : un CVAdapter gardé chaud, une file d'attente bornée
+et un pool de workers
+"""
+
+import hashlib
+import json
+import queue
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .utils import silent_loaders
+
+OUTPUT_FORMATS = ('pdf', 'txt', 'docx')
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'txt': 'text/plain; charset=utf-8',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """File d'attente du service pleine"""
+
+
+def parse_multipart(content_type: str, body: bytes) -> Dict[str, Tuple[Optional[str], bytes]]:
+    """Champs d'un corps multipart/form-data : nom -> (nom de fichier ou None, contenu)"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+    )
+    if not message.is_multipart():
+        raise ValueError("Corps multipart/form-data attendu")
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if name:
+            fields[name] = (part.get_filename(), part.get_payload(decode=True) or b'')
+    return fields
+
+
+class AdaptationService:
+    """Exécute les adaptations soumises sur un pool de workers partageant un CVAdapter
+
+    Les fichiers d'un job (CV reçu, CV adapté) sont dans work_dir/jobs/<id> ; les
+    templates Word reçus sont rangés par hash de contenu, donc compilés une seule fois
+    (TemplateCache). Les jobs terminés depuis plus de job_ttl secondes sont supprimés.
+    """
+    
+    def __init__(self, adapter, workers: int = 4, queue_size: int = 32, work_dir: Optional[str] = None,
+                 job_ttl: float = 3600):
+        self.adapter = adapter
+        self.workers = workers
+        self.job_ttl = job_ttl
+        self._temp_dir = None if work_dir else tempfile.TemporaryDirectory(prefix='jobassist-serve-')
+        self.work_dir = Path(work_dir or self._temp_dir.name)
+        (self.work_dir / 'jobs').mkdir(parents=True, exist_ok=True)
+        (self.work_dir / 'templates').mkdir(exist_ok=True)
+        self.jobs = {}
+        self._events = {}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._threads = []
+    
+    def start(self) -> 'AdaptationService':
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'jobassist-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+    
+    def close(self):
+        """Arrête les workers après les jobs en cours et libère les ressources"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.adapter.close()
+        if self._temp_dir:
+            self._temp_dir.cleanup()
+    
+    def _template_path(self, data: bytes) -> str:
+        path = self.work_dir / 'templates' / f"{hashlib.sha256(data).hexdigest()[:32]}.docx"
+        if not path.exists():
+            path.write_bytes(data)
+        return str(path)
+    
+    def submit(self, cv_name: str, cv_data: bytes, job_offer: str, instructions: Optional[str] = None,
+               output_format: str = 'pdf', template: Optional[bytes] = None) -> dict:
+        """Met une adaptation en file ; lève QueueFullError si la file est pleine"""
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Format inconnu: {output_format} (choix: {', '.join(OUTPUT_FORMATS)})")
+        if (output_format == 'docx') != bool(template):
+            raise ValueError("Le format docx nécessite un template Word (et réciproquement)")
+        self._prune()
+        
+        job_id = uuid.uuid4().hex[:16]
+        job_dir = self.work_dir / 'jobs' / job_id
+        job_dir.mkdir()
+        cv_path = job_dir / f"cv{'.pdf' if cv_name.lower().endswith('.pdf') else '.txt'}"
+        cv_path.write_bytes(cv_data)
+        job = {
+            'id': job_id, 'status': QUEUED, 'format': output_format, 'score': None, 'error': None,
+            'timings': {}, 'created_at': time.time(), 'finished_at': None,
+            'cv_path': str(cv_path), 'job_offer': job_offer, 'instructions': instructions,
+            'template_path': self._template_path(template) if template else None,
+            'output_path': str(job_dir / f"CV_Adapte.{output_format}")
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+            self._events[job_id] = threading.Event()
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            self.delete(job_id)
+            raise QueueFullError("File d'attente pleine")
+        return job
+    
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                job['status'] = RUNNING
+            
+            try:
+                with silent_loaders():
+                    cv_text = self.adapter.load_cv(job['cv_path'])
+                result = self.adapter._process_offer(cv_text, job_id, job['job_offer'], job['output_path'],
+                                                     job['instructions'], job['template_path'])
+            except Exception as e:
+                result = {'score': None, 'error': str(e)[:500], 'timings': {}}
+            
+            with self._lock:
+                job.update(status=FAILED if result['error'] else DONE, score=result['score'],
+                           error=result['error'], timings=result['timings'], finished_at=time.time())
+                event = self._events.get(job_id)
+            if result['error']:
+                print(f"❌ [{job_id}] {result['error'][:100]}")
+            else:
+                print(f"✅ [{job_id}] {result['score']}% ({result['timings'].get('total', 0):.1f}s)")
+            if event:
+                event.set()
+    
+    def get(self, job_id: str) -> Optional[dict]:
+        """État public d'un job (sans les textes ni les chemins), ou None"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            public = {key: job[key] for key in ('id', 'status', 'format', 'score', 'error', 'timings',
+                                                'created_at', 'finished_at')}
+        if public['status'] == QUEUED:
+            public['position'] = self._position(job_id)
+        return public
+    
+    def _position(self, job_id: str) -> Optional[int]:
+        with self._queue.mutex:
+            pending = list(self._queue.queue)
+        return pending.index(job_id) + 1 if job_id in pending else None
+    
+    def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Attend la fin d'un job (au plus timeout secondes) et retourne son état"""
+        with self._lock:
+            event = self._events.get(job_id)
+        if event:
+            event.wait(timeout)
+        return self.get(job_id)
+    
+    def result(self, job_id: str) -> Optional[bytes]:
+        """CV adapté d'un job terminé, ou None"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] != DONE:
+                return None
+            path = job['output_path']
+        return Path(path).read_bytes()
+    
+    def delete(self, job_id: str) -> bool:
+        """Oublie un job et supprime ses fichiers (un job en file n'est alors pas exécuté)"""
+        with self._lock:
+            job = self.jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
+        if job is None:
+            return False
+        shutil.rmtree(self.work_dir / 'jobs' / job_id, ignore_errors=True)
+        return True
+    
+    def _prune(self):
+        """Supprime les jobs terminés depuis plus de job_ttl secondes"""
+        limit = time.time() - self.job_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job['finished_at'] and job['finished_at'] < limit]
+        for job_id in expired:
+            self.delete(job_id)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job['status'] for job in self.jobs.values()]
+        return {
+            'workers': self.workers,
+            'queued': statuses.count(QUEUED),
+            'running': statuses.count(RUNNING),
+            'done': statuses.count(DONE),
+            'failed': statuses.count(FAILED),
+            'queue_size': self._queue.maxsize,
+            'circuits': self.adapter.router.snapshot()['circuits']
+        }
+
+
+def make_handler(service: AdaptationService, max_upload: int, wait_timeout: float):
+    """Routes HTTP du service
+
+    - POST /jobs (multipart: cv, offer, instructions, format, template, wait)
+    - GET /jobs/<id>, GET /jobs/<id>/result, DELETE /jobs/<id>
+    - GET /health
+    """
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        server_version = 'JobAssist'
+        
+        def log_message(self, format, *args):
+            pass
+        
+        def _send(self, status: int, data: bytes, content_type: str, headers: Optional[dict] = None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def _send_json(self, status: int, body: dict, headers: Optional[dict] = None):
+            self._send(status, json.dumps(body, ensure_ascii=False).encode('utf-8'),
+                       'application/json; charset=utf-8', headers)
+        
+        def _send_result(self, job: dict):
+            data = service.result(job['id'])
+            if data is None:
+                return self._send_json(409, {**job, 'error': job['error'] or "Job non terminé"})
+            self._send(200, data, CONTENT_TYPES[job['format']], {
+                'Content-Disposition': f'attachment; filename="CV_Adapte.{job["format"]}"',
+                'X-Job-Id': job['id'],
+                'X-Score': '' if job['score'] is None else str(job['score'])
+            })
+        
+        def _route(self) -> Tuple[list, dict]:
+            url = urlsplit(self.path)
+            return [part for part in url.path.split('/') if part], parse_qs(url.query)
+        
+        def do_GET(self):
+            parts, _ = self._route()
+            if parts == ['health']:
+                return self._send_json(200, {'status': 'ok', **service.stats()})
+            if len(parts) in (2, 3) and parts[0] == 'jobs':
+                job = service.get(parts[1])
+                if job is None:
+                    return self._send_json(404, {'error': "Job inconnu"})
+                if len(parts) == 2:
+                    return self._send_json(200, job)
+                if parts[2] == 'result':
+                    return self._send_result(job)
+            self._send_json(404, {'error': "Route inconnue"})
+        
+        def do_DELETE(self):
+            parts, _ = self._route()
+            if len(parts) == 2 and parts[0] == 'jobs' and service.delete(parts[1]):
+                return self._send_json(200, {'id': parts[1], 'deleted': True})
+            self._send_json(404, {'error': "Job inconnu"})
+        
+        def do_POST(self):
+            parts, query = self._route()
+            if parts != ['jobs']:
+                return self._send_json(404, {'error': "Route inconnue"})
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > max_upload:
+                self.close_connection = True
+                return self._send_json(413, {'error': f"Requête trop volumineuse (max {max_upload // 1024 // 1024} Mo)"})
+            
+            def text(name: str) -> Optional[str]:
+                return fields[name][1].decode('utf-8').strip() if name in fields else None
+            
+            try:
+                fields = parse_multipart(self.headers.get('Content-Type', ''), self.rfile.read(length))
+                if 'cv' not in fields or not text('offer'):
+                    raise ValueError("Champs requis: cv (fichier PDF/TXT ou texte) et offer")
+                cv_name, cv_data = fields['cv']
+                template = fields['template'][1] if 'template' in fields else None
+                job = service.submit(cv_name or 'cv.txt', cv_data, text('offer'), text('instructions') or None,
+                                     text('format') or ('docx' if template else 'pdf'), template)
+            except QueueFullError as e:
+                return self._send_json(503, {'error': str(e)}, {'Retry-After': '5'})
+            except (ValueError, UnicodeDecodeError) as e:
+                return self._send_json(400, {'error': str(e)})
+            
+            wait = (query.get('wait') or [text('wait') or ''])[0].lower() in ('1', 'true', 'yes')
+            if wait:
+                job = service.wait(job['id'], wait_timeout)
+                if job is None:
+                    return self._send_json(404, {'error': "Job inconnu"})
+                if job['status'] == DONE:
+                    return self._send_result(job)
+                if job['status'] == FAILED:
+                    return self._send_json(502, job)
+            job = service.get(job['id'])
+            if job is None:
+                return self._send_json(404, {'error': "Job inconnu"})
+            self._send_json(202, {**job, 'url': f"/jobs/{job['id']}"}, {'Location': f"/jobs/{job['id']}"})
+    
+    return Handler
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(adapter, host: str = '127.0.0.1', port: int = 8080, workers: int = 4, queue_size: int = 32,
+          work_dir: Optional[str] = None, job_ttl: float = 3600, max_upload: int = 20 * 1024 * 1024,
+          wait_timeout: float = 300):
+    """Démarre le service et traite les requêtes jusqu'à Ctrl+C (ou SIGTERM)"""
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _terminate)
+    service = AdaptationService(adapter, workers, queue_size, work_dir, job_ttl)
+    httpd = ThreadingHTTPServer((host, port), make_handler(service, max_upload, wait_timeout))
+    service.start()
+    httpd.daemon_threads = True
+    print(f"🚀 JobAssist en écoute sur http://{host}:{httpd.server_address[1]} "
+          f"({workers} worker(s), file de {queue_size} job(s))")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du service...")
+    finally:
+        httpd.server_close()
+        service.close()
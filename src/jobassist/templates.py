@@ -0,0 +1,194 @@
+"""
+Templates Word compilés une fois (cache par chemin + mtime) et rendus en série
+"""
+
+import copy
+import io
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+from .lazy import LazyModule
+
+# python-docx, docxtpl et jinja2 chargés à la première compilation d'un template
+opc_constants = LazyModule('docx.opc.constants')
+opc_oxml = LazyModule('docx.opc.oxml')
+oxml_ns = LazyModule('docx.oxml.ns')
+docxtpl = LazyModule('docxtpl')
+jinja2 = LazyModule('jinja2')
+
+# Balises Jinja ({{ }}, {% %}, {# #}) dans un texte du template
+JINJA_TAG = re.compile(r'\{[{%#]')
+# Propriétés du document rendues par docxtpl (render_properties)
+TEMPLATED_PROPERTIES = ('author', 'comments', 'identifier', 'language', 'subject', 'title')
+# Internes de DocxTemplate réutilisés par la compilation (testés avec docxtpl 0.20) ;
+# s'il en manque un (autre version), le template est rendu par DocxTemplate.render
+DOCXTPL_INTERNALS = ('init_docx', 'get_xml', 'patch_xml', 'resolve_listing', 'fix_tables', 'get_headers_footers',
+                     'get_part_xml', 'get_headers_footers_encoding', 'HEADER_URI', 'FOOTER_URI')
+
+
+class CompiledTemplate:
+    """Template Word analysé une seule fois
+
+    Le .docx est lu et découpé à la construction : XML du corps, des en-têtes et
+    pieds de page préparés par docxtpl (patch_xml) et compilés par Jinja, autres
+    fichiers de l'archive compressés une fois pour toutes. Chaque rendu n'exécute plus que les
+    templates Jinja et la mise en forme docxtpl (sauts de ligne, tableaux), puis
+    réécrit l'archive, sans réanalyser le .docx. Un template dont les notes de bas
+    de page ou les propriétés contiennent des balises, ou une version de docxtpl
+    sans les internes de DOCXTPL_INTERNALS, est rendu par DocxTemplate, à partir du
+    contenu en mémoire.
+    """
+    
+    def __init__(self, data: bytes):
+        if not docxtpl:
+            raise ImportError("docxtpl not installed. Run: pip install -r requirements.txt")
+        self.data = data
+        self.fallback = not all(hasattr(docxtpl.DocxTemplate, name) for name in DOCXTPL_INTERNALS)
+        if self.fallback:
+            return
+        self._tpl = docxtpl.DocxTemplate(io.BytesIO(data))
+        self._tpl.init_docx()
+        docx = self._tpl.docx
+        
+        properties = docx.core_properties
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            members = OrderedDict((name, archive.read(name)) for name in archive.namelist())
+        core = next(part for part in docx.part.package.parts
+                    if part.content_type == opc_constants.CONTENT_TYPE.OPC_CORE_PROPERTIES)
+        self.fallback = core.partname.lstrip('/') not in members or any(
+            JINJA_TAG.search(getattr(properties, name) or '') for name in TEMPLATED_PROPERTIES
+        ) or any(
+            part.content_type == opc_constants.CONTENT_TYPE.WML_FOOTNOTES and JINJA_TAG.search(part.blob.decode('utf-8'))
+            for part in docx.part.package.parts
+        )
+        if self.fallback:
+            return
+        
+        # Propriétés sans balise : réécrites une fois, comme le fait render_properties
+        for name in TEMPLATED_PROPERTIES:
+            setattr(properties, name, getattr(properties, name))
+        members[core.partname.lstrip('/')] = core.blob
+        
+        self._env = jinja2.Environment()
+        self._body_name = docx.part.partname.lstrip('/')
+        self._body = self._compile(self._tpl.patch_xml(self._tpl.get_xml()))
+        # Squelette du document (sans le corps), complété à chaque rendu
+        self._skeleton = copy.deepcopy(docx.element)
+        body = self._skeleton.body
+        self._body_index = self._skeleton.index(body)
+        self._skeleton.remove(body)
+        
+        self._parts = {}
+        for uri in (self._tpl.HEADER_URI, self._tpl.FOOTER_URI):
+            for _, part in self._tpl.get_headers_footers(uri):
+                xml = self._tpl.get_part_xml(part)
+                self._parts[part.partname.lstrip('/')] = (
+                    self._compile(self._tpl.patch_xml(xml)),
+                    self._tpl.get_headers_footers_encoding(xml)
+                )
+        
+        # Archive des fichiers inchangés, compressée une fois ; chaque rendu y ajoute ses parties
+        base = io.BytesIO()
+        with zipfile.ZipFile(base, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, content in members.items():
+                if name != self._body_name and name not in self._parts:
+                    archive.writestr(name, content)
+        self._base = base.getvalue()
+    
+    @classmethod
+    def from_file(cls, template_path: Union[str, Path]) -> 'CompiledTemplate':
+        with open(template_path, 'rb') as f:
+            return cls(f.read())
+    
+    def _compile(self, xml: str):
+        return self._env.from_string(re.sub(r'<w:p([ >])', r'\n<w:p\1', xml))
+    
+    def _render_xml(self, template, context: dict) -> str:
+        """Même traitement que DocxTemplate.render_xml_part, template déjà compilé"""
+        xml = re.sub(r'\n<w:p([ >])', r'<w:p\1', template.render(context))
+        xml = xml.replace('{_{', '{{').replace('}_}', '}}').replace('{_%', '{%').replace('%_}', '%}')
+        return self._tpl.resolve_listing(xml)
+    
+    def _render_body(self, context: dict) -> bytes:
+        tree = self._tpl.fix_tables(self._render_xml(self._body, context))
+        # Renumérotation des images comme DocxTemplate.fix_docpr_ids
+        for i, element in enumerate(tree.xpath('//wp:docPr', namespaces=oxml_ns.nsmap)):
+            element.attrib['id'] = str(1001 + i)
+        root = copy.deepcopy(self._skeleton)
+        root.insert(self._body_index, tree)
+        return opc_oxml.serialize_part_xml(root)
+    
+    def render(self, context: dict, output_path: Optional[str] = None) -> Optional[bytes]:
+        """Rend le template dans output_path, ou retourne le .docx si output_path est None"""
+        if self.fallback:
+            tpl = docxtpl.DocxTemplate(io.BytesIO(self.data))
+            tpl.render(context)
+            target = io.BytesIO() if output_path is None else output_path
+            tpl.save(target)
+            return target.getvalue() if output_path is None else None
+        
+        buffer = io.BytesIO(self._base)
+        with zipfile.ZipFile(buffer, 'a', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(self._body_name, self._render_body(context))
+            for name, (template, encoding) in self._parts.items():
+                xml = self._render_xml(template, context).encode(encoding)
+                archive.writestr(name, opc_oxml.serialize_part_xml(opc_oxml.parse_xml(xml)))
+        if output_path is None:
+            return buffer.getvalue()
+        with open(output_path, 'wb') as f:
+            f.write(buffer.getbuffer())
+        return None
+    
+    def render_many(self, jobs: Iterable[Tuple[dict, Optional[str]]]) -> List[Optional[bytes]]:
+        """Rend plusieurs documents (contexte, chemin ou None) depuis ce template"""
+        return [self.render(context, output_path) for context, output_path in jobs]
+
+
+class TemplateCache:
+    """Cache des templates compilés, indexé par chemin et mtime (LRU borné)
+
+    Un template modifié sur disque (mtime ou taille différents) est recompilé au
+    prochain accès. Partagé entre threads.
+    """
+    
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, template_path: Union[str, Path]) -> CompiledTemplate:
+        """Template compilé pour ce chemin (compilé au premier accès ou après modification)"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        template = CompiledTemplate.from_file(path)
+        with self._lock:
+            self._entries[path] = (key, template)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return template
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
@@ -0,0 +1,139 @@
+"""
+Instrumentation par étape (spans) exportée au format Chrome trace-event
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Traceur actif (None: instrumentation désactivée, les spans ne coûtent presque rien)
+_tracer = None
+
+
+class Span:
+    """Span en cours : ses attributs peuvent être complétés jusqu'à sa fin"""
+    
+    __slots__ = ('args',)
+    
+    def __init__(self, args: dict):
+        self.args = args
+    
+    def set(self, **args):
+        self.args.update(args)
+
+
+class _NullSpan:
+    """Span sans effet, utilisé quand le traçage est désactivé"""
+    
+    args = {}
+    
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collecte les spans de tous les threads (événements Chrome trace-event)
+
+    Chaque span devient un événement complet ("ph": "X") : nom, catégorie, début et
+    durée en microsecondes, thread, attributs. save() écrit un JSON lisible par
+    chrome://tracing ou Perfetto (ui.perfetto.dev).
+    """
+    
+    def __init__(self):
+        self.events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.pid = os.getpid()
+    
+    def _tid(self) -> int:
+        thread = threading.current_thread()
+        tid = thread.ident
+        if tid not in self._threads:
+            self._threads[tid] = thread.name
+        return tid
+    
+    def record(self, name: str, cat: str, start: float, end: float, args: dict):
+        """Enregistre un span terminé (start/end: time.perf_counter())"""
+        event = {
+            'name': name, 'cat': cat, 'ph': 'X', 'pid': self.pid,
+            'ts': round((start - self._origin) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'args': args
+        }
+        with self._lock:
+            event['tid'] = self._tid()
+            self.events.append(event)
+    
+    def instant(self, name: str, cat: str, args: dict):
+        """Enregistre un événement ponctuel (bascule, hit de cache...)"""
+        event = {
+            'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'pid': self.pid,
+            'ts': round((time.perf_counter() - self._origin) * 1e6, 1),
+            'args': args
+        }
+        with self._lock:
+            event['tid'] = self._tid()
+            self.events.append(event)
+    
+    def to_dict(self) -> dict:
+        with self._lock:
+            metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                        for tid, name in self._threads.items()]
+            events = sorted(self.events, key=lambda event: event['ts'])
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+    
+    def save(self, path: str):
+        """Écrit la trace (format Chrome trace-event)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, default=str)
+
+
+def start_tracing() -> Tracer:
+    """Active le traçage pour tout le processus et retourne le traceur"""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    """Désactive le traçage et retourne le traceur (ou None s'il n'était pas actif)"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+@contextmanager
+def span(name: str, cat: str = 'stage', **args) -> Iterator[Span]:
+    """Mesure un bloc ; une exception le traversant est notée dans l'attribut error"""
+    tracer = _tracer
+    if tracer is None:
+        yield NULL_SPAN
+        return
+    
+    current = Span(args)
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.args.setdefault('error', f"{type(e).__name__}: {str(e)[:200]}")
+        raise
+    finally:
+        tracer.record(name, cat, start, time.perf_counter(), current.args)
+
+
+def instant(name: str, cat: str = 'stage', **args):
+    """Événement ponctuel (ignoré si le traçage est désactivé)"""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.instant(name, cat, args)
@@ -5,6 +5,24 @@ Utilitaires : loader, nettoyage Markdown, etc.
 import time
 import threading
 import re
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import List, Optional
+
+
+# Loaders désactivés par thread (workers du mode batch)
+_loader_state = threading.local()
+
+
+@contextmanager
+def silent_loaders():
+    """Désactive l'affichage des loaders dans le thread courant"""
+    previous = getattr(_loader_state, 'silent', False)
+    _loader_state.silent = True
+    try:
+        yield
+    finally:
+        _loader_state.silent = previous
 
 
 class Loader:
@@ -28,6 +46,8 @@ class Loader:
     
     def start(self):
         """Démarre le loader"""
+        if getattr(_loader_state, 'silent', False):
+            return
         self.stop_event.clear()
         self.thread = threading.Thread(target=self._animate, daemon=True)
         self.thread.start()
@@ -39,8 +59,8 @@ class Loader:
             self.thread.join(timeout=1)
 
 
-def clean_markdown(text: str) -> str:
-    """Nettoie le texte en enlevant les symboles Markdown"""
+def _clean_markdown_regex(text: str) -> str:
+    """Nettoyage de référence, règle par règle sur le texte entier (comparaisons et benchmark)"""
     # Enlever les références [1], [2], etc.
     text = re.sub(r'\[\d+\]', '', text)
     # Enlever les liens markdown [texte](url)
@@ -74,3 +94,237 @@ def clean_markdown(text: str) -> str:
     text = re.sub(r'\n{3,}', '\n\n', text)
     # Nettoyer les espaces en début/fin de texte
     return text.strip()
+
+
+# Règles de nettoyage Markdown (mêmes effets que _clean_markdown_regex). Les motifs
+# commencent par un caractère littéral pour que le moteur saute directement aux
+# candidats ; les marqueurs de début de ligne sont cherchés après un \n.
+CITATION = re.compile(r'\[\d+\]')
+LINK = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+BOLD_STARS = re.compile(r'\*\*([^\*]+)\*\*')
+BOLD_UNDERSCORES = re.compile(r'__([^_]+)__')
+ITALIC_STAR = re.compile(r'\*(?<!\*\*)([^\*\n]+)\*(?!\*)')
+ITALIC_UNDERSCORE = re.compile(r'_(?<!__)([^_\n]+)_(?!_)')
+HEADING = re.compile(r'#{1,6}\s+')
+NUMBERED = re.compile(r'\d+\.\s+')
+BULLET = re.compile(r'[-*+]\s+')
+LINE_MARKERS = re.compile(r'\n(?=[-#*+\d])(?:#{1,6}[^\S\n]+(?=\S))?(?:\d+\.[^\S\n]+(?=\S))?(?:[-*+][^\S\n]+(?=\S))?')
+BARE_MARKER_LINE = re.compile(r'\n(?:#{1,6}|\d+\.|[-*+])[^\S\n]*\n')
+CODE_BLOCK = re.compile(r'```[^`]*```')
+INLINE_CODE = re.compile(r'`([^`]+)`')
+TABLE_PIPE = re.compile(r'\s*\|\s*')
+SEPARATOR = re.compile(r'[-=]{3,}$')
+QUOTE = re.compile(r'>\s+')
+LINE_ENDS = re.compile(r'\n(?:[-=]{3,}(?=\n)|>[^\S\n]+(?=\S))')
+BARE_QUOTE_LINE = re.compile(r'\n>[^\S\n]*\n')
+SPACES = re.compile(r'[ \t]+')
+BLANK_LINES = re.compile(r'\n{3,}')
+
+# Remplacement par le premier groupe, sans passer par l'expansion de r'\1' en Python
+_inner = itemgetter(1)
+
+# Constructions d'une ligne qu'une règle prolongerait sur les lignes suivantes (ou précédentes)
+OPEN_LINK = re.compile(r'\[[^\]]*$|\[[^\]]+\]\([^\)]*$')
+OPEN_BOLD = re.compile(r'\*\*[^*]*$|__[^_]*$')
+OPEN_CODE = re.compile(r'`[^`]*$')
+BARE_HEADING = re.compile(r'#{1,6}\s*$')
+BARE_NUMBER = re.compile(r'\d+\.\s*$')
+BARE_BULLET = re.compile(r'[-*+]\s*$')
+BARE_QUOTE = re.compile(r'>\s*$')
+PIPE_EDGE = re.compile(r'^\s*\||\|\s*$')
+
+
+def _line_starts(pattern, bare_line, text: str) -> Optional[str]:
+    """Retire les marqueurs de début de ligne
+
+    Les motifs ne franchissent pas les fins de ligne ; s'il reste un marqueur seul
+    sur sa ligne (que la règle d'origine prolongerait sur la suivante), retourne None.
+    """
+    text = pattern.sub('\n', '\n' + text + '\n')
+    if bare_line.search(text):
+        return None
+    return text[1:-1]
+
+
+def _strip_markdown(text: str) -> str:
+    """Applique les règles au texte entier, lignes nettoyées (sans fusion des lignes vides)"""
+    if '[' in text:
+        text = LINK.sub(_inner, CITATION.sub('', text))
+    if '**' in text:
+        text = BOLD_STARS.sub(_inner, text)
+    if '__' in text:
+        text = BOLD_UNDERSCORES.sub(_inner, text)
+    if '*' in text:
+        text = ITALIC_STAR.sub(_inner, text)
+    if '_' in text:
+        text = ITALIC_UNDERSCORE.sub(_inner, text)
+    
+    markers = _line_starts(LINE_MARKERS, BARE_MARKER_LINE, text)
+    if markers is None:
+        # Marqueur seul sur sa ligne : les règles s'enchaînent sur le texte modifié
+        for pattern in (HEADING, NUMBERED, BULLET):
+            text = re.sub('^' + pattern.pattern, '', text, flags=re.MULTILINE)
+    else:
+        text = markers
+    
+    if '`' in text:
+        if '```' in text:
+            text = CODE_BLOCK.sub('', text)
+        text = INLINE_CODE.sub(_inner, text)
+    if '|' in text:
+        # \s*|\s* : chaque barre et les blancs qui l'entourent deviennent une espace
+        cells = text.split('|')
+        text = ' '.join([cells[0].rstrip()] + [cell.strip() for cell in cells[1:-1]] + [cells[-1].lstrip()])
+    
+    ends = _line_starts(LINE_ENDS, BARE_QUOTE_LINE, text)
+    if ends is None:
+        text = re.sub('^' + SEPARATOR.pattern, '', text, flags=re.MULTILINE)
+        text = re.sub('^' + QUOTE.pattern, '', text, flags=re.MULTILINE)
+    else:
+        text = ends
+    
+    text = text.replace('\t', ' ')
+    while '  ' in text:
+        text = text.replace('  ', ' ')
+    return '\n'.join([line.strip() for line in text.split('\n')])
+
+
+def _clean_line(line: str) -> Optional[str]:
+    """Applique les règles à une ligne isolée, en sautant celles dont elle n'a pas les marqueurs
+
+    Retourne None si une règle appliquée au texte entier déborderait de la ligne
+    (lien, gras ou code non refermé, marqueur seul, bloc de code, tableau).
+    """
+    if '[' in line:
+        line = LINK.sub(_inner, CITATION.sub('', line))
+        if OPEN_LINK.search(line):
+            return None
+    if '**' in line or '__' in line:
+        line = BOLD_UNDERSCORES.sub(_inner, BOLD_STARS.sub(_inner, line))
+        if OPEN_BOLD.search(line):
+            return None
+    if '*' in line:
+        line = ITALIC_STAR.sub(_inner, line)
+    if '_' in line:
+        line = ITALIC_UNDERSCORE.sub(_inner, line)
+    
+    first = line[:1]
+    if first == '#':
+        if BARE_HEADING.match(line):
+            return None
+        match = HEADING.match(line)
+        if match:
+            line = line[match.end():]
+            first = line[:1]
+    if first.isdigit():
+        if BARE_NUMBER.match(line):
+            return None
+        match = NUMBERED.match(line)
+        if match:
+            line = line[match.end():]
+            first = line[:1]
+    if first and first in '-*+':
+        if BARE_BULLET.match(line):
+            return None
+        match = BULLET.match(line)
+        if match:
+            line = line[match.end():]
+    
+    if '`' in line:
+        if '```' in line:
+            return None
+        line = INLINE_CODE.sub(_inner, line)
+        if OPEN_CODE.search(line):
+            return None
+    if '|' in line:
+        if PIPE_EDGE.search(line):
+            return None
+        line = TABLE_PIPE.sub(' ', line)
+    
+    first = line[:1]
+    if first and first in '-=' and SEPARATOR.match(line):
+        return ''
+    if first == '>':
+        if BARE_QUOTE.match(line):
+            return None
+        match = QUOTE.match(line)
+        if match:
+            line = line[match.end():]
+    if '\t' in line or '  ' in line:
+        line = SPACES.sub(' ', line)
+    return line.strip()
+
+
+class MarkdownCleaner:
+    """Nettoyage Markdown incrémental, en une passe ligne par ligne
+
+    Le résultat est identique à celui des règles appliquées une à une au texte
+    entier. Chaque ligne terminée est nettoyée dès sa réception (feed() retourne le
+    texte devenu définitif) ; la dernière ligne non vide reste retenue tant que la
+    suivante peut s'y rattacher (tableau). Dès qu'une ligne contient une construction
+    qui déborde sur ses voisines (bloc de code, gras non refermé...), le reste du
+    texte est nettoyé d'un bloc à la fermeture.
+    """
+    
+    def __init__(self):
+        self._partial = ''
+        self._held = []
+        self._rest = None
+        self._started = False
+        self._blank = False
+    
+    def _emit(self, lines: List[str]) -> str:
+        """Texte définitif de lignes nettoyées (une seule ligne vide entre deux paragraphes)"""
+        parts = []
+        for line in lines:
+            if not line:
+                self._blank = self._started
+                continue
+            if self._started:
+                parts.append('\n\n' if self._blank else '\n')
+            parts.append(line)
+            self._started = True
+            self._blank = False
+        return ''.join(parts)
+    
+    def _line(self, raw: str) -> str:
+        if self._rest is not None:
+            self._rest.append(raw)
+            return ''
+        line = _clean_line(raw)
+        if line is None:
+            self._rest = [held_raw for held_raw, _ in self._held] + [raw]
+            self._held = []
+            return ''
+        if not line:
+            # Ligne vide une fois nettoyée : une barre de tableau plus bas peut la traverser
+            self._held.append((raw, ''))
+            return ''
+        text = self._emit([held_line for _, held_line in self._held])
+        self._held = [(raw, line)]
+        return text
+    
+    def feed(self, chunk: str) -> str:
+        """Ajoute un fragment de texte ; retourne le texte nettoyé devenu définitif"""
+        self._partial += chunk
+        if '\n' not in chunk:
+            return ''
+        lines = self._partial.split('\n')
+        self._partial = lines.pop()
+        return ''.join([self._line(raw) for raw in lines])
+    
+    def close(self) -> str:
+        """Termine le texte ; retourne la fin du texte nettoyé"""
+        text = self._line(self._partial)
+        self._partial = ''
+        if self._rest is not None:
+            text += self._emit(_strip_markdown('\n'.join(self._rest)).split('\n'))
+            self._rest = None
+        text += self._emit([held_line for _, held_line in self._held])
+        self._held = []
+        return text
+
+
+def clean_markdown(text: str) -> str:
+    """Nettoie le texte en enlevant les symboles Markdown"""
+    return BLANK_LINES.sub('\n\n', _strip_markdown(text)).strip()